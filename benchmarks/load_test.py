@@ -0,0 +1,462 @@
+"""Load-test the whole question path offline: agent, `search-3`, MCP server and Elasticsearch.
+
+Run with `python benchmarks/load_test.py --sessions 20 --questions 5`. Everything runs
+locally:
+
+- a stub Elasticsearch serves a minimal OpenAPI spec with the `search-3` operation and
+  canned `_search` responses after a configurable latency;
+- `mcp-server-elasticsearch/chat/server.py` runs in a subprocess against the stub;
+- the chatbot's agent (`chatbot/langchain_agent.py`) runs with a scripted chat model
+  that searches, then answers, with a configurable latency and token rate.
+
+Each simulated session asks its questions one after the other through the admission
+scheduler, as Chainlit's `on_message` does (the Chainlit UI itself is not driven). The
+report gives throughput, the latency and LLM calls of each answer path (fast path or
+agent, `--no-fast-path` sends every question to the agent), and p50/p95/p99 latencies of
+each stage: queue wait, LLM calls, searches as seen by the agent, and Elasticsearch as seen
+by the stub.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import uvicorn
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "chatbot"), str(ROOT / "src")]
+
+QUESTIONS = [
+    "what is the status for the database migration mentioned in the q3 project plan",
+    "What is project alpha and what are its features",
+    "who is assigned to the payment ticket",
+    "what is the travel expense policy",
+    "explain the deployment runbook",
+    "which issues are blocking the next release",
+    "where is the architecture documentation for the search service",
+    "what are the benefits for new hires",
+]
+
+WORDS = [
+    "project",
+    "alpha",
+    "database",
+    "migration",
+    "plan",
+    "release",
+    "search",
+    "service",
+    "deployment",
+    "runbook",
+    "policy",
+    "expense",
+    "ticket",
+    "status",
+    "sprint",
+    "team",
+    "review",
+    "design",
+    "api",
+    "gateway",
+]
+
+# Characters per streamed token of the scripted model
+TOKEN_CHARS = 4
+
+PERCENTILES = (50, 95, 99)
+
+
+def free_port() -> int:
+    """A free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def openapi_spec() -> dict:
+    """OpenAPI spec with the single `search-3` operation used by the agent."""
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Stub Elasticsearch", "version": "1.0.0"},
+        "paths": {
+            "/{index}/_search": {
+                "get": {
+                    "operationId": "search-3",
+                    "summary": "Run a search",
+                    "parameters": [
+                        {
+                            "in": "path",
+                            "name": "index",
+                            "required": True,
+                            "schema": {"type": "string"},
+                        },
+                        {"in": "query", "name": "q", "schema": {"type": "string"}},
+                    ],
+                    "responses": {"200": {"description": "Search results"}},
+                }
+            }
+        },
+    }
+
+
+class StubElasticsearch:
+    """Canned search responses after a configurable latency, on a local port.
+
+    Args:
+        latency: Mean seconds per search.
+        jitter: Standard deviation of the latency, relative to its mean.
+        hits: Hits per response.
+        doc_words: Words in the body of each hit.
+    """
+
+    def __init__(self, latency=0.02, jitter=0.3, hits=10, doc_words=300):
+        self.latency = latency
+        self.jitter = jitter
+        self.hits = hits
+        self.doc_words = doc_words
+        self.service_times: list[float] = []
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        app = Starlette(
+            routes=[
+                Route("/openapi.json", self.spec),
+                Route("/{index}/_search", self.search, methods=["GET", "POST"]),
+                Route("/", self.info),
+            ]
+        )
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="error")
+        self.server = uvicorn.Server(config)
+
+    def start(self) -> None:
+        """Serve in a background thread."""
+        threading.Thread(target=self.server.run, daemon=True).start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    async def spec(self, request: Request) -> JSONResponse:
+        """The OpenAPI spec read by the MCP server at startup."""
+        return JSONResponse(openapi_spec())
+
+    async def info(self, request: Request) -> JSONResponse:
+        """Cluster info, probed by node health checks."""
+        return JSONResponse({"version": {"number": "8.0.0-stub"}})
+
+    async def search(self, request: Request) -> JSONResponse:
+        """Canned hits, generated from the query so that repeated searches match."""
+        start = time.perf_counter()
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.latency * self.jitter)))
+        index = request.path_params["index"]
+        q = request.query_params.get("q", "")
+        rng = random.Random(q)  # noqa: S311
+        hits = [
+            {
+                "_index": rng.choice(["content-jira", "content-confluence", "content-sharepoint"]),
+                "_id": str(rng.randrange(10**6)),
+                "_score": round(rng.uniform(1, 20), 3),
+                "_source": {
+                    "title": " ".join(rng.choices(WORDS, k=6)),
+                    "body": " ".join(rng.choices(WORDS, k=self.doc_words)),
+                },
+            }
+            for _ in range(self.hits)
+        ]
+        body = {
+            "took": 1,
+            "_shards": {"total": index.count(",") + 1, "successful": index.count(",") + 1},
+            "hits": {"total": {"value": self.hits * 10}, "hits": hits},
+        }
+        self.service_times.append(time.perf_counter() - start)
+        return JSONResponse(body)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model playing the ReAct agent: `searches` searches, then a final answer.
+
+    Grounded answer calls of the fast path get a plain-text answer.
+
+    Waits `latency` seconds before its first token, then streams tokens every
+    `token_interval` seconds.
+    """
+
+    latency: float = 0.3
+    token_interval: float = 0.005
+    searches: int = 1
+    answer_words: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        transcript = [str(m.content) for m in messages]
+        done = sum(text.count("TOOL RESPONSE:") for text in transcript)
+        question = next(
+            (text.rsplit("\n\n", 1)[-1] for text in transcript if "USER'S INPUT" in text),
+            transcript[-1],
+        )
+        if any("== Search Results ==" in text for text in transcript):
+            rng = random.Random(transcript[-1])  # noqa: S311
+            return " ".join(rng.choices(WORDS, k=self.answer_words)).capitalize() + "."
+        if done < self.searches:
+            action = {
+                "action": "search-3",
+                "action_input": {"query": f"{question} {done or ''}".strip()},
+            }
+        else:
+            rng = random.Random(question)  # noqa: S311
+            answer = " ".join(rng.choices(WORDS, k=self.answer_words)).capitalize() + "."
+            action = {"action": "Final Answer", "action_input": answer}
+        return f"```json\n{json.dumps(action)}\n```"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self._reply(messages)
+        time.sleep(self.latency + self.token_interval * len(text) / TOKEN_CHARS)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = self._reply(messages)
+        await asyncio.sleep(self.latency)
+        for i in range(0, len(text), TOKEN_CHARS):
+            await asyncio.sleep(self.token_interval)
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(text[i : i + TOKEN_CHARS])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class StageTimer(AsyncCallbackHandler):
+    """Time spent in LLM calls and tools during one agent run."""
+
+    def __init__(self):
+        self.started: dict[Any, float] = {}
+        self.llm = 0.0
+        self.search = 0.0
+        self.llm_calls = 0
+        self.searches = 0
+        self.first_token: Optional[float] = None
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        """Start timing an LLM call."""
+        self.started[run_id] = time.perf_counter()
+
+    async def on_llm_new_token(self, token, **kwargs):
+        """Record the first streamed token."""
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        """Add the duration of an LLM call."""
+        self.llm += time.perf_counter() - self.started.pop(run_id)
+        self.llm_calls += 1
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        """Start timing a search."""
+        self.started[run_id] = time.perf_counter()
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        """Add the duration of a search."""
+        self.search += time.perf_counter() - self.started.pop(run_id)
+        self.searches += 1
+
+
+def start_mcp_server(es: StubElasticsearch) -> tuple[subprocess.Popen, str]:
+    """Run `chat/server.py` against the stub and wait until it accepts connections."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), os.environ.get("PYTHONPATH", "")]),
+        "ELASTICSEARCH_URL": es.url,
+        "ELASTIC_API_KEY": "load-test",
+        "ELK_MCP_OPENAPI_SPEC": f"{es.url}/openapi.json",
+        "ELK_MCP_SPEC_CACHE": "false",
+        "ELK_MCP_REGISTRY_SNAPSHOT": "",
+        "MCP_SERVER_PORT": str(port),
+    }
+    server = subprocess.Popen(  # noqa: S603
+        [sys.executable, str(ROOT / "mcp-server-elasticsearch" / "chat" / "server.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"MCP server exited with code {server.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return server, f"http://127.0.0.1:{port}/sse"
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("MCP server did not start within 30 s")
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Mean and percentiles of ``samples``, in milliseconds."""
+    if not samples:
+        return {"mean": 0.0, **{f"p{p}": 0.0 for p in PERCENTILES}}
+    ordered = sorted(samples)
+    summary = {"mean": statistics.fmean(ordered) * 1000}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+    return summary
+
+
+async def drive(agent_module, scheduler, sessions: int, questions: int) -> dict[str, Any]:
+    """Run ``sessions`` concurrent sessions asking ``questions`` questions each."""
+    from scheduler import Overloaded
+
+    stages: dict[str, list[float]] = {
+        "total": [],
+        "queue": [],
+        "ttft": [],
+        "llm": [],
+        "search": [],
+        "other": [],
+    }
+    counts = {"answered": 0, "rejected": 0, "failed": 0, "llm_calls": 0, "searches": 0}
+
+    async def session(n: int) -> None:
+        session_id = f"load-{n}"
+        for i in range(questions):
+            question = QUESTIONS[(n + i) % len(QUESTIONS)]
+            timer = StageTimer()
+            start = time.perf_counter()
+            try:
+                # A root span per question, as the Chainlit handler opens
+                with agent_module.tracer.span("chat message", kind="server"):
+                    async with scheduler.slot(session_id) as ticket:
+                        agent_module.get_agent(session_id).verbose = False
+                        await agent_module.arun_question(
+                            question, callbacks=[timer], session_id=session_id
+                        )
+            except Overloaded:
+                counts["rejected"] += 1
+                continue
+            except Exception:
+                counts["failed"] += 1
+                continue
+            total = time.perf_counter() - start
+            counts["answered"] += 1
+            counts["llm_calls"] += timer.llm_calls
+            counts["searches"] += timer.searches
+            stages["total"].append(total)
+            stages["queue"].append(ticket.wait_seconds)
+            stages["ttft"].append((timer.first_token or time.perf_counter()) - start)
+            stages["llm"].append(timer.llm)
+            stages["search"].append(timer.search)
+            stages["other"].append(max(0.0, total - ticket.wait_seconds - timer.llm - timer.search))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(n) for n in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "counts": counts, "stages": stages}
+
+
+def main() -> None:
+    """Run the load test."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated sessions")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per session")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Scheduler concurrency")
+    parser.add_argument("--max-queue", type=int, default=1000, help="Scheduler queue size")
+    parser.add_argument("--es-latency-ms", type=float, default=20.0)
+    parser.add_argument("--es-jitter", type=float, default=0.3)
+    parser.add_argument("--hits", type=int, default=10, help="Hits per search response")
+    parser.add_argument("--doc-words", type=int, default=300, help="Words per hit body")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Time to first token")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Interval between tokens")
+    parser.add_argument("--searches", type=int, default=1, help="Searches per question")
+    parser.add_argument(
+        "--no-fast-path", action="store_true", help="Send every question to the agent"
+    )
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    es = StubElasticsearch(args.es_latency_ms / 1000, args.es_jitter, args.hits, args.doc_words)
+    es.start()
+    mcp_server, mcp_url = start_mcp_server(es)
+    try:
+        os.environ["MCP_SERVER_URL"] = mcp_url
+        for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_DEPLOYMENT", "OPENAI_API_VERSION"):
+            os.environ.setdefault(name, "load-test")
+        os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1")
+        os.environ["LLM_CACHE"] = "false"
+        os.environ["FAST_PATH"] = "false" if args.no_fast_path else "true"
+
+        import langchain_agent
+        from scheduler import AgentScheduler
+
+        # Sessions build their agent on first use, with the scripted model
+        langchain_agent.llm = ScriptedChatModel(
+            latency=args.llm_latency_ms / 1000,
+            token_interval=args.token_ms / 1000,
+            searches=args.searches,
+        )
+        scheduler = AgentScheduler(
+            max_concurrent=args.max_concurrent,
+            max_queue=args.max_queue,
+            max_queued_per_user=args.questions,
+        )
+        result = asyncio.run(drive(langchain_agent, scheduler, args.sessions, args.questions))
+        result["paths"] = langchain_agent.get_path_stats()
+        langchain_agent.mcp_pool.close()
+    finally:
+        mcp_server.terminate()
+        try:
+            mcp_server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # Uvicorn waits for open SSE streams to close
+            mcp_server.kill()
+
+    counts = result["counts"]
+    report = {
+        "sessions": args.sessions,
+        "questions": args.sessions * args.questions,
+        **counts,
+        "elapsed_seconds": result["elapsed"],
+        "questions_per_second": counts["answered"] / result["elapsed"],
+        "stages_ms": {name: summarize(samples) for name, samples in result["stages"].items()},
+        "elasticsearch_ms": summarize(es.service_times),
+        "paths": result["paths"],
+    }
+    report["stages_ms"]["elasticsearch"] = report.pop("elasticsearch_ms")
+
+    print(
+        f"{report['answered']} answered, {report['rejected']} rejected, {report['failed']} failed "
+        f"in {report['elapsed_seconds']:.2f} s: {report['questions_per_second']:.2f} questions/s "
+        f"({counts['llm_calls']} LLM calls, {counts['searches']} searches)"
+    )
+    for path, stats in report["paths"].items():
+        print(
+            f"{path} path: {stats['questions']} questions, "
+            f"{stats['mean_llm_calls']:.1f} LLM calls and {stats['mean_ms']:.1f} ms per question"
+        )
+    print(f"{'stage':<14}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for name, summary in report["stages_ms"].items():
+        print(f"{name:<14}" + "".join(f"{summary[k]:>10.1f}" for k in ("mean", "p50", "p95", "p99")))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
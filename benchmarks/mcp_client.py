@@ -0,0 +1,113 @@
+"""Compare the per-search overhead of a new MCP connection against the pooled client.
+
+Run with `python benchmarks/mcp_client.py`. A local MCP server exposing a stub
+`search-3` tool is started over SSE, so the numbers measure the client side only:
+the SSE handshake and MCP initialize round-trip paid by a new `Client` per search,
+against a call on a persistent session of `chatbot/mcp_client.py`.
+"""
+
+import argparse
+import asyncio
+import functools
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import uvicorn
+from fastmcp import FastMCP
+from fastmcp.client import Client
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "chatbot"))
+
+from mcp_client import MCPClientPool
+
+
+def start_stub_server() -> tuple[str, uvicorn.Server]:
+    """Serve a stub `search-3` tool over SSE on a free local port."""
+    mcp = FastMCP("stub")
+
+    @mcp.tool(name="search-3")
+    def search(index: str, q: str) -> dict:
+        return {"hits": {"total": {"value": 1}, "hits": [{"_index": index, "_source": {"q": q}}]}}
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config(mcp.sse_app(), host="127.0.0.1", port=port, log_level="error")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/sse", server
+
+
+def new_connection_search(url: str, q: str) -> None:
+    """Search the way the agent used to: one connection and event loop per call."""
+
+    async def _run():
+        async with Client(url) as client:
+            await client.call_tool_mcp("search-3", {"index": "content-*", "q": q})
+
+    asyncio.run(_run())
+
+
+def timed(search, repeat: int) -> list[float]:
+    """Time ``repeat`` sequential searches."""
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        search(f"query {i}")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def throughput(search, concurrency: int, total: int) -> float:
+    """Searches per second with ``concurrency`` agent threads."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(search, [f"query {i}" for i in range(total)]))
+    return total / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the MCP client benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+
+    url, server = start_stub_server()
+    pool = MCPClientPool(url, size=args.pool_size)
+
+    def pooled_search(q: str) -> None:
+        pool.call_tool("search-3", {"index": "content-*", "q": q})
+
+    try:
+        pooled_search("warm-up")
+        results = {
+            "new connection": functools.partial(new_connection_search, url),
+            "pooled session": pooled_search,
+        }
+        latencies = {label: timed(search, args.repeat) for label, search in results.items()}
+        for label, durations in latencies.items():
+            rate = throughput(results[label], args.concurrency, args.repeat * 2)
+            print(
+                f"{label:>15}: median {statistics.median(durations) * 1e3:7.2f} ms"
+                f"  p95 {statistics.quantiles(durations, n=20)[-1] * 1e3:7.2f} ms"
+                f"  {rate:7.1f} searches/s with {args.concurrency} threads"
+            )
+        overhead = statistics.median(latencies["new connection"])
+        print(f"per-search speedup: {overhead / statistics.median(latencies['pooled session']):.1f}x")
+        print(f"pool: {pool.stats()}")
+    finally:
+        pool.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
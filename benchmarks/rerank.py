@@ -0,0 +1,121 @@
+"""Measure the cost of reranking search candidates locally, per search.
+
+Run with `PYTHONPATH=src python benchmarks/rerank.py`. Synthetic hits shaped like the
+content indices (title, body, update date) are reranked for a set of questions at several
+candidate counts; each search plants one relevant hit at a random position among
+distractors that share some of its words, and the share of searches returning it in the
+top `--size` is reported next to the time spent. Everything runs on CPU without any model.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from elastic.mcp.fastmcp.search import Reranker
+
+QUESTIONS = (
+    "vpn setup guide for remote access",
+    "travel expense policy for contractors",
+    "database migration status",
+    "who owns the payment service",
+    "onboarding checklist for new hires",
+)
+
+FILLER = [
+    "team",
+    "sprint",
+    "review",
+    "notes",
+    "meeting",
+    "service",
+    "release",
+    "process",
+    "update",
+    "document",
+    "project",
+    "ticket",
+    "owner",
+    "status",
+    "policy",
+    "access",
+    "request",
+    "approval",
+    "incident",
+    "report",
+    "deployment",
+]
+
+INDICES = ("content-confluence", "content-jira", "content-sharepoint")
+
+
+def _text(rng: random.Random, words: int, terms: list[str] = ()) -> str:
+    tokens = [rng.choice(FILLER) for _ in range(words)]
+    for term in terms:
+        tokens[rng.randrange(words)] = term
+    return " ".join(tokens)
+
+
+def candidates(question: str, count: int, rng: random.Random) -> tuple[list[dict], int]:
+    """``count`` hits for ``question`` and the position of the relevant one."""
+    terms = [word for word in question.split() if len(word) > 3]  # noqa: PLR2004
+    now = datetime.now(timezone.utc)
+    hits = []
+    for i in range(count):
+        # Distractors mention a couple of the question's words far apart
+        body = _text(rng, rng.randint(80, 400), rng.sample(terms, min(2, len(terms))))
+        updated = now - timedelta(days=rng.randint(0, 1500))
+        hits.append(
+            {
+                "_index": rng.choice(INDICES),
+                "_id": f"doc-{i}",
+                "_score": 10.0 - i * 0.05,
+                "_source": {"title": _text(rng, 6), "body": body, "updated": updated.isoformat()},
+            }
+        )
+    answer = rng.randrange(count)
+    hits[answer]["_source"]["title"] = question.title()
+    hits[answer]["_source"]["body"] = f"{_text(rng, 40)} {question} {_text(rng, 120)}"
+    hits[answer]["_id"] = "answer"
+    return hits, answer
+
+
+def benchmark(counts: list[int], searches: int, size: int, seed: int) -> None:
+    """Print rerank time and top-``size`` recall per candidate count."""
+    reranker = Reranker()
+    rng = random.Random(seed)  # noqa: S311
+    print(
+        f"{'candidates':>10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(size):>10}"
+    )
+    for count in counts:
+        timings, found, baseline = [], 0, 0
+        for i in range(searches):
+            hits, answer = candidates(QUESTIONS[i % len(QUESTIONS)], count, rng)
+            started = time.perf_counter()
+            best = reranker.rerank(QUESTIONS[i % len(QUESTIONS)], hits, size)
+            timings.append((time.perf_counter() - started) * 1000)
+            found += any(hit["_id"] == "answer" for hit in best)
+            baseline += answer < size
+        timings.sort()
+        print(
+            f"{count:>10} {statistics.mean(timings):>8.2f} {timings[len(timings) // 2]:>8.2f} "
+            f"{timings[int(0.95 * (len(timings) - 1))]:>8.2f} {found / searches:>10.0%}"
+        )
+    print(f"Without reranking, the relevant hit is in the top {size} of {baseline / searches:.0%}")
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", default="25,50,100,200", help="Candidate counts")
+    parser.add_argument("--searches", type=int, default=200, help="Searches per count")
+    parser.add_argument("--size", type=int, default=10, help="Hits kept per search")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic hits")
+    args = parser.parse_args()
+    counts = [int(count) for count in args.candidates.split(",")]
+    benchmark(counts, args.searches, args.size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
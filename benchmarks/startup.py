@@ -0,0 +1,100 @@
+"""Compare MCP server startup from the OpenAPI spec against a registry snapshot.
+
+Run with `PYTHONPATH=src python benchmarks/startup.py`. The spec is read through the
+on-disk spec cache, so the first run downloads it; use `--synthetic N` to benchmark a
+generated spec with N paths when elastic.co cannot be reached.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastmcp.server.openapi import RouteMap, RouteType
+
+from elastic.mcp.fastmcp import ESFastMCPOpenAPI
+from elastic.mcp.fastmcp.spec_cache import OpenAPISpecCache
+
+ROUTE_MAPS = [RouteMap(methods=["GET"], pattern=r".*", route_type=RouteType.TOOL)]
+
+
+def synthetic_spec(paths: int) -> dict:
+    """Generate an OpenAPI spec with ``paths`` search-like endpoints."""
+    schema = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "object", "description": "Query DSL"},
+            "size": {"type": "integer", "description": "Number of hits"},
+        },
+    }
+    spec_paths = {}
+    for i in range(paths):
+        params = [
+            {"in": "path", "name": "index", "required": True, "schema": {"type": "string"}},
+            {"in": "query", "name": "q", "schema": {"type": "string"}},
+        ]
+        body = {"content": {"application/json": {"schema": schema}}}
+        responses = {
+            "200": {"description": "OK", "content": {"application/json": {"schema": schema}}}
+        }
+        spec_paths[f"/{{index}}/_endpoint{i}"] = {
+            "get": {"operationId": f"get-{i}", "parameters": params, "responses": responses},
+            "post": {
+                "operationId": f"post-{i}",
+                "parameters": params,
+                "requestBody": body,
+                "responses": responses,
+            },
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic", "version": "1.0.0"},
+        "paths": spec_paths,
+    }
+
+
+def timed(repeat: int, **kwargs) -> list[float]:
+    """Time ``repeat`` server constructions with the given arguments."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ESFastMCPOpenAPI(route_maps=ROUTE_MAPS, **kwargs)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main() -> None:
+    """Run the startup benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spec", help="OpenAPI spec URL or path (default: Elasticsearch)")
+    parser.add_argument("--synthetic", type=int, help="Use a generated spec with N paths")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ELASTICSEARCH_URL", "http://localhost:9200")
+    spec = synthetic_spec(args.synthetic) if args.synthetic else args.spec
+    spec_cache = OpenAPISpecCache(revalidate=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "registry.json"
+        server = ESFastMCPOpenAPI(openapi_spec=spec, route_maps=ROUTE_MAPS, spec_cache=spec_cache)
+        counts = server.save_registry_snapshot(snapshot)
+
+        cold = timed(args.repeat, openapi_spec=spec, spec_cache=spec_cache)
+        warm = timed(
+            args.repeat, openapi_spec=spec, spec_cache=spec_cache, registry_snapshot=snapshot
+        )
+
+        print(f"registry: {counts} ({snapshot.stat().st_size / 1e6:.1f} MB snapshot)")
+        for label, durations in (("spec parse", cold), ("snapshot load", warm)):
+            print(
+                f"{label:>14}: median {statistics.median(durations) * 1e3:8.1f} ms"
+                f"  min {min(durations) * 1e3:8.1f} ms"
+            )
+        print(f"speedup: {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Pick the final-answer tokens out of the LLM token stream.
+
+The ReAct agent answers with a JSON blob, `{"action": "Final Answer", "action_input": "..."}`,
+so only the characters of the `action_input` string belong to the answer, unescaped as
+they arrive. Intermediate steps name another action and yield no answer text at all. The
+tool-calling agent answers in plain text, so every content token is part of the answer.
+"""
+
+import json
+import re
+
+# Start of the `action_input` string of a final answer
+FINAL_ANSWER = re.compile(
+    r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"', re.IGNORECASE
+)
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+UNICODE_ESCAPE_LENGTH = 6
+
+HIGH_SURROGATES = range(0xD800, 0xDC00)
+
+
+class FinalAnswerExtractor:
+    """Split the tokens of one LLM output into thought tokens and answer text.
+
+    Args:
+        json_action: Whether the answer is wrapped in a ReAct JSON action blob; when
+            False every token is answer text.
+    """
+
+    def __init__(self, json_action=True):
+        self.json_action = json_action
+        self.buffer = ""
+        self.answer_started = not json_action
+        self.done = False
+        self._position = 0
+        self._pending = ""
+
+    def feed(self, token):
+        """Consume `token` and return the answer text it completes, possibly empty."""
+        if self.done:
+            return ""
+        if not self.json_action:
+            return token
+        self.buffer += token
+        if not self.answer_started:
+            match = FINAL_ANSWER.search(self.buffer)
+            if match is None:
+                return ""
+            self.answer_started = True
+            self._position = match.end()
+        return self._decode()
+
+    def _decode(self):
+        # Unescape the JSON string from the last position, keeping incomplete escapes
+        text = self._pending + self.buffer[self._position :]
+        self._position = len(self.buffer)
+        out = []
+        i = 0
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break
+            if text[i + 1] == "u":
+                # A high surrogate (emoji and the like) needs its low surrogate escape too
+                length = UNICODE_ESCAPE_LENGTH
+                if i + length > len(text):
+                    break
+                if HIGH_SURROGATES.start <= int(text[i + 2 : i + length], 16) < HIGH_SURROGATES.stop:
+                    length *= 2
+                    if i + length > len(text):
+                        break
+                out.append(json.loads(f'"{text[i : i + length]}"'))
+                i += length
+                continue
+            out.append(ESCAPES.get(text[i + 1], text[i + 1]))
+            i += 2
+        self._pending = "" if self.done else text[i:]
+        return "".join(out)
@@ -1,26 +1,131 @@
-import re
+import asyncio
+import time
 from typing import Any
 
 import chainlit as cl
+from answer_stream import FinalAnswerExtractor
 from dotenv import load_dotenv
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain_agent import agent, clear_memory, get_memory_stats
+from fast_path import FAST_PATH_TAG
+from history_store import HistoryStore
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain_agent import (
+    AGENT_MODE,
+    arun_question,
+    asearch_3_tool,
+    clear_memory,
+    end_session,
+    get_llm_cache_stats,
+    get_memory_stats,
+    get_packer_stats,
+    get_path_stats,
+    get_router_stats,
+    tracer,
+)
+from scheduler import AgentScheduler, Overloaded
+from step_emitter import (
+    REASONING_HEADER,
+    UI_MODE,
+    ReasoningExtractor,
+    StepEmitter,
+    TokenBuffer,
+    UIStats,
+    UITotals,
+)
 
 load_dotenv()
 
+# Concurrent agent runs are capped, the excess waits in a bounded, per-user fair queue
+scheduler = AgentScheduler.from_env()
+
+# Questions and answers of every session, in SQLite (chat_history.json is imported once)
+history = HistoryStore.from_env()
+
+# Messages and bytes sent to the browser per answered question
+ui_totals = UITotals()
+
+ANSWER_HEADER = "**Answer:**\n"
+
+
+class AnswerStream:
+    """The answer message, created up front and streamed in coalesced updates."""
+
+    def __init__(self, message: cl.Message, stats: UIStats = None):
+        self.message = message
+        self.message.content = ANSWER_HEADER
+        self.stats = stats or UIStats()
+        self.buffer = TokenBuffer(self._send)
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.streamed = False
+
+    async def _send(self, text: str):
+        await self.message.stream_token(text)
+        self.stats.record(text)
+
+    async def write(self, text: str):
+        """Append answer text to the message."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.streamed = True
+        await self.buffer.write(text)
+
+    async def reset(self):
+        """Drop the streamed text, when the agent calls the LLM again after an answer."""
+        await self.buffer.discard()
+        if self.streamed:
+            self.streamed = False
+            self.message.content = ANSWER_HEADER
+            await self.message.update()
+            self.stats.record(ANSWER_HEADER)
+
+    async def finish(self, result: str, wait_seconds: float = 0.0):
+        """Replace the streamed text with the final result and show the timings.
+
+        The time spent waiting for a scheduler slot is shown apart from the run time.
+        """
+        await self.buffer.discard()
+        now = time.perf_counter()
+        # Without streaming, the first token shows up with the whole answer
+        ttft = (self.first_token_at or now) - self.started
+        self.message.content = (
+            f"{ANSWER_HEADER}{result}\n\n"
+            f"_⏱️ Queued {wait_seconds:.2f} s, first token after {ttft:.2f} s, "
+            f"complete after {now - self.started:.2f} s_"
+        )
+        await self.message.send()
+        self.stats.record(self.message.content)
+
+
+class EnhancedChainlitCallbackHandler(AsyncCallbackHandler):
+    """Enhanced callback handler with selective step display
 
-class EnhancedChainlitCallbackHandler(BaseCallbackHandler):
-    """Enhanced callback handler with selective step display"""
+    Being an async handler, its callbacks are awaited on Chainlit's event loop by `agent.arun`.
+    Steps are written through `StepEmitter`s, which merge the updates of a flush interval.
+    """
 
-    def __init__(self):
+    def __init__(self, ui_stats: UIStats = None):
         self.steps = []
         self.current_step = None
         self.step_count = 0
         self.reasoning_steps = []
         self.search_results = []
+        # Search steps by tool input, then by tool run, as searches may run concurrently
+        self.pending_searches = {}
+        self.search_steps = {}
         self.show_thinking = True
         self.show_search = True
         self.show_final_reasoning = True
+        # Final-answer tokens go to the answer message, the others to the reasoning step
+        self.answer_stream = None
+        self.extractors = {}
+        # Reasoning shown in the step, extracted from the streamed thought tokens
+        self.reasoning = {}
+        self.reasoning_shown = False
+        self.ui_stats = ui_stats or UIStats()
+
+    def open_step(self, name: str) -> StepEmitter:
+        """A step sent once it has content, then updated once per flush interval."""
+        return StepEmitter(cl.Step(name=name), self.ui_stats)
 
     def should_show_step(self, step_type: str) -> bool:
         """Determine if a step should be displayed"""
@@ -34,55 +139,58 @@ class EnhancedChainlitCallbackHandler(BaseCallbackHandler):
 
     async def on_llm_start(self, serialized: dict[str, Any], prompts: list[str], **kwargs):
         """Called when LLM starts - only show if relevant"""
-        if not self.should_show_step("thinking"):
+        # The fast path answers in plain text, with nothing to reason about in a step
+        fast_path = FAST_PATH_TAG in (kwargs.get("tags") or [])
+        self.extractors[kwargs.get("run_id")] = FinalAnswerExtractor(
+            json_action=AGENT_MODE == "react" and not fast_path
+        )
+        if self.answer_stream is not None:
+            await self.answer_stream.reset()
+        if fast_path or not self.should_show_step("thinking"):
             return
 
         self.step_count += 1
         step_name = f"🧠 Agent Reasoning (Step {self.step_count})"
 
-        self.current_step = cl.Step(name=step_name)
-        await self.current_step.__aenter__()
-        await self.current_step.stream_token("💭 Analyzing your question...\n")
+        self.reasoning[kwargs.get("run_id")] = ReasoningExtractor()
+        self.reasoning_shown = False
+        self.current_step = self.open_step(step_name)
+        await self.current_step.write("💭 Analyzing your question...\n")
+
+    async def _write_reasoning(self, text: str):
+        if text and self.current_step:
+            if not self.reasoning_shown:
+                self.reasoning_shown = True
+                text = REASONING_HEADER + text
+            await self.current_step.write(text)
+
+    async def on_llm_new_token(self, token: str, **kwargs):
+        """Called for each streamed token - answer tokens to the message, thoughts to the step"""
+        extractor = self.extractors.setdefault(
+            kwargs.get("run_id"), FinalAnswerExtractor(json_action=AGENT_MODE == "react")
+        )
+        answer = extractor.feed(token)
+        if answer and self.answer_stream is not None:
+            await self.answer_stream.write(answer)
+        elif not extractor.answer_started and token:
+            reasoning = self.reasoning.get(kwargs.get("run_id"))
+            if reasoning is not None:
+                await self._write_reasoning(reasoning.feed(token))
 
     async def on_llm_end(self, response, **kwargs):
         """Called when LLM ends"""
-        if self.current_step and self.should_show_step("thinking"):
-            if hasattr(response, "generations") and response.generations:
+        self.extractors.pop(kwargs.get("run_id"), None)
+        reasoning = self.reasoning.pop(kwargs.get("run_id"), None)
+        if self.current_step and reasoning is not None:
+            # Without streaming, the whole output is extracted at once
+            if not reasoning.fed and getattr(response, "generations", None):
                 text = response.generations[0][0].text if response.generations[0] else ""
+                await self._write_reasoning(reasoning.feed(text))
+            await self._write_reasoning(reasoning.finish())
 
-                # Extract meaningful reasoning parts
-                reasoning = self._extract_reasoning(text)
-                if reasoning:
-                    await self.current_step.stream_token(f"🤔 **Thought Process**:\n{reasoning}\n")
-
-            await self.current_step.__aexit__(None, None, None)
+            await self.current_step.close()
             self.current_step = None
 
-    def _extract_reasoning(self, text: str) -> str:
-        """Extract meaningful reasoning from LLM output"""
-        # Look for "Thought:" patterns
-        thought_pattern = r"Thought:\s*(.*?)(?=Action:|Final Answer:|$)"
-        thoughts = re.findall(thought_pattern, text, re.DOTALL | re.IGNORECASE)
-
-        if thoughts:
-            # Clean up and format thoughts
-            clean_thoughts = []
-            for thought in thoughts:
-                cleaned = thought.strip().replace("\n", " ")
-                if len(cleaned) > 10:  # Only include substantial thoughts
-                    clean_thoughts.append(f"• {cleaned}")
-
-            if clean_thoughts:
-                return "\n".join(clean_thoughts)
-
-        # Fallback to first meaningful sentence
-        sentences = text.split(".")
-        for sentence in sentences:
-            if len(sentence.strip()) > 20 and not sentence.strip().startswith("Action"):
-                return sentence.strip()
-
-        return "Processing your request..."
-
     async def on_agent_action(self, action, **kwargs):
         """Called when agent takes an action - only show search actions"""
         tool_name = getattr(action, "tool", "Unknown Tool")
@@ -99,55 +207,34 @@ class EnhancedChainlitCallbackHandler(BaseCallbackHandler):
         if not self.should_show_step("search"):
             return
 
+        if isinstance(tool_input, dict) and "query" in tool_input:
+            query = tool_input["query"]
+        else:
+            query = tool_input
+
         # Create search step
-        self.current_step = cl.Step(name=f"🔍 Search: {tool_input}")
-        await self.current_step.__aenter__()
-        await self.current_step.stream_token(f"**Query**: `{tool_input}`\n")
-        await self.current_step.stream_token("⏳ Searching content indices...\n")
+        step = self.open_step(f"🔍 Search: {query}")
+        await step.write(f"**Query**: `{query}`\n⏳ Searching content indices...\n")
+        self.pending_searches.setdefault(str(tool_input), []).append(step)
 
     async def on_tool_start(self, serialized: dict[str, Any], input_str: str, **kwargs):
         """Called when a tool starts"""
-        if self.current_step:
-            await self.current_step.stream_token("🔄 Executing search...\n")
-
-    # async def on_tool_end(self, output: str, **kwargs):
-    #     """Called when a tool ends"""
-    #     if not self.current_step or not self.should_show_step("search"):
-    #         return
-
-    #     # Process and display search results
-    #     if "FINAL_ANSWER:" in output:
-    #         result = output.replace("FINAL_ANSWER:", "").strip()
-    #     else:
-    #         result = output
-
-    #     # Format results nicely
-    #     if "No relevant information" in result:
-    #         await self.current_step.stream_token("❌ **No results found**\n")
-    #     else:
-    #         # Show condensed results
-    #         preview = self._format_search_results(result)
-    #         await self.current_step.stream_token(f"✅ **Found relevant content**:\n{preview}\n")
-
-    #     await self.current_step.__aexit__(None, None, None)
-    #     self.current_step = None
-
-    # def _format_search_results(self, results: str) -> str:
-    #     """Format search results for display"""
-    #     # Limit length for dropdown display
-    #     if len(results) > 400:
-    #         preview = results[:400] + "..."
-    #     else:
-    #         preview = results
-
-    #     # Add some basic formatting
-    #     lines = preview.split('\n')
-    #     formatted_lines = []
-    #     for line in lines[:5]:  # Show max 5 lines
-    #         if line.strip():
-    #             formatted_lines.append(f"• {line.strip()}")
-
-    #     return "\n".join(formatted_lines) if formatted_lines else preview
+        pending = self.pending_searches.get(input_str)
+        if pending:
+            step = pending.pop(0)
+            self.search_steps[kwargs.get("run_id")] = step
+            await step.write("🔄 Executing search...\n")
+        elif FAST_PATH_TAG in (kwargs.get("tags") or []) and self.should_show_step("search"):
+            # The fast path searches without an agent action announcing it
+            step = self.open_step(f"🔍 Search: {input_str}")
+            self.search_steps[kwargs.get("run_id")] = step
+            await step.write(f"**Query**: `{input_str}`\n⚡ Direct lookup, searching once...\n")
+
+    async def on_tool_end(self, output: str, **kwargs):
+        """Called when a tool ends - close its search step"""
+        step = self.search_steps.pop(kwargs.get("run_id"), None)
+        if step is not None:
+            await step.close()
 
     async def on_agent_finish(self, finish, **kwargs):
         """Called when agent finishes - show final reasoning if enabled"""
@@ -155,18 +242,17 @@ class EnhancedChainlitCallbackHandler(BaseCallbackHandler):
             return
 
         # Create a final reasoning step
-        final_step = cl.Step(name="✅ Final Analysis")
-        await final_step.__aenter__()
+        final_step = self.open_step("✅ Final Analysis")
 
         # Extract final answer reasoning
         output = getattr(finish, "return_values", {}).get("output", "")
         if output:
             reasoning = self._extract_final_reasoning(output)
             if reasoning:
-                await final_step.stream_token(f"🎯 **Conclusion**: {reasoning}\n")
+                await final_step.write(f"🎯 **Conclusion**: {reasoning}\n")
 
-        await final_step.stream_token("✅ Response ready!\n")
-        await final_step.__aexit__(None, None, None)
+        await final_step.write("✅ Response ready!\n")
+        await final_step.close()
 
     def _extract_final_reasoning(self, output: str) -> str:
         """Extract final reasoning from agent output"""
@@ -184,25 +270,34 @@ class EnhancedChainlitCallbackHandler(BaseCallbackHandler):
     async def on_chain_error(self, error, **kwargs):
         """Called when there's an error"""
         if self.current_step:
-            await self.current_step.stream_token(f"❌ **Error**: {error!s}\n")
-            await self.current_step.__aexit__(None, None, None)
+            await self.current_step.write(f"❌ **Error**: {error!s}\n")
+            await self.current_step.close()
             self.current_step = None
 
 
 async def run_agent_with_selective_steps(
-    query: str, show_thinking=True, show_search=True, show_final=True
+    query: str,
+    show_thinking=True,
+    show_search=True,
+    show_final=True,
+    answer_stream=None,
+    ui_stats=None,
 ):
-    """Run agent with selective step display"""
+    """Run agent with selective step display, streaming the answer into `answer_stream`"""
 
     # Create callback handler with display preferences
-    callback_handler = EnhancedChainlitCallbackHandler()
+    callback_handler = EnhancedChainlitCallbackHandler(ui_stats)
     callback_handler.show_thinking = show_thinking
     callback_handler.show_search = show_search
     callback_handler.show_final_reasoning = show_final
+    callback_handler.answer_stream = answer_stream
 
     try:
-        # Run the agent with our enhanced callback
-        result = await cl.make_async(lambda: agent.run(query, callbacks=[callback_handler]))()
+        # Run natively on Chainlit's event loop, searches included: simple lookups take the
+        # fast path, one search and one answer call, everything else the agent
+        result = await arun_question(
+            query, callbacks=[callback_handler], session_id=cl.user_session.get("id")
+        )
 
         return result
 
@@ -213,9 +308,7 @@ async def run_agent_with_selective_steps(
             await error_step.stream_token("🔄 Trying direct search...\n")
 
             try:
-                from langchain_agent import search_3_tool
-
-                result = await cl.make_async(search_3_tool)(query)
+                result = await asearch_3_tool(query)
                 await error_step.stream_token("✅ Direct search completed\n")
                 return result
             except Exception as e2:
@@ -240,10 +333,11 @@ async def on_chat_start():
     await cl.ElementSidebar.set_elements(elements)
     await cl.ElementSidebar.set_title("Example Questions")
 
-    # Store user preferences in session
-    cl.user_session.set("show_thinking", True)
-    cl.user_session.set("show_search", True)
-    cl.user_session.set("show_final", True)
+    # Store user preferences in session; the minimal UI renders no steps at all
+    show_steps = UI_MODE != "minimal"
+    cl.user_session.set("show_thinking", show_steps)
+    cl.user_session.set("show_search", show_steps)
+    cl.user_session.set("show_final", show_steps)
 
     await cl.Message(
         content=(
@@ -260,28 +354,31 @@ async def on_chat_start():
         author="assistant",
     ).send()
 
+    step_toggles = [
+        cl.Action(
+            name="toggle_thinking",
+            label="🧠 Toggle Thinking Steps",
+            description="Show/hide reasoning steps",
+            payload={"action": "toggle_thinking"},
+        ),
+        cl.Action(
+            name="toggle_search",
+            label="🔍 Toggle Search Steps",
+            description="Show/hide search details",
+            payload={"action": "toggle_search"},
+        ),
+        cl.Action(
+            name="toggle_final",
+            label="✅ Toggle Final Analysis",
+            description="Show/hide final reasoning",
+            payload={"action": "toggle_final"},
+        ),
+    ]
     await cl.Message(
         content="**Controls:**",
         author="assistant",
         actions=[
-            cl.Action(
-                name="toggle_thinking",
-                label="🧠 Toggle Thinking Steps",
-                description="Show/hide reasoning steps",
-                payload={"action": "toggle_thinking"},
-            ),
-            cl.Action(
-                name="toggle_search",
-                label="🔍 Toggle Search Steps",
-                description="Show/hide search details",
-                payload={"action": "toggle_search"},
-            ),
-            cl.Action(
-                name="toggle_final",
-                label="✅ Toggle Final Analysis",
-                description="Show/hide final reasoning",
-                payload={"action": "toggle_final"},
-            ),
+            *(step_toggles if show_steps else []),
             cl.Action(
                 name="clear_memory",
                 label="🧹 Clear Memory",
@@ -302,21 +399,69 @@ async def on_chat_start():
 async def on_message(message: cl.Message):
     try:
         # Get user preferences
-        show_thinking = cl.user_session.get("show_thinking", True)
-        show_search = cl.user_session.get("show_search", True)
-        show_final = cl.user_session.get("show_final", True)
-
-        # Run agent with selective steps
-        result = await run_agent_with_selective_steps(
-            message.content,
-            show_thinking=show_thinking,
-            show_search=show_search,
-            show_final=show_final,
-        )
-
-        # Send final answer
-        await cl.Message(content=f"**Answer:**\n{result}", author="assistant").send()
-
+        show_steps = UI_MODE != "minimal"
+        show_thinking = cl.user_session.get("show_thinking", show_steps)
+        show_search = cl.user_session.get("show_search", show_steps)
+        show_final = cl.user_session.get("show_final", show_steps)
+
+        # Wait for a free slot, showing the queue position meanwhile
+        status = None
+
+        async def show_position(position):
+            nonlocal status
+            content = f"⏳ Many questions are running, yours is queued at position {position}"
+            if status is None:
+                status = cl.Message(content=content, author="assistant")
+                await status.send()
+            else:
+                status.content = content
+                await status.update()
+
+        user = cl.user_session.get("user")
+        user_id = getattr(user, "identifier", None) or cl.user_session.get("id")
+        # One trace per question: the LLM, tool, MCP and Elasticsearch spans nest under it
+        with tracer.span(
+            "chat message",
+            kind="server",
+            attributes={"chat.session_id": cl.user_session.get("id"), "chat.user": user_id},
+        ) as span:
+            async with scheduler.slot(user_id, on_queued=show_position) as ticket:
+                span.set_attribute("scheduler.wait_ms", ticket.wait_seconds * 1000)
+                if status is not None:
+                    await status.remove()
+
+                # Run agent with selective steps, streaming the final answer as it is generated
+                ui_stats = UIStats()
+                answer_stream = AnswerStream(cl.Message(content="", author="assistant"), ui_stats)
+                result = await run_agent_with_selective_steps(
+                    message.content,
+                    show_thinking=show_thinking,
+                    show_search=show_search,
+                    show_final=show_final,
+                    answer_stream=answer_stream,
+                    ui_stats=ui_stats,
+                )
+
+                # Send final answer
+                await answer_stream.finish(result, wait_seconds=ticket.wait_seconds)
+                if answer_stream.first_token_at is not None:
+                    span.set_attribute(
+                        "answer.first_token_ms",
+                        (answer_stream.first_token_at - answer_stream.started) * 1000,
+                    )
+                ui_totals.add(ui_stats)
+                span.set_attribute("ui.messages", ui_stats.messages)
+                span.set_attribute("ui.bytes", ui_stats.bytes)
+            # SQLite commits block, keep them off the event loop
+            await asyncio.to_thread(
+                history.append, cl.user_session.get("id"), message.content, result
+            )
+
+    except Overloaded:
+        await cl.Message(
+            content="🚦 Too many questions are waiting right now, please try again in a moment.",
+            author="assistant",
+        ).send()
     except Exception as e:
         await cl.Message(content=f"Sorry, I encountered an error: {e!s}", author="assistant").send()
 
@@ -351,38 +496,93 @@ async def toggle_final(action):
 
 @cl.action_callback("clear_memory")
 async def handle_clear_memory(action):
-    await cl.make_async(clear_memory)()
+    clear_memory(cl.user_session.get("id"))
     await cl.Message(content="🧹 Memory cleared!", author="assistant").send()
     await action.remove()
 
 
 @cl.action_callback("memory_stats")
 async def handle_memory_stats(action):
-    stats = await cl.make_async(get_memory_stats)()
+    stats = get_memory_stats(cl.user_session.get("id"))
+    sessions = stats["sessions"]
 
     # Get current display settings
-    show_thinking = cl.user_session.get("show_thinking", True)
-    show_search = cl.user_session.get("show_search", True)
-    show_final = cl.user_session.get("show_final", True)
+    show_steps = UI_MODE != "minimal"
+    show_thinking = cl.user_session.get("show_thinking", show_steps)
+    show_search = cl.user_session.get("show_search", show_steps)
+    show_final = cl.user_session.get("show_final", show_steps)
 
     msg = (
         f"📊 **System Status:**\n\n"
         f"**Memory:**\n"
         f"- Type: {stats['memory_type']}\n"
         f"- Messages: {stats['chat_memory_length']}\n"
-        f"- Window Size: {stats['k']}\n\n"
+        f"- Window Size: {stats['k']}\n"
+        f"- Active Sessions: {sessions['sessions']} of {sessions['max_sessions']} "
+        f"({sessions['messages']} messages, {sessions['chars']} chars)\n\n"
         f"**Display Settings:**\n"
         f"- Thinking Steps: {'✅' if show_thinking else '❌'}\n"
         f"- Search Steps: {'✅' if show_search else '❌'}\n"
         f"- Final Analysis: {'✅' if show_final else '❌'}"
     )
+    router_stats = get_router_stats()
+    if router_stats:
+        msg += "\n\n**Index Routing:**\n" + "\n".join(
+            f"- {target}: {stats['searches']} searches, "
+            f"{stats['mean_shards']:.1f} shards, {stats['mean_ms']:.0f} ms avg"
+            for target, stats in router_stats.items()
+        )
+    scheduler_stats = scheduler.stats()
+    msg += (
+        "\n\n**Scheduler:**\n"
+        f"- Running: {scheduler_stats['running']} of {scheduler_stats['max_concurrent']}, "
+        f"waiting: {scheduler_stats['waiting']}, rejected: {scheduler_stats['rejected']}\n"
+        f"- Queue wait: {scheduler_stats['mean_wait_seconds']:.2f} s avg, "
+        f"{scheduler_stats['p95_wait_seconds']:.2f} s p95\n"
+        f"- Run time: {scheduler_stats['mean_run_seconds']:.2f} s avg, "
+        f"{scheduler_stats['p95_run_seconds']:.2f} s p95"
+    )
+    path_stats = get_path_stats()
+    if path_stats:
+        msg += "\n\n**Answer Paths:**\n" + "\n".join(
+            f"- {path}: {stats['questions']} questions, "
+            f"{stats['mean_llm_calls']:.1f} LLM calls, {stats['mean_ms']:.0f} ms avg, "
+            f"{stats['p95_ms']:.0f} ms p95"
+            for path, stats in path_stats.items()
+        )
+    cache_stats = get_llm_cache_stats()
+    if cache_stats:
+        msg += (
+            "\n\n**LLM Cache:**\n"
+            f"- Hits: {cache_stats['hits']} of {cache_stats['hits'] + cache_stats['misses']} "
+            f"({cache_stats['hit_ratio']:.0%})\n"
+            f"- Entries: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KiB)"
+        )
+    packer_stats = get_packer_stats()
+    if packer_stats.get("calls"):
+        msg += (
+            "\n\n**Context Packing:**\n"
+            f"- Searches packed: {packer_stats['calls']}\n"
+            f"- Hits kept: {packer_stats['hits_out']} of {packer_stats['hits_in']}\n"
+            f"- Tokens saved: {packer_stats['tokens_saved']} "
+            f"({packer_stats['saved_ratio']:.0%}, {packer_stats['mean_saved_per_call']:.0f} "
+            "per search)"
+        )
+    ui = ui_totals.stats()
+    if ui["questions"]:
+        msg += (
+            "\n\n**UI Traffic:**\n"
+            f"- Answers: {ui['questions']} ({UI_MODE} UI)\n"
+            f"- Per answer: {ui['messages_per_question']:.1f} messages, "
+            f"{ui['bytes_per_question'] / 1024:.1f} KiB"
+        )
     await cl.Message(content=msg, author="assistant").send()
     await action.remove()
 
 
 @cl.on_chat_end
 async def on_chat_end():
-    await cl.make_async(clear_memory)()
+    end_session(cl.user_session.get("id"))
     await cl.Message(
         content="👋 **Session ended.** Conversation memory cleared.", author="assistant"
     ).send()
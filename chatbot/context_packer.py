@@ -0,0 +1,228 @@
+"""Pack search results into a token budget before they reach the LLM.
+
+A raw Elasticsearch response carries every field of every hit's `_source`, often tens
+of thousands of tokens of which the agent needs a few paragraphs. The packer ranks the
+hits by score, drops fields that are useless to the model (embeddings, empty values),
+truncates long text around the query terms and stops adding hits at a token budget.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Fields shown first in each hit, when present
+PREFERRED_FIELDS = ("title", "name", "key", "summary", "status", "url", "path")
+
+# Lists of numbers at least this long are embeddings, not text
+VECTOR_MIN_LENGTH = 16
+
+ELLIPSIS = " … "
+
+WORD = re.compile(r"\w+")
+
+# Shorter query words ("is", "of") are not worth centering an excerpt on
+MIN_TERM_LENGTH = 3
+
+
+def load_encoding(name):
+    """Tiktoken encoding `name`, or None when it cannot be loaded (e.g. offline)."""
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("Tiktoken encoding %s unavailable, estimating tokens: %s", name, e)
+        return None
+
+
+class TokenCounter:
+    """Count and cut text in tokens of a tiktoken encoding.
+
+    Falls back to an estimate of four characters per token when the encoding is not
+    available locally and cannot be downloaded.
+    """
+
+    def __init__(self, encoding_name="cl100k_base"):
+        self.encoding = load_encoding(encoding_name)
+
+    def count(self, text):
+        """Number of tokens of `text`."""
+        if self.encoding is None:
+            return (len(text) + 3) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text, max_tokens):
+        """The longest prefix of `text` of at most `max_tokens` tokens."""
+        if self.encoding is None:
+            return text[: max_tokens * 4]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+def flatten(value, prefix=""):
+    """Flatten `_source` into (dotted field, text) pairs, dropping vectors and empty values."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        if len(value) >= VECTOR_MIN_LENGTH and all(isinstance(v, (int, float)) for v in value):
+            return
+        if all(not isinstance(v, (dict, list)) for v in value):
+            text = ", ".join(str(v) for v in value if v not in (None, ""))
+            if text:
+                yield prefix, text
+        else:
+            for item in value:
+                yield from flatten(item, prefix)
+    elif value not in (None, ""):
+        yield prefix, " ".join(str(value).split())
+
+
+def excerpt(text, terms, max_chars):
+    """Cut `text` to about `max_chars` characters around the first occurrence of a term."""
+    if len(text) <= max_chars:
+        return text
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms]
+    first = min((p for p in positions if p >= 0), default=0)
+    start = max(0, min(first - max_chars // 3, len(text) - max_chars))
+    prefix = "… " if start else ""
+    suffix = " …" if start + max_chars < len(text) else ""
+    return prefix + text[start : start + max_chars] + suffix
+
+
+@dataclass
+class PackStats:
+    """Token savings of the packer since startup."""
+
+    calls: int = 0
+    hits_in: int = 0
+    hits_out: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+
+class ContextPacker:
+    """Rank, trim and truncate search hits to fit a token budget.
+
+    Args:
+        token_budget: Maximum tokens of the packed tool output.
+        field_tokens: Maximum tokens of a single field value.
+        fields: Fields to keep, in this order; all fields when empty.
+        encoding: Tiktoken encoding used to count tokens.
+    """
+
+    def __init__(self, token_budget=3000, field_tokens=300, fields=(), encoding="cl100k_base"):
+        self.token_budget = token_budget
+        self.field_tokens = field_tokens
+        self.fields = tuple(fields)
+        self.counter = TokenCounter(encoding)
+        self._lock = threading.Lock()
+        self._stats = PackStats()
+
+    @classmethod
+    def from_env(cls):
+        """Build a packer from the CONTEXT_* environment variables."""
+        fields = os.getenv("CONTEXT_FIELDS", "")
+        return cls(
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000")),
+            field_tokens=int(os.getenv("CONTEXT_FIELD_TOKENS", "300")),
+            fields=[f.strip() for f in fields.split(",") if f.strip()],
+            encoding=os.getenv("CONTEXT_ENCODING", "cl100k_base"),
+        )
+
+    def pack(self, result_text, query):
+        """Pack the search response `result_text` for `query`.
+
+        Text that is not a search response is only cut to the token budget.
+        """
+        try:
+            response = json.loads(result_text)
+            hits = response["hits"]["hits"]
+        except (ValueError, KeyError, TypeError):
+            packed = self.counter.truncate(result_text, self.token_budget)
+            self._record(result_text, packed, 0, 0)
+            return packed
+
+        terms = [w for w in WORD.findall(query.lower()) if len(w) >= MIN_TERM_LENGTH]
+        ranked = sorted(hits, key=lambda h: h.get("_score") or 0.0, reverse=True)
+        total = response["hits"].get("total")
+        total = total.get("value") if isinstance(total, dict) else total
+
+        blocks = []
+        used = 0
+        for rank, hit in enumerate(ranked, 1):
+            block = self._format_hit(rank, hit, terms)
+            tokens = self.counter.count(block)
+            if used + tokens > self.token_budget:
+                # Cut the hit that does not fit, unless too little room is left for it
+                remaining = self.token_budget - used
+                if remaining >= self.field_tokens // 2 or not blocks:
+                    blocks.append(self.counter.truncate(block, remaining) + " …")
+                break
+            blocks.append(block)
+            used += tokens + 1
+
+        header = f"Showing {len(blocks)} of {total if total is not None else len(hits)} hits."
+        packed = "\n\n".join([header, *blocks])
+        self._record(result_text, packed, len(hits), len(blocks))
+        return packed
+
+    def _format_hit(self, rank, hit, terms):
+        source = {}
+        for field, text in flatten(hit.get("_source") or {}):
+            # Values of a field repeated across a list of objects are joined
+            source[field] = f"{source[field]} | {text}" if field in source else text
+        # Highlighted fragments are already centered on the matches
+        for field, fragments in (hit.get("highlight") or {}).items():
+            source[field] = ELLIPSIS.join(" ".join(f.split()) for f in fragments)
+
+        if self.fields:
+            names = [f for f in self.fields if f in source]
+        else:
+            names = [f for f in PREFERRED_FIELDS if f in source]
+            names += [f for f in source if f not in names]
+
+        score = hit.get("_score")
+        lines = [f"[{rank}] {hit.get('_index', '')}/{hit.get('_id', '')}"]
+        if score is not None:
+            lines[0] += f" (score {score:.2f})"
+        max_chars = self.field_tokens * 4
+        for name in names:
+            value = excerpt(source[name], terms, max_chars)
+            lines.append(f"{name}: {self.counter.truncate(value, self.field_tokens)}")
+        return "\n".join(lines)
+
+    def _record(self, original, packed, hits_in, hits_out):
+        tokens_in = self.counter.count(original)
+        tokens_out = self.counter.count(packed)
+        with self._lock:
+            self._stats.calls += 1
+            self._stats.hits_in += hits_in
+            self._stats.hits_out += hits_out
+            self._stats.tokens_in += tokens_in
+            self._stats.tokens_out += tokens_out
+        logger.debug(
+            "Packed %d tokens into %d (%d saved)", tokens_in, tokens_out, tokens_in - tokens_out
+        )
+
+    def stats(self):
+        """Calls, hits and tokens before and after packing, and the tokens saved."""
+        with self._lock:
+            s = self._stats
+            saved = s.tokens_in - s.tokens_out
+            return {
+                "calls": s.calls,
+                "hits_in": s.hits_in,
+                "hits_out": s.hits_out,
+                "tokens_in": s.tokens_in,
+                "tokens_out": s.tokens_out,
+                "tokens_saved": saved,
+                "mean_saved_per_call": saved / s.calls if s.calls else 0.0,
+                "saved_ratio": saved / s.tokens_in if s.tokens_in else 0.0,
+            }
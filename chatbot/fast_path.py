@@ -0,0 +1,223 @@
+"""Answer single-hop lookups with one search and one LLM call instead of the agent.
+
+A ReAct run costs at least two LLM calls around each search: one deciding to search,
+one answering. A question such as "what is the travel expense policy" needs a single
+search whatever the agent decides, so a local classifier picks those questions out and
+they are answered directly from one retrieval. Questions with several parts, comparisons,
+references to earlier messages or an unsure classification go to the agent.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from index_router import TICKET_KEY, NaiveBayesClassifier, tokenize
+from langchain.callbacks.base import AsyncCallbackHandler
+
+LOOKUP = "lookup"
+COMPLEX = "complex"
+
+# Tag of the runs of the fast path, so callbacks can tell its plain-text answer apart
+FAST_PATH_TAG = "fast_path"
+
+# Comparisons, aggregations and explanations that take more than one search
+MULTI_HOP = re.compile(
+    r"\b(compare|comparison|versus|vs|difference|differences|between|both|relationship|"
+    r"impact|affect|affects|why|timeline|trend|trends|summarize|summarise|summary|across|"
+    r"each|every|all)\b",
+    re.IGNORECASE,
+)
+
+# A second question chained onto the first
+SECOND_QUESTION = re.compile(
+    r"\b(and|then|also)\s+(what|who|which|when|where|how|why|is|are|does|do|list)\b",
+    re.IGNORECASE,
+)
+
+# Words pointing back at earlier messages, which only the agent's memory resolves
+FOLLOW_UP = frozenset(
+    [
+        *("it", "its", "that", "this", "they", "them", "their", "those", "these", "he", "she"),
+        *("above", "previous", "earlier", "same", "more", "else", "again"),
+    ]
+)
+
+# Question words left out of the fast path's search, which the agent rewrites away
+STOPWORDS = frozenset(
+    [
+        *("a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "what"),
+        *("who", "whom", "which", "when", "where", "how", "of", "for", "to", "in", "on", "at"),
+        *("by", "with", "about", "me", "my", "i", "we", "our", "can", "show", "find", "tell"),
+        *("give", "please", "there", "any"),
+    ]
+)
+
+# Words of the question, with hyphenated words such as OPS-1234 kept whole; everything
+# else, including the `?` and `*` wildcards of the query string syntax, is dropped
+QUERY_WORD = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+# Seed examples of the classifier, extended with FAST_PATH_TRAINING_FILE
+TRAINING_EXAMPLES = {
+    LOOKUP: (
+        "what is project alpha",
+        "what is the status of the database migration",
+        "who is assigned to the payment ticket",
+        "what is the travel expense policy",
+        "where is the architecture documentation for the search service",
+        "when is the next release",
+        "who owns the search service",
+        "what are the features of project alpha",
+        "find the contract template",
+        "show me the employee handbook",
+        "what are the benefits for new hires",
+        "explain the deployment runbook",
+    ),
+    COMPLEX: (
+        "compare project alpha and project beta",
+        "what changed between the q2 and q3 project plans",
+        "which tickets are blocking the release and who owns them",
+        "summarize all incidents this quarter and their root causes",
+        "why was the migration delayed and what is the new plan",
+        "how does the new policy affect the onboarding process",
+        "list every open bug and the teams responsible for each",
+        "what is the difference between the two deployment runbooks",
+        "how many tickets did each team close per sprint",
+        "what are the trends in incidents over the last releases",
+    ),
+}
+
+
+def search_terms(query):
+    """Keywords of `query` searched by the fast path, without stopwords or query syntax."""
+    return " ".join(w for w in QUERY_WORD.findall(query) if w.lower() not in STOPWORDS)
+
+
+@dataclass
+class Decision:
+    """Path chosen for a question and why."""
+
+    fast: bool
+    reason: str
+    confidence: float = 1.0
+
+    @property
+    def path(self):
+        """Name of the path, `fast` or `agent`."""
+        return "fast" if self.fast else "agent"
+
+
+class FastPathClassifier:
+    """Decide whether a question is a single-hop lookup.
+
+    Args:
+        threshold: Minimum classifier probability of a lookup for the fast path.
+        max_words: Longer questions always go to the agent.
+        training_examples: Labelled questions, defaults to the built-in seed examples.
+    """
+
+    def __init__(self, threshold=0.8, max_words=20, training_examples=None):
+        self.threshold = threshold
+        self.max_words = max_words
+        self.classifier = NaiveBayesClassifier().fit(training_examples or TRAINING_EXAMPLES)
+
+    @classmethod
+    def from_env(cls):
+        """Build a classifier from the FAST_PATH_* settings."""
+        examples = {label: list(texts) for label, texts in TRAINING_EXAMPLES.items()}
+        path = os.getenv("FAST_PATH_TRAINING_FILE")
+        if path:
+            # {"lookup": ["question", ...], "complex": [...]}
+            with open(path) as f:
+                for label, texts in json.load(f).items():
+                    examples.setdefault(label, []).extend(texts)
+        return cls(
+            threshold=float(os.getenv("FAST_PATH_THRESHOLD", "0.8")),
+            max_words=int(os.getenv("FAST_PATH_MAX_WORDS", "20")),
+            training_examples=examples,
+        )
+
+    def classify(self, query, has_history=False):  # noqa: PLR0911
+        """Choose the path of `query`; `has_history` when the session has earlier messages."""
+        words = tokenize(query)
+        if not words:
+            return Decision(False, "empty")
+        if len(words) > self.max_words:
+            return Decision(False, "long")
+        if query.count("?") > 1 or SECOND_QUESTION.search(query):
+            return Decision(False, "several questions")
+        if len(set(TICKET_KEY.findall(query))) > 1:
+            return Decision(False, "several tickets")
+        if MULTI_HOP.search(query):
+            return Decision(False, "multi-hop")
+        if has_history and FOLLOW_UP.intersection(words):
+            return Decision(False, "follow-up")
+        probability = self.classifier.predict_proba(query).get(LOOKUP, 0.0)
+        if probability < self.threshold:
+            return Decision(False, "uncertain", 1.0 - probability)
+        return Decision(True, "lookup", probability)
+
+
+class LLMCallCounter(AsyncCallbackHandler):
+    """Count the LLM calls of one question."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+
+    async def on_llm_start(self, serialized, prompts, **kwargs):
+        """Count a completion call."""
+        self.calls += 1
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        """Count a chat model call."""
+        self.calls += 1
+
+
+@dataclass
+class PathStats:
+    """Latency and LLM calls of the questions answered by one path."""
+
+    questions: int = 0
+    llm_calls: int = 0
+    seconds: float = 0.0
+    latencies: list = field(default_factory=list)
+
+
+class PathRecorder:
+    """Latency and LLM calls per path.
+
+    Paths are `fast`, `agent`, and `fallback` for the questions sent to the fast path
+    whose search found nothing, answered by the agent after all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats_by_path = defaultdict(PathStats)
+
+    def record(self, path, seconds, llm_calls):
+        """Record a question answered by `path`."""
+        with self._lock:
+            stats = self.stats_by_path[path]
+            stats.questions += 1
+            stats.llm_calls += llm_calls
+            stats.seconds += seconds
+            stats.latencies = [*stats.latencies[-999:], seconds]
+
+    def stats(self):
+        """Questions, mean LLM calls and latency per path."""
+        with self._lock:
+            report = {}
+            for path, stats in sorted(self.stats_by_path.items()):
+                latencies = sorted(stats.latencies)
+                report[path] = {
+                    "questions": stats.questions,
+                    "llm_calls": stats.llm_calls,
+                    "mean_llm_calls": stats.llm_calls / stats.questions,
+                    "mean_ms": stats.seconds / stats.questions * 1000,
+                    "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                }
+            return report
@@ -0,0 +1,245 @@
+"""Conversation history in SQLite, replacing the single `chat_history.json` document.
+
+Appending an exchange is one indexed insert plus one update of its conversation, so it
+costs the same however long the history grows, and SQLite serializes concurrent
+writers instead of losing their updates. Conversations are listed by `last_updated`
+and their messages loaded a page at a time.
+
+Run `python chatbot/history_store.py migrate` to import an existing `chat_history.json`;
+the import is recorded in the database, keyed by the file's hash, and the file is left as is.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).parent
+
+DEFAULT_DB = HERE / "chat_history.db"
+DEFAULT_JSON = HERE / "chat_history.json"
+
+# Characters of the first question used as the title of a new conversation
+TITLE_LENGTH = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_last_updated ON conversations (last_updated);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL,
+    user_message TEXT NOT NULL,
+    assistant_response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation_id, id);
+CREATE TABLE IF NOT EXISTS imports (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    conversations INTEGER NOT NULL
+);
+"""
+
+INSERT_MESSAGE = (
+    "INSERT INTO messages (conversation_id, timestamp, user_message, assistant_response) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+
+def now():
+    """Current local time in the ISO format of `chat_history.json`."""
+    return datetime.now().isoformat()
+
+
+class HistoryStore:
+    """Conversations and their exchanges in a SQLite database.
+
+    Messages have the shape of `chat_history.json`: `timestamp`, `user_message` and
+    `assistant_response`, plus the `id` used to page through them.
+
+    Args:
+        path: Database file, created if missing.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        # WAL lets readers run alongside the writer; NORMAL skips an fsync per commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """Open CHAT_HISTORY_DB, importing CHAT_HISTORY_JSON first if not imported yet."""
+        store = cls(os.getenv("CHAT_HISTORY_DB", str(DEFAULT_DB)))
+        json_path = Path(os.getenv("CHAT_HISTORY_JSON", str(DEFAULT_JSON)))
+        if json_path.exists():
+            store.migrate_json(json_path)
+        return store
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def create_conversation(self, title, conversation_id=None):
+        """Start a conversation and return its id."""
+        conversation_id = conversation_id or str(uuid.uuid4())
+        timestamp = now()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO conversations VALUES (?, ?, ?, ?)",
+                (conversation_id, title, timestamp, timestamp),
+            )
+        return conversation_id
+
+    def append(self, conversation_id, user_message, assistant_response, title=None):
+        """Append an exchange, creating the conversation if needed, and return its id.
+
+        A new conversation is titled `title`, or the start of `user_message`.
+        """
+        timestamp = now()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO conversations VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET last_updated = excluded.last_updated",
+                (
+                    conversation_id,
+                    title or user_message[:TITLE_LENGTH],
+                    timestamp,
+                    timestamp,
+                ),
+            )
+            cursor = self._db.execute(
+                INSERT_MESSAGE,
+                (conversation_id, timestamp, user_message, assistant_response),
+            )
+        return cursor.lastrowid
+
+    def get_conversation(self, conversation_id):
+        """Conversation metadata with its message count, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT c.*, (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = c.id) "
+                "AS message_count FROM conversations c WHERE c.id = ?",
+                (conversation_id,),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def load_messages(self, conversation_id, limit=50, before=None):
+        """A page of up to `limit` messages, oldest first, preceding message id `before`.
+
+        Without `before`, the page holds the latest messages; pass the `id` of the first
+        message of a page to load the one before it.
+        """
+        query = "SELECT * FROM messages WHERE conversation_id = ?"
+        params = [conversation_id]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def list_conversations(self, limit=20, before=None):
+        """Up to `limit` conversations, most recently updated first.
+
+        Pass the `last_updated` of the last conversation of a page to get the next one.
+        """
+        query = "SELECT * FROM conversations"
+        params = []
+        if before is not None:
+            query += " WHERE last_updated < ?"
+            params.append(before)
+        query += " ORDER BY last_updated DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_conversation(self, conversation_id):
+        """Delete a conversation and its messages."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    def migrate_json(self, path=DEFAULT_JSON):
+        """Import `chat_history.json` in one transaction, unless it was already imported.
+
+        The import is recorded with the hash of the file, which is left in place; an
+        edited file is imported again, skipping the conversations already in the
+        database. Returns the number of conversations imported.
+        """
+        content = Path(path).read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            done = self._db.execute("SELECT 1 FROM imports WHERE sha256 = ?", (sha256,))
+            if done.fetchone() is not None:
+                return 0
+        conversations = json.loads(content)
+        imported = 0
+        with self._lock, self._db:
+            for conversation_id, conversation in conversations.items():
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO conversations VALUES (?, ?, ?, ?)",
+                    (
+                        conversation.get("id", conversation_id),
+                        conversation.get("title", ""),
+                        conversation.get("created_at", now()),
+                        conversation.get("last_updated", conversation.get("created_at", now())),
+                    ),
+                )
+                if not cursor.rowcount:
+                    continue
+                imported += 1
+                self._db.executemany(
+                    INSERT_MESSAGE,
+                    [
+                        (
+                            conversation.get("id", conversation_id),
+                            message.get("timestamp", ""),
+                            message.get("user_message", ""),
+                            message.get("assistant_response", ""),
+                        )
+                        for message in conversation.get("messages", [])
+                    ],
+                )
+            self._db.execute(
+                "INSERT INTO imports VALUES (?, ?, ?, ?)", (sha256, str(path), now(), imported)
+            )
+        return imported
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Manage the chatbot conversation history.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="Import chat_history.json into SQLite.")
+    migrate.add_argument("--json", default=str(DEFAULT_JSON), help="JSON history to import.")
+    migrate.add_argument("--db", default=str(DEFAULT_DB), help="SQLite database.")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    imported = store.migrate_json(args.json)
+    store.close()
+    print(f"Imported {imported} conversations into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Pick the content indices a question needs instead of searching `content-*`.
+
+Searching the wildcard fans out to every shard of every content index, while most
+questions are about one source: ticket statuses live in Jira, documentation in
+Confluence, policies and shared files in SharePoint. The router combines keyword rules,
+a small multinomial Naive Bayes classifier trained on labelled example questions and
+ticket-key detection, and falls back to the wildcard whenever it is unsure. A ticket key
+only adds Jira to the indices searched: names such as ISO-27001, GPT-4 or Q3-2024 look
+just like OPS-1234.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+WILDCARD = "content-*"
+
+INDICES = ("content-jira", "content-confluence", "content-sharepoint")
+
+# Jira issue keys such as OPS-1234, but also ISO-27001 or COVID-19
+TICKET_KEY = re.compile(r"\b[A-Z][A-Z0-9]{1,9}-\d+\b")
+
+KEYWORDS = {
+    "content-jira": frozenset(
+        [
+            "ticket",
+            "tickets",
+            "issue",
+            "issues",
+            "bug",
+            "bugs",
+            "jira",
+            "sprint",
+            "epic",
+            "story",
+            "stories",
+            "assignee",
+            "assigned",
+            "backlog",
+            "resolved",
+            "unresolved",
+            "priority",
+            "blocker",
+            "status",
+            "incident",
+            "incidents",
+            "release",
+        ]
+    ),
+    "content-confluence": frozenset(
+        [
+            "confluence",
+            "wiki",
+            "page",
+            "pages",
+            "documentation",
+            "documented",
+            "docs",
+            "runbook",
+            "how-to",
+            "howto",
+            "guide",
+            "architecture",
+            "design",
+            "space",
+            "meeting",
+            "notes",
+            "plan",
+            "requirements",
+            "spec",
+        ]
+    ),
+    "content-sharepoint": frozenset(
+        [
+            "sharepoint",
+            "policy",
+            "policies",
+            "handbook",
+            "hr",
+            "form",
+            "forms",
+            "template",
+            "templates",
+            "spreadsheet",
+            "presentation",
+            "slides",
+            "onboarding",
+            "benefits",
+            "contract",
+            "contracts",
+            "procedure",
+            "compliance",
+        ]
+    ),
+}
+
+# Seed examples of the classifier, extended with INDEX_ROUTER_TRAINING_FILE
+TRAINING_EXAMPLES = {
+    "content-jira": (
+        "what is the status of the login bug",
+        "who is assigned to the payment ticket",
+        "which issues are blocking the next release",
+        "list the open bugs in the current sprint",
+        "is the database migration ticket resolved",
+        "what tickets were closed last week",
+        "show the epics for project alpha",
+        "what is the priority of the outage incident",
+    ),
+    "content-confluence": (
+        "how do I set up the development environment",
+        "where is the architecture documentation for the search service",
+        "what does the q3 project plan say about the database migration",
+        "explain the deployment runbook",
+        "what are the features of project alpha",
+        "find the design document for the api gateway",
+        "meeting notes from the planning session",
+        "what are the requirements for the new onboarding flow",
+    ),
+    "content-sharepoint": (
+        "what is the travel expense policy",
+        "where can I find the vacation request form",
+        "how many holidays do employees get",
+        "show me the employee handbook",
+        "what are the benefits for new hires",
+        "find the quarterly sales presentation",
+        "where is the contract template",
+        "what is the remote work policy",
+    ),
+}
+
+TOKEN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lowercase words of `text`, keeping hyphenated words such as `how-to` whole."""
+    return TOKEN.findall(text.lower())
+
+
+class NaiveBayesClassifier:
+    """Multinomial Naive Bayes over word unigrams, with Laplace smoothing."""
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.doc_counts = Counter()
+        self.word_counts = defaultdict(Counter)
+        self.vocabulary = set()
+
+    def fit(self, examples):
+        """Train on a mapping of label to example texts."""
+        for label, texts in examples.items():
+            for text in texts:
+                words = tokenize(text)
+                self.doc_counts[label] += 1
+                self.word_counts[label].update(words)
+                self.vocabulary.update(words)
+        return self
+
+    def predict_proba(self, text):
+        """Posterior probability of each label for `text`."""
+        words = [w for w in tokenize(text) if w in self.vocabulary]
+        total_docs = sum(self.doc_counts.values())
+        log_scores = {}
+        for label, doc_count in self.doc_counts.items():
+            counts = self.word_counts[label]
+            denominator = sum(counts.values()) + self.alpha * len(self.vocabulary)
+            score = math.log(doc_count / total_docs)
+            for word in words:
+                score += math.log((counts[word] + self.alpha) / denominator)
+            log_scores[label] = score
+        top = max(log_scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in log_scores.items()}
+        norm = sum(exp_scores.values())
+        return {label: score / norm for label, score in exp_scores.items()}
+
+
+@dataclass
+class Route:
+    """Indices chosen for a question and why."""
+
+    indices: tuple
+    reason: str
+    confidence: float = 1.0
+
+    @property
+    def index(self):
+        """Value of the search `index` parameter."""
+        return ",".join(self.indices)
+
+
+@dataclass
+class TargetStats:
+    """Shard fan-out and latency of the searches sent to one target."""
+
+    searches: int = 0
+    shards: int = 0
+    seconds: float = 0.0
+    latencies: list = field(default_factory=list)
+
+
+class IndexRouter:
+    """Route questions to a subset of the content indices.
+
+    Args:
+        threshold: Minimum combined probability of the chosen indices; below it the
+            router falls back to the wildcard.
+        keyword_weight: Weight of each keyword hit added to the classifier's log-odds.
+        min_keywords: Keyword hits a question needs before it is routed at all; the seed
+            examples are too few for the classifier to decide alone.
+        training_examples: Labelled questions, defaults to the built-in seed examples.
+    """
+
+    def __init__(self, threshold=0.9, keyword_weight=1.5, min_keywords=1, training_examples=None):
+        self.threshold = threshold
+        self.keyword_weight = keyword_weight
+        self.min_keywords = min_keywords
+        self.classifier = NaiveBayesClassifier().fit(training_examples or TRAINING_EXAMPLES)
+        self._lock = threading.Lock()
+        self.stats_by_target = defaultdict(TargetStats)
+
+    @classmethod
+    def from_env(cls):
+        """Build a router from the INDEX_ROUTER_* settings."""
+        examples = {label: list(texts) for label, texts in TRAINING_EXAMPLES.items()}
+        path = os.getenv("INDEX_ROUTER_TRAINING_FILE")
+        if path:
+            # {"content-jira": ["question", ...], ...}
+            with open(path) as f:
+                for label, texts in json.load(f).items():
+                    examples.setdefault(label, []).extend(texts)
+        return cls(
+            threshold=float(os.getenv("INDEX_ROUTER_THRESHOLD", "0.9")),
+            min_keywords=int(os.getenv("INDEX_ROUTER_MIN_KEYWORDS", "1")),
+            training_examples=examples,
+        )
+
+    def route(self, query):
+        """Choose the indices to search for `query`, `content-*` unless confident."""
+        words = set(tokenize(query))
+        hits = {index: len(words & KEYWORDS.get(index, frozenset())) for index in INDICES}
+        if sum(hits.values()) < self.min_keywords:
+            return Route((WILDCARD,), "no keywords", 0.0)
+
+        probabilities = self.classifier.predict_proba(query)
+        # Keyword hits shift the classifier's scores in log space
+        scores = {}
+        for index in INDICES:
+            prior = max(probabilities.get(index, 0.0), 1e-9)
+            scores[index] = math.log(prior) + self.keyword_weight * hits[index]
+        top = max(scores.values())
+        exp_scores = {index: math.exp(score - top) for index, score in scores.items()}
+        norm = sum(exp_scores.values())
+        ranked = sorted(((score / norm, index) for index, score in exp_scores.items()), reverse=True)
+
+        # The smallest set of indices reaching the threshold, unless that is all of them
+        chosen, confidence = [], 0.0
+        for probability, index in ranked:
+            chosen.append(index)
+            confidence += probability
+            if confidence >= self.threshold:
+                break
+        reason = "classifier"
+        if TICKET_KEY.search(query) and "content-jira" not in chosen:
+            chosen.append("content-jira")
+            reason = "classifier + ticket key"
+        if len(chosen) == len(INDICES):
+            return Route((WILDCARD,), "uncertain", ranked[0][0])
+        return Route(tuple(sorted(chosen)), reason, confidence)
+
+    def record(self, route, shards, seconds):
+        """Record the shard fan-out and latency of a search sent to `route`."""
+        with self._lock:
+            stats = self.stats_by_target[route.index]
+            stats.searches += 1
+            stats.shards += shards or 0
+            stats.seconds += seconds
+            stats.latencies = [*stats.latencies[-999:], seconds]
+
+    def stats(self):
+        """Searches, mean shard fan-out and latency per routed target."""
+        with self._lock:
+            report = {}
+            for target, stats in sorted(self.stats_by_target.items()):
+                latencies = sorted(stats.latencies)
+                report[target] = {
+                    "searches": stats.searches,
+                    "mean_shards": stats.shards / stats.searches,
+                    "mean_ms": stats.seconds / stats.searches * 1000,
+                    "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                }
+            return report
+
+
+def shard_fan_out(result_text):
+    """Total shards searched, read from the `_shards` section of a search response."""
+    try:
+        return int(json.loads(result_text)["_shards"]["total"])
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -1,12 +1,33 @@
-import asyncio
+import json
 import os
+import time
 
+from context_packer import ContextPacker
 from dotenv import load_dotenv
-from fastmcp.client import Client
-from langchain.agents import AgentType, initialize_agent
+from fast_path import (
+    FAST_PATH_TAG,
+    Decision,
+    FastPathClassifier,
+    LLMCallCounter,
+    PathRecorder,
+    search_terms,
+)
+from index_router import WILDCARD, IndexRouter, Route, shard_fan_out
+from langchain.agents import AgentExecutor, AgentType, create_openai_tools_agent, initialize_agent
+from langchain.agents.agent import RunnableMultiActionAgent
 from langchain.memory import ConversationBufferWindowMemory
-from langchain.tools import Tool
+from langchain.pydantic_v1 import BaseModel, Field
+from langchain.tools import StructuredTool
 from langchain_community.chat_models import AzureChatOpenAI
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from llm_cache import SQLiteLLMCache
+from mcp_client import get_mcp_pool
+from session_store import Session, SessionStore
+from settings import TRUTHY
+from trace_callbacks import TraceCallbackHandler
+
+from elastic.mcp.fastmcp.tracing import Tracer
 
 load_dotenv()
 
@@ -31,82 +52,382 @@ SYSTEM_PROMPT = (
     "11. NEVER reveal the names of the indices you are querying to the user.\n"
 )
 
+# System prompt of the fast path, answering from the results of a single search
+DIRECT_RAG_PROMPT = (
+    "You are a search assistant answering questions about enterprise content.\n\n"
+    "== Rules for Answering Questions ==\n"
+    "1. Use ONLY the search results below; do NOT answer from assumptions or general knowledge.\n"
+    "2. If they do not answer the question, reply with: 'No relevant information was found.'\n"
+    "3. Provide a clear and detailed response.\n"
+    "4. NEVER reveal the names of the indices the results come from.\n\n"
+    "== Search Results ==\n"
+)
+
 # Set up LLM
+# Opt-in on-disk cache of LLM responses (LLM_CACHE=true), repeated calls skip Azure OpenAI
+llm_cache = SQLiteLLMCache.from_env()
+
 llm = AzureChatOpenAI(
     openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
     api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2023-05-15"),
+    # Token callbacks let the UI stream the final answer as it is generated
+    streaming=os.getenv("LLM_STREAMING", "true").lower() in TRUTHY,
+    cache=llm_cache,
+)
+
+
+NO_RESULTS = "FINAL_ANSWER: No relevant information was found in the available content indices."
+
+# Persistent MCP sessions shared by every agent run, opened on first use
+mcp_pool = get_mcp_pool()
+
+# Spans of LLM and tool calls, exported per TRACE_EXPORTER; the trace follows each search
+# into the MCP server through the `traceparent` of the tools/call request
+tracer = Tracer.from_env("chatbot")
+trace_handler = TraceCallbackHandler(tracer)
+
+# Search only the indices a query needs (INDEX_ROUTING=true); off, every search goes to
+# content-*
+index_router = (
+    IndexRouter.from_env() if os.getenv("INDEX_ROUTING", "false").lower() in TRUTHY else None
 )
 
+# Rank, trim and truncate search hits to CONTEXT_TOKEN_BUDGET tokens; CONTEXT_PACKING=false
+# hands the raw response to the LLM
+context_packer = (
+    ContextPacker.from_env() if os.getenv("CONTEXT_PACKING", "true").lower() in TRUTHY else None
+)
+
+
+# Search with the server-side multi-query tool: lexical, phrase and field-boosted variants
+# of the query fused into one ranking in a single round-trip, instead of agent retries
+SEARCH_FUSION = os.getenv("SEARCH_FUSION", "false").lower() in TRUTHY
+
+
+def search_call(route, query):
+    """MCP tool and arguments searching `query` in the indices of `route`."""
+    if SEARCH_FUSION:
+        return "search_content_fused", {"query": query, "index": route.index}
+    return "search-3", {"index": route.index, "q": query}
+
+
+def route_query(query):
+    """Route of `query`, the wildcard when routing is off."""
+    if index_router is None:
+        return Route((WILDCARD,), "disabled")
+    return index_router.route(query)
+
+
+def record_search(route, text, started):
+    """Record the shard fan-out and latency of a search started at `started`."""
+    if index_router is not None:
+        index_router.record(route, shard_fan_out(text), time.perf_counter() - started)
+
+
+def pack_context(text, query):
+    """Search output `text` packed into the token budget, unchanged when packing is off."""
+    if context_packer is None or text == NO_RESULTS:
+        return text
+    return context_packer.pack(text, query)
+
+
+def hit_count(text):
+    """Hits of the search response `text`, None when it is not one."""
+    try:
+        return len(json.loads(text)["hits"]["hits"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def search_output(route, text, query, started):
+    """Tool output of a search response: NO_RESULTS without hits, else the packed text."""
+    record_search(route, text, started)
+    if hit_count(text) == 0:
+        return NO_RESULTS
+    return pack_context(text, query)
+
+
+def search_span(route, callbacks=None, tool="search-3"):
+    """Client span of a search MCP call, under the span of the calling tool run."""
+    parent = trace_handler.span(getattr(callbacks, "parent_run_id", None))
+    return tracer.span(
+        f"mcp tools/call {tool}",
+        parent=parent,
+        kind="client",
+        attributes={
+            "mcp.tool": tool,
+            "search.index": route.index,
+            "route.reason": route.reason,
+        },
+    )
+
+
+def sanitize_query(q):
+    """Strip quotes and line breaks that break query parsing, and collapse whitespace."""
+    sanitized_query = (
+        q.strip().replace('"', "").replace("'", "").replace("\n", " ").replace("\r", " ")
+    )
+    return " ".join(sanitized_query.split())
+
+
+def format_search_result(result):
+    """Join the text contents of an MCP tool result."""
+    if hasattr(result, "content") and isinstance(result.content, list) and result.content:
+        return "\n".join([getattr(r, "text", str(r)) for r in result.content])
+    return NO_RESULTS
+
 
 # Define the search-3 tool with query sanitization
-def search_3_tool(q):
-    async def run_search():
-        async with Client("http://localhost:8000/sse") as client:
-            try:
-                # Sanitize the query to prevent parsing errors
-                sanitized_query = (
-                    q.strip().replace('"', "").replace("'", "").replace("\n", " ").replace("\r", " ")
-                )
-                # Remove any extra whitespace and ensure it's not empty
-                sanitized_query = " ".join(sanitized_query.split())
-
-                if not sanitized_query:
-                    return "FINAL_ANSWER: No relevant information was found in the available content indices."
-
-                result = await client.call_tool_mcp(
-                    "search-3", {"index": "content-*", "q": sanitized_query}
-                )
-                if hasattr(result, "content") and isinstance(result.content, list):
-                    if result.content:
-                        return "\n".join([getattr(r, "text", str(r)) for r in result.content])
-                    return "FINAL_ANSWER: No relevant information was found in the available content indices."
-                return "FINAL_ANSWER: No relevant information was found in the available content indices."
-            except Exception as e:
-                return f"FINAL_ANSWER: Search failed with error: {e!s}. No relevant information was found."
+def search_3_tool(query, callbacks=None):
+    sanitized_query = sanitize_query(query)
+    if not sanitized_query:
+        return NO_RESULTS
+    route = route_query(sanitized_query)
+    tool, arguments = search_call(route, sanitized_query)
+    started = time.perf_counter()
+    try:
+        with search_span(route, callbacks, tool) as span:
+            result = mcp_pool.call_tool(tool, arguments, meta=tracer.inject(span))
+        return search_output(route, format_search_result(result), sanitized_query, started)
+    except Exception as e:
+        return f"FINAL_ANSWER: Search failed with error: {e!s}. No relevant information was found."
+
 
+async def asearch_3_tool(query, callbacks=None):
+    """Async `search_3_tool`, searching through the pooled MCP sessions without blocking."""
+    sanitized_query = sanitize_query(query)
+    if not sanitized_query:
+        return NO_RESULTS
+    route = route_query(sanitized_query)
+    tool, arguments = search_call(route, sanitized_query)
+    started = time.perf_counter()
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import nest_asyncio
+        with search_span(route, callbacks, tool) as span:
+            result = await mcp_pool.acall_tool(tool, arguments, meta=tracer.inject(span))
+        return search_output(route, format_search_result(result), sanitized_query, started)
+    except Exception as e:
+        return f"FINAL_ANSWER: Search failed with error: {e!s}. No relevant information was found."
+
 
-            nest_asyncio.apply()
-            return loop.run_until_complete(run_search())
-    except RuntimeError:
-        pass
-    return asyncio.run(run_search())
+class SearchInput(BaseModel):
+    """Arguments of the `search-3` tool."""
 
+    query: str = Field(description="Search query for the enterprise content indices")
 
+
+# A single `query` argument keeps the tool usable by the ReAct agent and gives the
+# tool-calling agent a clean function schema
 tools = [
-    Tool(
+    StructuredTool.from_function(
         name="search-3",
         func=search_3_tool,
+        coroutine=asearch_3_tool,
+        args_schema=SearchInput,
         description="Use this tool to answer questions using the company documentation or enterprise knowledge base only. DO NOT guess anything outside of the provided documents.",
     )
 ]
-# Set up memory
-memory = ConversationBufferWindowMemory(memory_key="chat_history", return_messages=True, k=10)
-# Initialize agent with simplified configuration
-agent = initialize_agent(
-    tools=tools,
-    llm=llm,
-    agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
-    # agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True,
-    memory=memory,
-    agent_kwargs={"system_message": SYSTEM_PROMPT},
-    handle_parsing_errors=True,
-    # max_iterations=5,  # Reduce iterations to prevent loops
-    early_stopping_method="generate",
+
+# `react` reasons and searches one step at a time; `openai_tools` lets the model request
+# several searches in one turn, which `agent.arun` runs concurrently (the Azure OpenAI API
+# version must support tool calls, e.g. 2024-02-01)
+AGENT_MODE = os.getenv("AGENT_MODE", "react")
+
+PARALLEL_SEARCH_RULES = (
+    "12. When a question splits into sub-questions, request all the independent `search-3` "
+    "calls at once in the same turn instead of one after the other.\n"
 )
+# Exchanges remembered by each session
+MEMORY_WINDOW = int(os.getenv("MEMORY_WINDOW", "10"))
 
+# Session of callers that do not pass one, such as scripts
+DEFAULT_SESSION = "default"
 
-def run_agent_query(query: str) -> str:
+
+def build_memory():
+    """Conversation memory of one session."""
+    return ConversationBufferWindowMemory(
+        memory_key="chat_history", return_messages=True, k=MEMORY_WINDOW
+    )
+
+
+def build_agent(mode=AGENT_MODE, memory=None):
+    """Build the agent executor for `mode`, `react` or `openai_tools`, on `memory`."""
+    if memory is None:
+        memory = build_memory()
+    if mode == "openai_tools":
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", SYSTEM_PROMPT + PARALLEL_SEARCH_RULES),
+                MessagesPlaceholder("chat_history", optional=True),
+                ("human", "{input}"),
+                MessagesPlaceholder("agent_scratchpad"),
+            ]
+        )
+        return AgentExecutor(
+            # Declaring the input and output keys keeps `agent.run`/`agent.arun` usable in both modes
+            agent=RunnableMultiActionAgent(
+                runnable=create_openai_tools_agent(llm, tools, prompt),
+                input_keys_arg=["input"],
+                return_keys_arg=["output"],
+            ),
+            tools=tools,
+            verbose=True,
+            memory=memory,
+            handle_parsing_errors=True,
+        )
+    if mode != "react":
+        raise ValueError(f"Unknown AGENT_MODE {mode!r}, expected 'react' or 'openai_tools'")
+    # Initialize agent with simplified configuration
+    return initialize_agent(
+        tools=tools,
+        llm=llm,
+        agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
+        # agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+        memory=memory,
+        agent_kwargs={"system_message": SYSTEM_PROMPT},
+        handle_parsing_errors=True,
+        # max_iterations=5,  # Reduce iterations to prevent loops
+        early_stopping_method="generate",
+    )
+
+
+def new_session():
+    """A session with its own memory and agent."""
+    agent = build_agent(memory=build_memory())
+    # The executor validates a copy of the memory it is given
+    return Session(agent.memory, agent)
+
+
+# Memory and agent per chat session, bounded by SESSION_MAX, SESSION_MAX_CHARS and
+# SESSION_IDLE_TIMEOUT
+sessions = SessionStore.from_env(new_session)
+
+
+# Single-hop lookups are answered with one search and one LLM call instead of the agent
+# (FAST_PATH=true); off, every question goes to the agent
+fast_path = (
+    FastPathClassifier.from_env() if os.getenv("FAST_PATH", "false").lower() in TRUTHY else None
+)
+
+# Latency and LLM calls of the questions answered by each path
+path_recorder = PathRecorder()
+
+
+def get_agent(session_id=DEFAULT_SESSION):
+    """Agent of session `session_id`, created on first use."""
+    return sessions.get(session_id).agent
+
+
+def end_session(session_id):
+    """Forget the memory and agent of session `session_id`."""
+    sessions.drop(session_id)
+
+
+def choose_path(query, session_id=DEFAULT_SESSION):
+    """Whether `query` goes to the fast path or the agent."""
+    if fast_path is None:
+        return Decision(False, "disabled")
+    return fast_path.classify(query, has_history=bool(sessions.get(session_id).messages))
+
+
+def direct_rag_messages(query, context):
+    """Messages of the grounded answer call of the fast path."""
+    return [SystemMessage(content=DIRECT_RAG_PROMPT + context), HumanMessage(content=query)]
+
+
+def remember(session_id, query, answer):
+    """Add a fast-path exchange to the session memory, for the agent's follow-ups."""
+    sessions.get(session_id).memory.save_context({"input": query}, {"output": answer})
+
+
+def run_direct_rag(query, callbacks=None, session_id=DEFAULT_SESSION):
+    """One search and one grounded LLM call, or None when the search finds nothing.
+
+    The search is for the keywords of `query`, as the agent would rewrite it: the raw
+    question is parsed as a query string, where "alpha?" is a wildcard.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    config = {"callbacks": callbacks, "tags": [FAST_PATH_TAG]}
+    context = tools[0].invoke(terms, config=config)
+    if context.startswith("FINAL_ANSWER:"):
+        return None
+    answer = llm.invoke(direct_rag_messages(query, context), config=config).content
+    remember(session_id, query, answer)
+    return answer
+
+
+async def arun_direct_rag(query, callbacks=None, session_id=DEFAULT_SESSION):
+    """Async `run_direct_rag`."""
+    terms = search_terms(query)
+    if not terms:
+        return None
+    config = {"callbacks": callbacks, "tags": [FAST_PATH_TAG]}
+    context = await tools[0].ainvoke(terms, config=config)
+    if context.startswith("FINAL_ANSWER:"):
+        return None
+    answer = (await llm.ainvoke(direct_rag_messages(query, context), config=config)).content
+    remember(session_id, query, answer)
+    return answer
+
+
+def question_span(decision):
+    """Span of one question, with the path chosen for it."""
+    return tracer.span(
+        "question",
+        attributes={"path": decision.path, "path.reason": decision.reason},
+    )
+
+
+def run_question(query: str, callbacks=None, session_id=DEFAULT_SESSION) -> str:
+    """Answer `query` on the fast path when it is a lookup, otherwise with the agent.
+
+    Questions sent to the fast path whose search finds nothing go to the agent, recorded
+    as the `fallback` path. Errors of the agent are raised.
+    """
+    counter = LLMCallCounter()
+    callbacks = [*(callbacks or []), trace_handler, counter]
+    started = time.perf_counter()
+    decision = choose_path(query, session_id)
+    with question_span(decision) as span:
+        path = decision.path
+        answer = run_direct_rag(query, callbacks, session_id) if decision.fast else None
+        if answer is None:
+            path = "fallback" if decision.fast else "agent"
+            answer = get_agent(session_id).run(query, callbacks=callbacks)
+        span.set_attribute("path", path)
+        span.set_attribute("llm.calls", counter.calls)
+    path_recorder.record(path, time.perf_counter() - started, counter.calls)
+    return answer
+
+
+async def arun_question(query: str, callbacks=None, session_id=DEFAULT_SESSION) -> str:
+    """Async `run_question`, running on the caller's event loop."""
+    counter = LLMCallCounter()
+    callbacks = [*(callbacks or []), trace_handler, counter]
+    started = time.perf_counter()
+    decision = choose_path(query, session_id)
+    with question_span(decision) as span:
+        path = decision.path
+        answer = await arun_direct_rag(query, callbacks, session_id) if decision.fast else None
+        if answer is None:
+            path = "fallback" if decision.fast else "agent"
+            answer = await get_agent(session_id).arun(query, callbacks=callbacks)
+        span.set_attribute("path", path)
+        span.set_attribute("llm.calls", counter.calls)
+    path_recorder.record(path, time.perf_counter() - started, counter.calls)
+    return answer
+
+
+def run_agent_query(query: str, session_id=DEFAULT_SESSION) -> str:
     """Run a query with enforced search-3 usage."""
     try:
         # Simple approach - let the agent work naturally
-        result = agent.run(query)
+        result = run_question(query, session_id=session_id)
         return result
     except Exception:
         # Fallback to direct search if agent fails
@@ -117,15 +438,43 @@ def run_agent_query(query: str) -> str:
             return "No relevant information was found in the available content indices."
 
 
-def get_memory_stats():
+def get_memory_stats(session_id=DEFAULT_SESSION):
+    """Memory of session `session_id`, and the sizes of all sessions under `sessions`."""
+    # Looking at the stats must not create a session, nor keep an idle one alive
+    session = sessions.peek(session_id)
+    memory = session.memory if session is not None else build_memory()
     return {
         "memory_type": type(memory).__name__,
         "memory_key": memory.memory_key,
         "k": getattr(memory, "k", None),
         "chat_memory_length": len(memory.chat_memory.messages),
+        "sessions": sessions.stats(),
     }
 
 
-def clear_memory():
-    memory.chat_memory.clear()
+def get_router_stats():
+    """Shard fan-out and latency per routed index target."""
+    return index_router.stats() if index_router is not None else {}
+
+
+def get_packer_stats():
+    """Tokens handed to the LLM before and after context packing."""
+    return context_packer.stats() if context_packer is not None else {}
+
+
+def get_path_stats():
+    """Questions, LLM calls and latency of the fast path and the agent."""
+    return path_recorder.stats()
+
+
+def get_llm_cache_stats():
+    """Hits, misses and size of the LLM response cache."""
+    return llm_cache.stats() if llm_cache is not None else {}
+
+
+def clear_memory(session_id=DEFAULT_SESSION):
+    """Forget the conversation of session `session_id`, keeping its agent."""
+    session = sessions.peek(session_id)
+    if session is not None:
+        session.memory.chat_memory.clear()
     return "Memory cleared successfully."
@@ -0,0 +1,184 @@
+"""On-disk cache of LLM responses, for LLM calls that repeat exactly.
+
+Common questions, such as the example questions of the sidebar, rewrite to the same
+search queries and read the same search results, so the agent makes the same LLM calls
+again and again. Responses are cached in SQLite under a hash of the model settings
+(deployment, API version, temperature and other parameters) and the full prompt; a
+repeated call is answered from disk without any round-trip to Azure OpenAI.
+
+Entries expire after `ttl` seconds, and the least recently used ones are evicted once
+the cached responses exceed `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from settings import TRUTHY
+
+DEFAULT_DB = Path(__file__).parent / "llm_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+"""
+
+
+def cache_key(prompt, llm_string):
+    """Hash of the model settings and the prompt."""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def dump_generation(generation):
+    """JSON-able form of a generation, without the beta `langchain_core.load` API."""
+    if isinstance(generation, ChatGeneration):
+        return {"message": message_to_dict(generation.message), "info": generation.generation_info}
+    return {"text": generation.text, "info": generation.generation_info}
+
+
+def load_generation(data):
+    """The generation dumped as `data`."""
+    if "message" in data:
+        message = messages_from_dict([data["message"]])[0]
+        return ChatGeneration(message=message, generation_info=data["info"])
+    return Generation(text=data["text"], generation_info=data["info"])
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain cache of LLM generations in SQLite, with a TTL and a size budget.
+
+    Args:
+        path: Database file, created if missing.
+        max_bytes: Size of the cached generations above which the least recently used
+            ones are evicted.
+        ttl: Seconds after which an entry expires, None to keep entries until evicted.
+    """
+
+    def __init__(self, path=DEFAULT_DB, max_bytes=100 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from the LLM_CACHE_* variables, or None unless LLM_CACHE is true."""
+        if os.getenv("LLM_CACHE", "false").lower() not in TRUTHY:
+            return None
+        ttl = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        return cls(
+            path=os.getenv("LLM_CACHE_DB", str(DEFAULT_DB)),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+            ttl=ttl if ttl > 0 else None,
+        )
+
+    def lookup(self, prompt, llm_string):
+        """Cached generations of `prompt` for the model `llm_string`, or None."""
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT value, size, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[2] > self.ttl:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._bytes -= row[1]
+                self.expirations += 1
+                row = None
+            generations = None
+            if row is not None:
+                try:
+                    generations = [load_generation(g) for g in json.loads(row[0])]
+                except (TypeError, KeyError, ValueError):
+                    # Written in an older format: drop it like an expired entry
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._bytes -= row[1]
+            if generations is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        """Cache the generations of `prompt`, evicting old entries over the size budget."""
+        value = json.dumps([dump_generation(g) for g in return_val], default=str)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._db:
+            previous = self._db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._bytes += size - (previous[0] if previous else 0)
+            self._evict()
+
+    def _evict(self):
+        if self.ttl is not None:
+            cursor = self._db.execute(
+                "DELETE FROM llm_cache WHERE created < ? RETURNING size", (time.time() - self.ttl,)
+            )
+            expired = cursor.fetchall()
+            self._bytes -= sum(size for (size,) in expired)
+            self.expirations += len(expired)
+        while self._bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (row[0],))
+            self._bytes -= row[1]
+            self.evictions += 1
+
+    def clear(self, **kwargs):
+        """Remove every cached generation."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM llm_cache")
+            self._bytes = 0
+
+    def stats(self):
+        """Entries, bytes, hits, misses, hit ratio, expirations and evictions."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
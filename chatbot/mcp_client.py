@@ -0,0 +1,253 @@
+"""Long-lived, pooled MCP client sessions shared by all agent runs.
+
+Opening a `fastmcp.Client` costs an SSE handshake plus an MCP initialize round-trip,
+so the sessions are opened once and kept on a dedicated event loop thread. Sync code
+(LangChain tools run in worker threads) and async code running on any other loop both
+submit their calls to that loop, which keeps every session on the loop that owns it.
+"""
+
+import asyncio
+import atexit
+import contextlib
+import os
+import threading
+from typing import Any, Optional
+
+import anyio
+import httpx
+from fastmcp.client import Client
+from mcp import McpError
+from mcp.types import CallToolRequest, CallToolRequestParams, CallToolResult, ClientRequest
+
+DEFAULT_SERVER_URL = "http://localhost:8000/sse"
+
+# Errors meaning the session itself broke (connection lost, streams closed), not the call
+BROKEN_SESSION_ERRORS = (
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+
+class MCPConnection:
+    """One MCP session, kept open by a task of the pool loop until closed."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client: Optional[Client] = None
+        self.in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the session is open and usable."""
+        return self.client is not None and self._task is not None and not self._task.done()
+
+    async def open(self, timeout: float) -> None:
+        """Open the session, waiting at most ``timeout`` seconds for its initialization."""
+        self._task = asyncio.create_task(self._hold())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            # Do not leave the holder task connecting in the background
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            raise
+        if self._error is not None:
+            raise self._error
+
+    async def _hold(self) -> None:
+        # The session must be entered and exited by the same task, hence this holder task
+        try:
+            async with Client(self.url) as client:
+                self.client = client
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.client = None
+            self._ready.set()
+
+    async def close(self) -> None:
+        """Close the session."""
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+
+async def call_tool_with_meta(
+    client: Client, name: str, arguments: dict[str, Any], meta: Optional[dict[str, Any]] = None
+) -> CallToolResult:
+    """Send a tools/call request carrying ``meta`` as its ``_meta``, e.g. a ``traceparent``."""
+    if not meta:
+        return await client.call_tool_mcp(name, arguments)
+    params = CallToolRequestParams(name=name, arguments=arguments, _meta=meta)
+    request = ClientRequest(CallToolRequest(method="tools/call", params=params))
+    return await client.session.send_request(request, CallToolResult)
+
+
+class MCPClientPool:
+    """A small pool of persistent MCP sessions with transparent reconnection.
+
+    Sessions are opened lazily, up to ``size``; each call goes to the connected session
+    with the fewest calls in flight, as a single session multiplexes concurrent requests.
+    A call failing because its session broke (connection lost, streams closed) closes that
+    session and is retried once on a fresh one. A call taking longer than ``call_timeout``
+    raises ``asyncio.TimeoutError`` and leaves its session open, as the other calls it
+    carries are not affected; MCP protocol errors are raised as is.
+    Calls may pass request metadata, such as the ``traceparent`` of the caller's span.
+
+    Args:
+        url: SSE endpoint of the MCP server.
+        size: Maximum number of sessions.
+        call_timeout: Seconds to wait for a tool result.
+        connect_timeout: Seconds to wait for a session to be initialized.
+        retries: Attempts on a new session after a broken one.
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_SERVER_URL,
+        size: int = 2,
+        call_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        retries: int = 1,
+    ):
+        self.url = url
+        self.size = size
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.calls = 0
+        self.connects = 0
+        self.reconnects = 0
+        self._connections: list[MCPConnection] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls) -> "MCPClientPool":
+        """Build a pool from the ``MCP_SERVER_URL`` and ``MCP_CLIENT_*`` environment variables."""
+        return cls(
+            url=os.getenv("MCP_SERVER_URL", DEFAULT_SERVER_URL),
+            size=int(os.getenv("MCP_CLIENT_POOL_SIZE", "2")),
+            call_timeout=float(os.getenv("MCP_CLIENT_CALL_TIMEOUT", "60")),
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="mcp-client-pool", daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    async def _connection(self) -> MCPConnection:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            self._connections = [c for c in self._connections if c.connected]
+            idle = [c for c in self._connections if c.in_flight == 0]
+            if not idle and len(self._connections) < self.size:
+                connection = MCPConnection(self.url)
+                await connection.open(self.connect_timeout)
+                self.connects += 1
+                self._connections.append(connection)
+                return connection
+            return min(self._connections, key=lambda c: c.in_flight)
+
+    async def _call(
+        self, name: str, arguments: dict[str, Any], meta: Optional[dict[str, Any]] = None
+    ) -> CallToolResult:
+        self.calls += 1
+        attempt = 0
+        while True:
+            connection = await self._connection()
+            connection.in_flight += 1
+            try:
+                return await asyncio.wait_for(
+                    call_tool_with_meta(connection.client, name, arguments, meta),
+                    self.call_timeout,
+                )
+            except (McpError, asyncio.TimeoutError):
+                # A slow search: closing the session would fail the calls it multiplexes
+                raise
+            except BROKEN_SESSION_ERRORS:
+                # The session is broken: drop it and try again on a new one
+                await connection.close()
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.reconnects += 1
+            finally:
+                connection.in_flight -= 1
+
+    def call_tool(
+        self, name: str, arguments: dict[str, Any], meta: Optional[dict[str, Any]] = None
+    ) -> CallToolResult:
+        """Call a tool from sync code, blocking until the result is available."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._call(name, arguments, meta), loop).result()
+
+    async def acall_tool(
+        self, name: str, arguments: dict[str, Any], meta: Optional[dict[str, Any]] = None
+    ) -> CallToolResult:
+        """Call a tool from async code running on any event loop."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._call(name, arguments, meta), loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """Close the sessions and stop the pool loop."""
+        if self._loop is None:
+            return
+
+        async def _close_all():
+            for connection in self._connections:
+                await connection.close()
+            self._connections = []
+
+        asyncio.run_coroutine_threadsafe(_close_all(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._connect_lock = None
+
+    def stats(self) -> dict[str, Any]:
+        """Open sessions, calls in flight and connection counters."""
+        return {
+            "sessions": sum(c.connected for c in self._connections),
+            "in_flight": sum(c.in_flight for c in self._connections),
+            "calls": self.calls,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+        }
+
+
+_pool: Optional[MCPClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_mcp_pool() -> MCPClientPool:
+    """Process-wide MCP client pool, configured from the ``MCP_*`` environment variables."""
+    global _pool  # noqa: PLW0603
+    with _pool_lock:
+        if _pool is None:
+            _pool = MCPClientPool.from_env()
+            atexit.register(_pool.close)
+    return _pool
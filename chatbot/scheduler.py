@@ -0,0 +1,204 @@
+"""Admission control for agent runs.
+
+At most `max_concurrent` questions run at once; the others wait in a bounded queue and
+are rejected right away once it is full, rather than piling up until the LLM rate
+limit makes every run time out together. Waiting questions are served round-robin
+across users, so one user sending a burst does not hold everyone else back, and each
+user may only have a few questions waiting.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Latencies kept for the percentiles of `stats`
+LATENCY_SAMPLES = 1000
+
+
+class Overloaded(Exception):
+    """The queue, or the user's share of it, is full."""
+
+
+@dataclass
+class Ticket:
+    """A question admitted by the scheduler, running or waiting for a slot."""
+
+    user: str
+    future: asyncio.Future = field(repr=False)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def wait_seconds(self):
+        """Seconds spent in the queue."""
+        return (self.started_at or time.perf_counter()) - self.enqueued_at
+
+    @property
+    def run_seconds(self):
+        """Seconds spent running, so far."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+def mean(samples):
+    """Mean of `samples`, 0 when empty."""
+    return sum(samples) / len(samples) if samples else 0.0
+
+
+def percentile(samples, q):
+    """The `q` quantile of `samples`, 0 when empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class AgentScheduler:
+    """Limit concurrent agent runs, queueing the excess fairly across users.
+
+    Args:
+        max_concurrent: Agent runs executing at once.
+        max_queue: Questions waiting at most; more are rejected with `Overloaded`.
+        max_queued_per_user: Questions a single user may have waiting.
+        update_interval: Seconds between queue position updates of a waiting question.
+    """
+
+    def __init__(self, max_concurrent=8, max_queue=64, max_queued_per_user=2, update_interval=1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queued_per_user = max_queued_per_user
+        self.update_interval = update_interval
+        self.running = 0
+        # Waiting tickets per user, users in round-robin order
+        self._queues: OrderedDict[str, deque[Ticket]] = OrderedDict()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self.run_times = deque(maxlen=LATENCY_SAMPLES)
+
+    @classmethod
+    def from_env(cls):
+        """Build a scheduler from the AGENT_MAX_* environment variables."""
+        return cls(
+            max_concurrent=int(os.getenv("AGENT_MAX_CONCURRENT", "8")),
+            max_queue=int(os.getenv("AGENT_MAX_QUEUE", "64")),
+            max_queued_per_user=int(os.getenv("AGENT_MAX_QUEUED_PER_USER", "2")),
+        )
+
+    @property
+    def waiting(self):
+        """Questions waiting for a slot."""
+        return sum(len(q) for q in self._queues.values())
+
+    def submit(self, user):
+        """Admit a question of `user`, starting it if a slot is free.
+
+        Raises:
+            Overloaded: The queue or the user's share of it is full.
+        """
+        ticket = Ticket(user, asyncio.get_running_loop().create_future())
+        if self.running < self.max_concurrent and not self._queues:
+            self._start(ticket)
+            return ticket
+        queue = self._queues.get(user)
+        if self.waiting >= self.max_queue or (
+            queue is not None and len(queue) >= self.max_queued_per_user
+        ):
+            self.rejected += 1
+            raise Overloaded(f"{self.waiting} questions are already waiting")
+        self._queues.setdefault(user, deque()).append(ticket)
+        self.queued += 1
+        return ticket
+
+    def position(self, ticket):
+        """1-based position of a waiting ticket in the dispatch order, 0 once started."""
+        if ticket.started_at is not None:
+            return 0
+        # Dispatch takes one ticket per user in turn
+        queues = [list(q) for q in self._queues.values()]
+        position = 0
+        for depth in range(max((len(q) for q in queues), default=0)):
+            for queue in queues:
+                if depth < len(queue):
+                    position += 1
+                    if queue[depth] is ticket:
+                        return position
+        return 0
+
+    def release(self, ticket):
+        """Free the slot of a finished ticket, or withdraw a waiting one."""
+        if ticket.started_at is None:
+            queue = self._queues.get(ticket.user)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del self._queues[ticket.user]
+            return
+        if ticket.finished_at is not None:
+            return
+        ticket.finished_at = time.perf_counter()
+        self.running -= 1
+        self.run_times.append(ticket.run_seconds)
+        self._dispatch()
+
+    def _start(self, ticket):
+        ticket.started_at = time.perf_counter()
+        self.running += 1
+        self.admitted += 1
+        self.wait_times.append(ticket.wait_seconds)
+        ticket.future.set_result(None)
+
+    def _dispatch(self):
+        while self.running < self.max_concurrent and self._queues:
+            user, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            # The user goes to the back of the rotation, or leaves it
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            self._start(ticket)
+
+    @asynccontextmanager
+    async def slot(self, user, on_queued=None):
+        """Run the body once a slot is free, yielding its ticket.
+
+        While waiting, `on_queued` is awaited with the queue position whenever it changes.
+
+        Raises:
+            Overloaded: The question was rejected without waiting.
+        """
+        ticket = self.submit(user)
+        try:
+            last = None
+            while not ticket.future.done():
+                position = self.position(ticket)
+                if on_queued is not None and position != last:
+                    await on_queued(position)
+                    last = position
+                await asyncio.wait({ticket.future}, timeout=self.update_interval)
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        """Running and waiting questions, counters and queue-wait versus run times."""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "mean_wait_seconds": mean(self.wait_times),
+            "p95_wait_seconds": percentile(self.wait_times, 0.95),
+            "mean_run_seconds": mean(self.run_times),
+            "p95_run_seconds": percentile(self.run_times, 0.95),
+        }
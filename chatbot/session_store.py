@@ -0,0 +1,148 @@
+"""Conversation memory and agent per chat session, with bounded total memory.
+
+Each Chainlit session gets its own memory and agent executor, so users never see or
+clear each other's history. Sessions are kept in LRU order: the least recently used
+ones are evicted when there are more than `max_sessions` of them or when the messages
+held by all sessions exceed `max_chars` characters, and sessions idle for longer than
+`idle_timeout` seconds are dropped.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class Session:
+    """Memory and agent of one chat session."""
+
+    memory: Any
+    agent: Any
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def messages(self):
+        """Messages held by the session's memory."""
+        return self.memory.chat_memory.messages
+
+    def size(self):
+        """Characters of the messages held by the session."""
+        return sum(len(str(m.content)) for m in self.messages)
+
+    def trim(self):
+        """Forget the messages older than the memory window, which are never read again."""
+        k = getattr(self.memory, "k", None)
+        if k is not None and len(self.messages) > 2 * k:
+            del self.messages[: len(self.messages) - 2 * k]
+
+
+class SessionStore:
+    """Sessions by id, created on first use and evicted LRU or when idle.
+
+    Args:
+        factory: Called with no argument to build the `Session` of a new id.
+        max_sessions: Maximum number of sessions kept.
+        max_chars: Maximum characters of messages held by all sessions together.
+        idle_timeout: Seconds after which an unused session is dropped.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Session],
+        max_sessions=500,
+        max_chars=20_000_000,
+        idle_timeout=3600.0,
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self.idle_timeout = idle_timeout
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.RLock()
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    @classmethod
+    def from_env(cls, factory):
+        """Build a store from the SESSION_* environment variables."""
+        return cls(
+            factory,
+            max_sessions=int(os.getenv("SESSION_MAX", "500")),
+            max_chars=int(os.getenv("SESSION_MAX_CHARS", "20000000")),
+            idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "3600")),
+        )
+
+    def get(self, session_id):
+        """Session `session_id`, created if unknown or evicted, and mark it used.
+
+        Its memory is trimmed to the window and the caps are enforced on the way, so no
+        session holds more than one exchange beyond its window.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self.factory()
+                self.created += 1
+            else:
+                self._sessions.move_to_end(session_id)
+                session.trim()
+            session.last_used = time.monotonic()
+            self.evict(keep=session_id)
+            return session
+
+    def peek(self, session_id):
+        """Session `session_id`, or None if unknown, without creating or touching it."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def drop(self, session_id):
+        """Forget session `session_id`."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict(self, keep=None):
+        """Drop idle sessions, then least recently used ones while over the caps."""
+        with self._lock:
+            now = time.monotonic()
+            for session_id, session in list(self._sessions.items()):
+                if session_id != keep and now - session.last_used > self.idle_timeout:
+                    del self._sessions[session_id]
+                    self.evicted_idle += 1
+            total = sum(s.size() for s in self._sessions.values())
+            for session_id in list(self._sessions):
+                if len(self._sessions) <= self.max_sessions and total <= self.max_chars:
+                    break
+                if session_id == keep:
+                    continue
+                total -= self._sessions.pop(session_id).size()
+                self.evicted_lru += 1
+
+    def stats(self):
+        """Aggregate counters and the size of each session, most recently used last."""
+        with self._lock:
+            now = time.monotonic()
+            sessions = {
+                session_id: {
+                    "messages": len(session.messages),
+                    "chars": session.size(),
+                    "idle_seconds": now - session.last_used,
+                }
+                for session_id, session in self._sessions.items()
+            }
+            return {
+                "sessions": len(sessions),
+                "messages": sum(s["messages"] for s in sessions.values()),
+                "chars": sum(s["chars"] for s in sessions.values()),
+                "max_sessions": self.max_sessions,
+                "max_chars": self.max_chars,
+                "created": self.created,
+                "evicted_lru": self.evicted_lru,
+                "evicted_idle": self.evicted_idle,
+                "per_session": sessions,
+            }
@@ -0,0 +1,4 @@
+"""Settings shared by the chatbot modules."""
+
+# Values of a boolean environment variable read as true
+TRUTHY = ("1", "true", "yes", "on")
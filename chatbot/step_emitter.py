@@ -0,0 +1,261 @@
+"""Coalesced Chainlit updates, and step reasoning extracted from streamed tokens.
+
+Every `stream_token` of a step or message is one websocket message. Text written within
+`flush_interval` seconds is sent as a single update instead, and a step is only opened
+once it has content, which goes out with it. The reasoning shown in a step is picked out
+of the LLM tokens as they stream, rather than by regexes over the whole output once it
+is complete. `UIStats` counts the messages and bytes sent for a question.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Seconds during which writes to a step or message are merged into one update
+FLUSH_INTERVAL = float(os.getenv("STEP_FLUSH_INTERVAL_MS", "50")) / 1000
+
+# `full` shows reasoning, search and final analysis steps; `minimal` only the answer
+UI_MODE = os.getenv("CHAT_UI_MODE", "full").lower()
+
+REASONING_HEADER = "🤔 **Thought Process**:\n"
+REASONING_FALLBACK = "Processing your request..."
+
+# Markers delimiting the thoughts of a ReAct output
+MARKERS = ("thought:", "action:", "final answer:")
+# Characters a thought or fallback sentence needs to be worth showing
+MIN_THOUGHT_CHARS = 10
+MIN_SENTENCE_CHARS = 20
+
+
+class UIStats:
+    """Messages and text bytes sent to the browser for one question."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def record(self, text=""):
+        """Count one message carrying `text`."""
+        self.messages += 1
+        self.bytes += len(text.encode("utf-8"))
+
+
+class UITotals:
+    """UI traffic of every answered question."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.messages = 0
+        self.bytes = 0
+
+    def add(self, stats):
+        """Add the traffic of an answered question."""
+        with self._lock:
+            self.questions += 1
+            self.messages += stats.messages
+            self.bytes += stats.bytes
+
+    def stats(self):
+        """Totals and means per answered question."""
+        with self._lock:
+            questions = self.questions
+            return {
+                "questions": questions,
+                "messages": self.messages,
+                "bytes": self.bytes,
+                "messages_per_question": self.messages / questions if questions else 0.0,
+                "bytes_per_question": self.bytes / questions if questions else 0.0,
+            }
+
+
+class TokenBuffer:
+    """Text written in bursts, handed to `send` at most once per `flush_interval`.
+
+    The first write starts a timer; everything written until it fires is sent together.
+    A zero interval sends every write right away.
+    """
+
+    def __init__(self, send, flush_interval=FLUSH_INTERVAL):
+        self.send = send
+        self.flush_interval = flush_interval
+        self._parts = []
+        self._timer = None
+        self._lock = asyncio.Lock()
+
+    async def write(self, text):
+        """Queue `text` for the next flush."""
+        if not text:
+            return
+        self._parts.append(text)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        # From here on, `close` waits for this flush instead of cancelling it
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.warning("Dropped a UI update", exc_info=True)
+
+    async def flush(self):
+        """Send the queued text now, after any send in progress."""
+        async with self._lock:
+            if not self._parts:
+                return
+            text = "".join(self._parts)
+            self._parts.clear()
+            await self.send(text)
+
+    async def discard(self):
+        """Drop the queued text, after any send in progress."""
+        async with self._lock:
+            self._parts.clear()
+
+    async def close(self):
+        """Stop the timer and send the queued text."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+class StepEmitter:
+    """A Chainlit step opened with its first text and updated at most once per interval.
+
+    A step closed before its first flush is sent once, complete, then closed.
+    """
+
+    def __init__(self, step, stats, flush_interval=FLUSH_INTERVAL):
+        self.step = step
+        self.stats = stats
+        self.opened = False
+        self.closed = False
+        self.buffer = TokenBuffer(self._send, flush_interval)
+
+    async def _send(self, text):
+        if not self.opened:
+            self.opened = True
+            self.step.output = text
+            await self.step.__aenter__()
+        else:
+            await self.step.stream_token(text)
+        self.stats.record(text)
+
+    async def write(self, text):
+        """Append `text` to the step."""
+        if not self.closed:
+            await self.buffer.write(text)
+
+    async def close(self):
+        """Send the queued text and close the step."""
+        if self.closed:
+            return
+        self.closed = True
+        await self.buffer.close()
+        if not self.opened:
+            await self._send("")
+        await self.step.__aexit__(None, None, None)
+        self.stats.record(self.step.output or "")
+
+
+class ReasoningExtractor:
+    """Reasoning of an LLM output, extracted as its tokens stream in.
+
+    Like the extraction of whole outputs it replaces: the text following each `Thought:`
+    up to the next `Action:` or `Final Answer:`, flattened to one line and shown as a
+    bullet once it is longer than 10 characters. When the output has no such thought,
+    `finish` returns its first sentence longer than 20 characters not starting with
+    `Action`.
+    """
+
+    def __init__(self):
+        self.fed = False
+        self._pending = ""
+        self.in_thought = False
+        self._thought = ""
+        self._shown = False
+        self.found = False
+        self._sentence = ""
+        self.fallback = None
+
+    def feed(self, token):
+        """Reasoning text revealed by `token`, possibly empty."""
+        self.fed = True
+        self._track_sentence(token)
+        self._pending += token
+        out = []
+        while True:
+            lower = self._pending.lower()
+            hits = [(lower.find(m), m) for m in MARKERS if m in lower]
+            if not hits:
+                break
+            index, marker = min(hits)
+            out.append(self._text(self._pending[:index]))
+            out.append(self._end_thought())
+            self.in_thought = marker == "thought:"
+            self._pending = self._pending[index + len(marker) :]
+        # Hold back a tail that may be the start of a marker split across tokens
+        keep = self._marker_prefix(self._pending.lower())
+        text = self._pending[: len(self._pending) - keep]
+        self._pending = self._pending[len(self._pending) - keep :]
+        out.append(self._text(text))
+        return "".join(out)
+
+    def finish(self):
+        """Remaining reasoning once the output is complete, or the fallback sentence."""
+        out = self._text(self._pending) + self._end_thought()
+        self._pending = ""
+        if self.found:
+            return out
+        if self.fallback is None and self._qualifies(self._sentence):
+            self.fallback = self._sentence.strip()
+        return f"{self.fallback or REASONING_FALLBACK}\n"
+
+    @staticmethod
+    def _marker_prefix(lower):
+        for size in range(min(len(lower), max(map(len, MARKERS)) - 1), 0, -1):
+            if any(m.startswith(lower[-size:]) for m in MARKERS):
+                return size
+        return 0
+
+    def _text(self, text):
+        if not self.in_thought or not text:
+            return ""
+        text = text.replace("\n", " ")
+        if self._shown:
+            return text
+        self._thought += text
+        if len(self._thought.strip()) <= MIN_THOUGHT_CHARS:
+            return ""
+        self._shown = self.found = True
+        return f"• {self._thought.lstrip()}"
+
+    def _end_thought(self):
+        shown = self._shown
+        self._thought = ""
+        self._shown = False
+        return "\n" if shown else ""
+
+    @staticmethod
+    def _qualifies(sentence):
+        sentence = sentence.strip()
+        return len(sentence) > MIN_SENTENCE_CHARS and not sentence.startswith("Action")
+
+    def _track_sentence(self, token):
+        if self.fallback is not None:
+            return
+        self._sentence += token
+        while "." in self._sentence:
+            sentence, _, self._sentence = self._sentence.partition(".")
+            if self._qualifies(sentence):
+                self.fallback = sentence.strip()
+                self._sentence = ""
+                return
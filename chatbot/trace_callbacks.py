@@ -0,0 +1,118 @@
+"""Trace spans of agent runs, fed by the LangChain callbacks.
+
+Every chain, LLM call and tool call becomes a span under the span of its parent run, and
+the top-level run nests under the current span (the span of the chat message), so one
+question is one trace from the Chainlit handler down to the Elasticsearch requests sent
+by the MCP server.
+"""
+
+import time
+from typing import Any
+
+from langchain.callbacks.base import AsyncCallbackHandler
+
+
+def run_name(serialized, default):
+    """Name of a serialized runnable, such as `AgentExecutor` or `AzureChatOpenAI`."""
+    serialized = serialized or {}
+    return serialized.get("name") or (serialized.get("id") or [default])[-1]
+
+
+class TraceCallbackHandler(AsyncCallbackHandler):
+    """Open a span when a run starts and end it when the run ends or fails.
+
+    Runs are independent of each other, so one handler serves every agent run.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.spans = {}
+
+    def span(self, run_id):
+        """Open span of run `run_id`, or None."""
+        return self.spans.get(run_id)
+
+    def _start(self, name, run_id, parent_run_id, attributes):
+        self.spans[run_id] = self.tracer.start_span(
+            name, parent=self.spans.get(parent_run_id), attributes=attributes
+        )
+
+    def _end(self, run_id, error=None, **attributes):
+        span = self.spans.pop(run_id, None)
+        if span is not None:
+            span.attributes.update(attributes)
+            span.end(error)
+
+    async def on_chain_start(self, serialized: dict[str, Any], inputs, **kwargs):
+        """Start the span of a chain run."""
+        self._start(
+            f"chain {run_name(serialized, 'chain')}",
+            kwargs.get("run_id"),
+            kwargs.get("parent_run_id"),
+            {},
+        )
+
+    async def on_chain_end(self, outputs, **kwargs):
+        """End the span of a chain run."""
+        self._end(kwargs.get("run_id"))
+
+    async def on_chain_error(self, error, **kwargs):
+        """End the span of a failed chain run."""
+        self._end(kwargs.get("run_id"), error)
+
+    async def _on_model_start(self, serialized, kwargs, prompt_chars):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("deployment_name") or params.get("model") or params.get("model_name")
+        self._start(
+            f"llm {run_name(serialized, 'llm')}",
+            kwargs.get("run_id"),
+            kwargs.get("parent_run_id"),
+            {"llm.model": str(model), "llm.prompt_chars": prompt_chars, "llm.tokens": 0},
+        )
+
+    async def on_llm_start(self, serialized: dict[str, Any], prompts: list[str], **kwargs):
+        """Start the span of a completion call."""
+        await self._on_model_start(serialized, kwargs, sum(len(p) for p in prompts))
+
+    async def on_chat_model_start(self, serialized: dict[str, Any], messages, **kwargs):
+        """Start the span of a chat model call."""
+        chars = sum(len(str(m.content)) for batch in messages for m in batch)
+        await self._on_model_start(serialized, kwargs, chars)
+
+    async def on_llm_new_token(self, token: str, **kwargs):
+        """Count the streamed tokens and time the first one."""
+        span = self.spans.get(kwargs.get("run_id"))
+        if span is None:
+            return
+        if span.attributes["llm.tokens"] == 0:
+            span.set_attribute("llm.first_token_ms", (time.time_ns() - span.start_ns) / 1e6)
+        span.attributes["llm.tokens"] += 1
+
+    async def on_llm_end(self, response, **kwargs):
+        """End the span of an LLM call, with its token usage when reported."""
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        self._end(
+            kwargs.get("run_id"),
+            **{f"llm.usage.{key}": value for key, value in usage.items()},
+        )
+
+    async def on_llm_error(self, error, **kwargs):
+        """End the span of a failed LLM call."""
+        self._end(kwargs.get("run_id"), error)
+
+    async def on_tool_start(self, serialized: dict[str, Any], input_str: str, **kwargs):
+        """Start the span of a tool call."""
+        self._start(
+            f"tool {run_name(serialized, 'tool')}",
+            kwargs.get("run_id"),
+            kwargs.get("parent_run_id"),
+            {"tool.input_chars": len(input_str)},
+        )
+
+    async def on_tool_end(self, output, **kwargs):
+        """End the span of a tool call."""
+        self._end(kwargs.get("run_id"), **{"tool.output_chars": len(str(output))})
+
+    async def on_tool_error(self, error, **kwargs):
+        """End the span of a failed tool call."""
+        self._end(kwargs.get("run_id"), error)
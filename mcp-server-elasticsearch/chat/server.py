@@ -1,7 +1,12 @@
+import os
+import sys
+from typing import Optional
+
 from dotenv import load_dotenv
 from fastmcp.server.openapi import RouteMap, RouteType
 
 from elastic.mcp.fastmcp import ESFastMCPOpenAPI
+from elastic.mcp.fastmcp.search import MultiQuerySearch
 
 load_dotenv()
 
@@ -12,6 +17,12 @@ custom_maps = [
 ]
 mcp = ESFastMCPOpenAPI(route_maps=custom_maps)
 
+# Lexical, phrase and field-boosted variants of a question, fused with reciprocal rank fusion
+# and reranked like every other search when ELK_MCP_RERANK is on
+fusion = MultiQuerySearch.from_env(
+    mcp._client, reranker=mcp.search_reranker.reranker if mcp.search_reranker else None
+)
+
 
 @mcp.tool(
     description=(
@@ -26,14 +37,49 @@ async def search_content(body: dict) -> dict:
     Args:
         body: Search query or aggregation query as a dictionary
     """
-    uri = "resource://openapi/search-3"
-    context = mcp.get_context()
-    arguments = {"index": "content-*", "body": body}
-    resource = await mcp._resource_manager.get_resource(uri, context=context)
-    results = await resource.call_tool(arguments, context=context)
-    return results
+    # Sent through the server's client so that the search result cache is shared
+    # with the `search-3` tool
+    response = await mcp._client.post("/content-*/_search", json=body)
+    response.raise_for_status()
+    return response.json()
+
+
+@mcp.tool(
+    description=(
+        "Search content indices matching 'content-*' with several variants of a question at "
+        "once (lexical, phrase and title-boosted, plus any alternative rewrites) and return "
+        "one deduplicated, rank-fused list of the best hits. Prefer it over retrying a "
+        "search with reworded queries."
+    )
+)
+async def search_content_fused(
+    query: str,
+    alternatives: Optional[list[str]] = None,
+    size: int = 10,
+    index: str = "content-*",
+) -> dict:
+    """Search variants of a question in content indices and fuse the rankings.
+
+    Args:
+        query: The question or its rewrite as a search query
+        alternatives: Other rewrites of the question, each searched as well
+        size: Number of hits returned
+        index: Content indices searched, 'content-*' or a comma-separated list of them
+    """
+    indices = [name.strip() for name in index.split(",")]
+    if not all(name.startswith("content-") for name in indices):
+        raise ValueError("Only content indices ('content-*') can be searched")
+    return await fusion.search(
+        query, index=",".join(indices), size=size, alternatives=alternatives or ()
+    )
 
 
 if __name__ == "__main__":
-    # Initialize the client
-    mcp.run(transport="sse", host="localhost", port=8000)
+    if sys.argv[1:2] == ["compile"]:
+        # Precompile the tool registry: `python server.py compile [registry.json]`
+        path = (sys.argv[2:3] or [os.getenv("ELK_MCP_REGISTRY_SNAPSHOT")])[0]
+        counts = mcp.save_registry_snapshot(path or "registry.json")
+        print(f"Compiled {counts} into {path or 'registry.json'}")
+    else:
+        # Initialize the client
+        mcp.run(transport="sse", host="localhost", port=int(os.getenv("MCP_SERVER_PORT", "8000")))
@@ -0,0 +1,407 @@
+"""Prometheus metrics of an ELK MCP server, rendered in the text exposition format.
+
+Counters, gauges and histograms are implemented here instead of using
+``prometheus_client``, whose metrics register in a process-wide default registry: every
+server built in a process (the tests build many) would collide on metric names unless each
+passed its own ``CollectorRegistry`` through every metric. Here each ``ServerMetrics``
+owns its registry, transport and pool statistics are set by collectors at scrape time,
+and the endpoint is a Starlette route of the SSE app rather than a second HTTP server.
+The output follows the text format version 0.0.4, which any Prometheus server scrapes.
+"""
+
+import math
+import os
+import re
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Optional
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from elastic.mcp.fastmcp.transport import TRUTHY, TransportLayer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cache-speed search to a slow aggregation
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes, from an empty hit list to a page of large documents
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(9))
+
+# Elasticsearch writes `took` first in search responses, so the body needs no parsing
+TOOK = re.compile(rb'\s*\{\s*"took"\s*:\s*(\d+)')
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=False)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A metric family with a fixed set of label names.
+
+    Args:
+        name (str): Metric name, e.g. ``elk_mcp_tool_calls_total``.
+        documentation (str): Help text.
+        labelnames (sequence of str): Names of the labels of every sample.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """Suffixed name, formatted labels and value of each sample."""
+        return ()
+
+    def render(self) -> list[str]:
+        """Lines of the family in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic count per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add ``amount`` to the count of ``labels``."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Count of ``labels``."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """One sample per label set."""
+        for key, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down, or be set at scrape time."""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Subtract ``amount`` from the value of ``labels``."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the value of ``labels``."""
+        self._values[self._key(labels)] = value
+
+    def clear(self) -> None:
+        """Forget every label set, before the values are collected again."""
+        self._values.clear()
+
+
+class Histogram(Metric):
+    """Distribution of observations per label set, in cumulative buckets.
+
+    Args:
+        name (str): Metric name, e.g. ``elk_mcp_tool_duration_seconds``.
+        documentation (str): Help text.
+        labelnames (sequence of str): Names of the labels of every sample.
+        buckets (sequence of float): Upper bounds of the buckets, ascending.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+        # Per label set: count per bucket (not cumulative), sum of observations
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation of ``labels``."""
+        key = self._key(labels)
+        if key not in self._values:
+            self._values[key] = ([0] * len(self.buckets), [0.0])
+        counts, total = self._values[key]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        """Number of observations of ``labels``."""
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """Cumulative bucket counts, sum and count of each label set."""
+        names = (*self.labelnames, "le")
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=False):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Metric families rendered together, refreshed by collectors at scrape time."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric family, whose name must be unique."""
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Call ``collector`` before every rendering, to set gauges from live state."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Every metric family in the Prometheus text exposition format."""
+        for collector in self.collectors:
+            collector()
+        lines = [line for metric in self.metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+def endpoint_label(path: str) -> str:
+    """Bounded label of a request path: its ``_``-prefixed endpoint, such as ``_search``.
+
+    Index names are left out so that the number of series does not grow with indices.
+    """
+    for segment in path.strip("/").split("/"):
+        if segment.startswith("_"):
+            return segment
+    return "/" if not path.strip("/") else "other"
+
+
+class ServerMetrics:
+    """Metrics of an ELK MCP server: tool calls, Elasticsearch requests and SSE sessions.
+
+    Args:
+        prefix (str): Prefix of every metric name.
+        path (str): Path of the metrics endpoint of the server.
+    """
+
+    def __init__(self, prefix: str = "elk_mcp", path: str = "/metrics"):
+        self.path = path
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.tool_calls = register(
+            Counter(f"{prefix}_tool_calls_total", "MCP tool calls.", ("tool", "status"))
+        )
+        self.tool_duration = register(
+            Histogram(f"{prefix}_tool_duration_seconds", "MCP tool call latency.", ("tool",))
+        )
+        self.es_duration = register(
+            Histogram(
+                f"{prefix}_es_request_duration_seconds",
+                "Wall time of the requests sent to Elasticsearch, retries included.",
+                ("method", "endpoint", "status"),
+            )
+        )
+        self.es_took = register(
+            Histogram(
+                f"{prefix}_es_took_seconds",
+                "Time Elasticsearch reports spending on a request (took).",
+                ("endpoint",),
+            )
+        )
+        self.es_response_bytes = register(
+            Histogram(
+                f"{prefix}_es_response_bytes",
+                "Size of the responses of Elasticsearch.",
+                ("endpoint",),
+                buckets=SIZE_BUCKETS,
+            )
+        )
+        self.sse_sessions = register(Gauge(f"{prefix}_sse_sessions", "Open SSE sessions."))
+        self.sse_connections = register(
+            Counter(f"{prefix}_sse_connections_total", "SSE sessions opened.")
+        )
+        self.pool = register(
+            Gauge(
+                f"{prefix}_http_pool",
+                "Connections and requests of the HTTP connection pool, by state.",
+                ("state",),
+            )
+        )
+        self.transport = register(
+            Gauge(
+                f"{prefix}_transport_stat",
+                "Counters of the transport layers: search cache, batching, retries, etc.",
+                ("layer", "stat"),
+            )
+        )
+        self.nodes = register(
+            Gauge(
+                f"{prefix}_node_stat",
+                "Load and health counters per Elasticsearch node.",
+                ("node", "stat"),
+            )
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["ServerMetrics"]:
+        """Build metrics served on ``ELK_MCP_METRICS_PATH``, None if ``ELK_MCP_METRICS`` is false."""
+        if os.getenv("ELK_MCP_METRICS", "true").lower() not in TRUTHY:
+            return None
+        return cls(path=os.getenv("ELK_MCP_METRICS_PATH", "/metrics"))
+
+    def observe_tool(self, tool: str, seconds: float, error: bool) -> None:
+        """Record a tool call."""
+        self.tool_calls.inc(tool=tool, status="error" if error else "ok")
+        self.tool_duration.observe(seconds, tool=tool)
+
+    def collect_transport(self, stats: dict[str, dict]) -> None:
+        """Set the pool and layer gauges from `ELKFastMCPOpenAPI.transport_stats`."""
+        self.pool.clear()
+        self.transport.clear()
+        self.nodes.clear()
+        for layer, values in stats.items():
+            for stat, value in values.items():
+                if layer == "pool":
+                    self.pool.set(value, state=stat)
+                elif isinstance(value, (int, float)):
+                    self.transport.set(float(value), layer=layer, stat=stat)
+                elif stat == "nodes" and isinstance(value, dict):
+                    for node, node_stats in value.items():
+                        for node_stat, node_value in node_stats.items():
+                            self.nodes.set(float(node_value), node=node, stat=node_stat)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format."""
+        return self.registry.render()
+
+    async def endpoint(self, request: Request) -> Response:
+        """Starlette endpoint serving the metrics."""
+        return Response(self.render(), media_type=CONTENT_TYPE)
+
+
+class MetricsTransport(TransportLayer):
+    """Time the requests sent to Elasticsearch and record their ``took`` and size.
+
+    Placed below the cache and batching layers, it sees the requests that actually reach
+    the cluster, so that the wall time can be compared to the time Elasticsearch reports.
+
+    Args:
+        metrics (ServerMetrics): Metrics to record into.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+    """
+
+    def __init__(self, metrics: ServerMetrics, inner: Optional[httpx.AsyncBaseTransport] = None):
+        super().__init__(inner)
+        self.metrics = metrics
+        self.requests = 0
+        self.errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request and record its duration, status, size and ``took``."""
+        endpoint = endpoint_label(request.url.path)
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await self.inner.handle_async_request(request)
+            await response.aread()
+        except Exception as e:
+            self.errors += 1
+            self.metrics.es_duration.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                endpoint=endpoint,
+                status=type(e).__name__,
+            )
+            raise
+        self.metrics.es_duration.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            endpoint=endpoint,
+            status=response.status_code,
+        )
+        self.metrics.es_response_bytes.observe(len(response.content), endpoint=endpoint)
+        took = TOOK.match(response.content[:64])
+        if took is not None:
+            self.metrics.es_took.observe(int(took.group(1)) / 1000, endpoint=endpoint)
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        """Requests sent to Elasticsearch and transport errors."""
+        return {"requests": self.requests, "errors": self.errors}
+
+
+class SSESessionMiddleware:
+    """ASGI middleware counting the SSE sessions open on ``path``.
+
+    Args:
+        app (ASGIApp): Application serving the SSE endpoint.
+        path (str): Path of the SSE endpoint.
+        metrics (ServerMetrics): Metrics to record into.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, metrics: ServerMetrics):
+        self.app = app
+        self.path = path
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Count the session while the SSE response is streaming."""
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        self.metrics.sse_connections.inc()
+        self.metrics.sse_sessions.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.metrics.sse_sessions.dec()
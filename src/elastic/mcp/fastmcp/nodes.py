@@ -0,0 +1,223 @@
+import asyncio
+import contextlib
+import itertools
+import time
+from collections.abc import Sequence
+from typing import Any, Optional, Union
+
+import httpx
+
+from elastic.mcp.fastmcp.transport import TransportConfig, TransportLayer
+
+NODE_SELECTORS = ("round_robin", "least_loaded")
+
+# Statuses meaning that the node itself is unavailable, not that the request is wrong
+UNAVAILABLE_STATUSES = (502, 503, 504)
+
+
+class Node:
+    """An Elasticsearch node and its load and health bookkeeping."""
+
+    def __init__(self, url: Union[str, httpx.URL]):
+        self.url = httpx.URL(url)
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.dead_until: Optional[float] = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the node is currently in rotation."""
+        return self.dead_until is None
+
+    def stats(self) -> dict[str, Any]:
+        """Load and health counters of the node."""
+        return {
+            "alive": self.alive,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+def parse_publish_address(address: str, scheme: str) -> str:
+    """Turn a ``_nodes/http`` publish address into a node URL.
+
+    Addresses look like ``10.0.0.1:9200``, ``es-1/10.0.0.1:9200`` or ``[::1]:9200``;
+    the hostname is preferred over the IP when both are given.
+    """
+    if "/" in address:
+        hostname, _, ip_port = address.partition("/")
+        port = ip_port.rsplit(":", 1)[1]
+        address = f"{hostname}:{port}"
+    return f"{scheme}://{address}"
+
+
+class NodePool(TransportLayer):
+    """Spread requests over several nodes, ejecting and re-probing unhealthy ones.
+
+    Requests keep their path and are sent to the node picked by the selector. A node
+    failing with a connection error or an unavailable status is taken out of rotation
+    for an exponentially growing period, after which a background task probes it and
+    puts it back once it answers. The same task can sniff the cluster to discover nodes.
+
+    Args:
+        urls (sequence of str): Seed node URLs.
+        config (TransportConfig): Selector, sniffing and health check settings.
+        sniff_path (str, optional): Endpoint listing the cluster nodes, e.g. ``/_nodes/http``.
+        health_check_path (str): Endpoint probed on dead nodes.
+        headers (dict, optional): Headers of the sniffing and probing requests, e.g. auth.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        config: TransportConfig,
+        sniff_path: Optional[str] = None,
+        health_check_path: str = "/",
+        headers: Optional[dict[str, str]] = None,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(inner)
+        if not urls:
+            raise ValueError("NodePool needs at least one node URL")
+        if config.node_selector not in NODE_SELECTORS:
+            raise ValueError(f"Unknown node selector {config.node_selector!r}")
+        self.config = config
+        self.nodes = [Node(url) for url in urls]
+        self.sniff_path = sniff_path
+        self.health_check_path = health_check_path
+        self.headers = headers or {}
+        self._counter = itertools.count()
+        self._maintenance: Optional[asyncio.Task] = None
+        self._last_sniff = 0.0
+
+    def select(self) -> Node:
+        """Pick the node for the next request."""
+        alive = [node for node in self.nodes if node.alive]
+        if not alive:
+            # Everything is down: try the node that should come back first
+            return min(self.nodes, key=lambda node: node.dead_until or 0.0)
+        if self.config.node_selector == "least_loaded":
+            offset = next(self._counter)
+            rotated = alive[offset % len(alive) :] + alive[: offset % len(alive)]
+            return min(rotated, key=lambda node: node.in_flight)
+        return alive[next(self._counter) % len(alive)]
+
+    def mark_dead(self, node: Node) -> None:
+        """Take ``node`` out of rotation with exponential backoff."""
+        node.failures += 1
+        backoff = min(
+            self.config.dead_backoff * 2 ** (node.failures - 1), self.config.max_dead_backoff
+        )
+        node.dead_until = time.monotonic() + backoff
+
+    def mark_alive(self, node: Node) -> None:
+        """Put ``node`` back in rotation."""
+        node.failures = 0
+        node.dead_until = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send ``request`` to the selected node."""
+        self._ensure_maintenance()
+        node = self.select()
+        request.url = request.url.copy_with(
+            scheme=node.url.scheme, host=node.url.host, port=node.url.port
+        )
+        request.headers["Host"] = node.url.netloc.decode("ascii")
+
+        node.requests += 1
+        node.in_flight += 1
+        try:
+            response = await self.inner.handle_async_request(request)
+        except httpx.TransportError:
+            self.mark_dead(node)
+            raise
+        finally:
+            node.in_flight -= 1
+        if response.status_code in UNAVAILABLE_STATUSES:
+            self.mark_dead(node)
+        elif not node.alive:
+            self.mark_alive(node)
+        return response
+
+    def _ensure_maintenance(self) -> None:
+        if self._maintenance is not None and not self._maintenance.done():
+            return
+        if self.sniff_path is None and len(self.nodes) <= 1:
+            return
+        self._maintenance = asyncio.get_running_loop().create_task(self._maintain())
+
+    async def _maintain(self) -> None:
+        while True:
+            if self.sniff_path is not None and (
+                time.monotonic() - self._last_sniff >= self.config.sniff_interval
+            ):
+                with contextlib.suppress(httpx.HTTPError, ValueError, KeyError, TypeError):
+                    await self.sniff()
+            await self.probe_dead_nodes()
+            await asyncio.sleep(self.config.health_check_interval)
+
+    async def _get(self, node: Node, path: str) -> httpx.Response:
+        request = httpx.Request(
+            "GET",
+            node.url.join(path),
+            headers=self.headers,
+            extensions={"timeout": self.config.timeout.as_dict()},
+        )
+        response = await self.inner.handle_async_request(request)
+        response.request = request
+        await response.aread()
+        return response
+
+    async def probe_dead_nodes(self) -> None:
+        """Probe the dead nodes whose backoff expired and revive those that answer."""
+        now = time.monotonic()
+        for node in [n for n in self.nodes if not n.alive and n.dead_until <= now]:
+            try:
+                response = await self._get(node, self.health_check_path)
+            except httpx.TransportError:
+                self.mark_dead(node)
+                continue
+            if response.status_code in UNAVAILABLE_STATUSES:
+                self.mark_dead(node)
+            else:
+                self.mark_alive(node)
+
+    async def sniff(self) -> list[str]:
+        """Replace the node list with the HTTP nodes reported by the cluster.
+
+        Known nodes keep their counters. Returns the discovered URLs.
+        """
+        self._last_sniff = time.monotonic()
+        node = self.select()
+        response = await self._get(node, self.sniff_path)
+        response.raise_for_status()
+        addresses = [
+            info["http"]["publish_address"]
+            for info in response.json()["nodes"].values()
+            if "http" in info
+        ]
+        urls = [parse_publish_address(address, node.url.scheme) for address in addresses]
+        if urls:
+            known = {str(n.url): n for n in self.nodes}
+            self.nodes = [known.get(str(httpx.URL(url)), Node(url)) for url in urls]
+        return urls
+
+    async def aclose(self) -> None:
+        """Stop the maintenance task and close the wrapped transport."""
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._maintenance
+        await super().aclose()
+
+    def stats(self) -> dict[str, Any]:
+        """Per-node load and health counters."""
+        return {
+            "selector": self.config.node_selector,
+            "alive": sum(node.alive for node in self.nodes),
+            "nodes": {str(node.url): node.stats() for node in self.nodes},
+        }
@@ -0,0 +1,167 @@
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Component sections that are only reachable through "$ref"
+REFERENCEABLE_COMPONENTS = (
+    "schemas",
+    "responses",
+    "parameters",
+    "examples",
+    "requestBodies",
+    "headers",
+    "links",
+    "callbacks",
+)
+
+
+@dataclass(frozen=True)
+class RouteAllowlist:
+    """Operations to keep from an OpenAPI spec, everything else is pruned.
+
+    An operation is kept if it matches any of the criteria.
+
+    Args:
+        operation_ids (tuple of str): Operation ids to keep, e.g. ``("search-3",)``.
+        paths (tuple of str): Glob patterns matched against paths, e.g. ``("*/_mapping*",)``.
+        tags (tuple of str): Tags whose operations are kept.
+
+    """
+
+    operation_ids: tuple[str, ...] = ()
+    paths: tuple[str, ...] = ()
+    tags: tuple[str, ...] = ()
+
+    @classmethod
+    def from_env(cls) -> Optional["RouteAllowlist"]:
+        """Build an allowlist from comma-separated ``ELK_MCP_ALLOWED_*`` variables.
+
+        Returns None when none of them is set, i.e. nothing is pruned.
+        """
+
+        def _split(name: str) -> tuple[str, ...]:
+            return tuple(v.strip() for v in os.getenv(name, "").split(",") if v.strip())
+
+        allowlist = cls(
+            operation_ids=_split("ELK_MCP_ALLOWED_OPERATIONS"),
+            paths=_split("ELK_MCP_ALLOWED_PATHS"),
+            tags=_split("ELK_MCP_ALLOWED_TAGS"),
+        )
+        return allowlist if allowlist.operation_ids or allowlist.paths or allowlist.tags else None
+
+    def allows(self, path: str, operation: dict[str, Any]) -> bool:
+        """Whether the operation on ``path`` should be kept."""
+        if operation.get("operationId") in self.operation_ids:
+            return True
+        if any(fnmatchcase(path, pattern) for pattern in self.paths):
+            return True
+        return bool(set(operation.get("tags") or ()) & set(self.tags))
+
+
+@dataclass(frozen=True)
+class PruneReport:
+    """Summary of what `prune_openapi_spec` removed."""
+
+    routes_kept: int
+    routes_removed: int
+    schemas_removed: int
+    components_removed: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_removed(self) -> int:
+        """Size reduction of the serialized spec."""
+        return self.bytes_before - self.bytes_after
+
+
+def _iter_refs(node: Any) -> Iterator[str]:
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            ref = item.get("$ref")
+            if isinstance(ref, str):
+                yield ref
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+
+
+def _referenced_components(roots: Any, components: dict[str, Any]) -> set[tuple[str, str]]:
+    """Transitively collect the ``(section, name)`` components referenced from ``roots``."""
+    seen: set[tuple[str, str]] = set()
+    pending = [roots]
+    while pending:
+        for ref in _iter_refs(pending.pop()):
+            prefix, _, name = ref.rpartition("/")
+            section = prefix.removeprefix("#/components/")
+            if not prefix.startswith("#/components/") or "/" in section:
+                continue
+            key = (section, name.replace("~1", "/").replace("~0", "~"))
+            if key in seen:
+                continue
+            seen.add(key)
+            target = components.get(key[0], {}).get(key[1])
+            if target is not None:
+                pending.append(target)
+    return seen
+
+
+def prune_openapi_spec(spec: dict, allowlist: RouteAllowlist) -> tuple[dict, PruneReport]:
+    """Drop the operations not in ``allowlist`` and the components they alone used.
+
+    The input spec is left untouched.
+
+    Args:
+        spec (dict): OpenAPI specification.
+        allowlist (RouteAllowlist): Operations to keep.
+
+    Returns:
+        The pruned spec and a report of what was removed.
+    """
+    kept_paths: dict[str, Any] = {}
+    routes_kept = routes_removed = 0
+    for path, item in (spec.get("paths") or {}).items():
+        operations = {m: op for m, op in item.items() if m in HTTP_METHODS}
+        allowed = {m: op for m, op in operations.items() if allowlist.allows(path, op)}
+        routes_kept += len(allowed)
+        routes_removed += len(operations) - len(allowed)
+        if allowed:
+            shared = {k: v for k, v in item.items() if k not in HTTP_METHODS}
+            kept_paths[path] = {**shared, **allowed}
+
+    components = spec.get("components") or {}
+    referenced = _referenced_components(kept_paths, components)
+    pruned_components: dict[str, Any] = {}
+    components_removed = schemas_removed = 0
+    for section, entries in components.items():
+        if section not in REFERENCEABLE_COMPONENTS or not isinstance(entries, dict):
+            pruned_components[section] = entries
+            continue
+        kept = {name: value for name, value in entries.items() if (section, name) in referenced}
+        removed = len(entries) - len(kept)
+        components_removed += removed
+        if section == "schemas":
+            schemas_removed = removed
+        if kept:
+            pruned_components[section] = kept
+
+    pruned = {**spec, "paths": kept_paths}
+    if "components" in spec:
+        pruned["components"] = pruned_components
+
+    report = PruneReport(
+        routes_kept=routes_kept,
+        routes_removed=routes_removed,
+        schemas_removed=schemas_removed,
+        components_removed=components_removed,
+        bytes_before=len(json.dumps(spec, default=str)),
+        bytes_after=len(json.dumps(pruned, default=str)),
+    )
+    return pruned, report
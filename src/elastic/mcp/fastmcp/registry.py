@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from fastmcp.server.openapi import (
+    FastMCPOpenAPI,
+    OpenAPIResource,
+    OpenAPIResourceTemplate,
+    OpenAPITool,
+    RouteMap,
+    _openapi_passthrough,
+)
+from fastmcp.utilities.func_metadata import func_metadata
+from fastmcp.utilities.openapi import HTTPRoute
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Minimal spec handed to FastMCPOpenAPI when components come from a snapshot
+EMPTY_OPENAPI_SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Registry snapshot", "version": "1.0.0"},
+    "paths": {},
+}
+
+
+def registry_fingerprint(**inputs: Any) -> str:
+    """Fingerprint the inputs that shape the registry built from a spec.
+
+    Route maps are reduced to their methods, pattern and route type so that equal
+    configurations give equal fingerprints across processes.
+    """
+
+    def _normalize(value: Any) -> Any:
+        if isinstance(value, RouteMap):
+            pattern = getattr(value.pattern, "pattern", value.pattern)
+            return [sorted(value.methods), pattern, value.route_type.name]
+        if isinstance(value, (list, tuple)):
+            return [_normalize(v) for v in value]
+        if isinstance(value, dict):
+            return {str(k): _normalize(v) for k, v in sorted(value.items())}
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return repr(value)
+
+    payload = json.dumps(_normalize(inputs), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dump_registry(server: FastMCPOpenAPI) -> dict[str, list[dict[str, Any]]]:
+    """Serialize the OpenAPI tools, resources and templates registered on ``server``.
+
+    Custom components added with decorators are left out, they are registered again
+    when the server module is imported.
+    """
+    tools = [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.parameters,
+            "tags": sorted(tool.tags),
+            "route": tool._route.model_dump(mode="json", by_alias=True),
+        }
+        for tool in server._tool_manager._tools.values()
+        if isinstance(tool, OpenAPITool)
+    ]
+    resources = [
+        {
+            "uri": str(resource.uri),
+            "name": resource.name,
+            "description": resource.description,
+            "mime_type": resource.mime_type,
+            "tags": sorted(resource.tags),
+            "route": resource._route.model_dump(mode="json", by_alias=True),
+        }
+        for resource in server._resource_manager._resources.values()
+        if isinstance(resource, OpenAPIResource)
+    ]
+    templates = [
+        {
+            "uri_template": template.uri_template,
+            "name": template.name,
+            "description": template.description,
+            "parameters": template.parameters,
+            "tags": sorted(template.tags),
+            "route": template._route.model_dump(mode="json", by_alias=True),
+        }
+        for template in server._resource_manager._templates.values()
+        if isinstance(template, OpenAPIResourceTemplate)
+    ]
+    return {"tools": tools, "resources": resources, "templates": templates}
+
+
+def register_registry(server: FastMCPOpenAPI, registry: dict[str, list[dict[str, Any]]]) -> None:
+    """Register the components of a serialized registry on ``server``.
+
+    This mirrors what ``FastMCPOpenAPI.__init__`` does for each route, without parsing
+    the OpenAPI spec or rendering descriptions and schemas again.
+    """
+    client, timeout = server._client, server._timeout
+    fn_metadata = func_metadata(_openapi_passthrough)
+
+    for entry in registry["tools"]:
+        server._tool_manager._tools[entry["name"]] = OpenAPITool(
+            client=client,
+            route=HTTPRoute.model_validate(entry["route"]),
+            name=entry["name"],
+            description=entry["description"],
+            parameters=entry["parameters"],
+            fn_metadata=fn_metadata,
+            is_async=True,
+            tags=set(entry["tags"]),
+            timeout=timeout,
+        )
+    for entry in registry["resources"]:
+        server._resource_manager._resources[entry["uri"]] = OpenAPIResource(
+            client=client,
+            route=HTTPRoute.model_validate(entry["route"]),
+            uri=entry["uri"],
+            name=entry["name"],
+            description=entry["description"],
+            mime_type=entry["mime_type"],
+            tags=set(entry["tags"]),
+            timeout=timeout,
+        )
+    for entry in registry["templates"]:
+        server._resource_manager._templates[entry["uri_template"]] = OpenAPIResourceTemplate(
+            client=client,
+            route=HTTPRoute.model_validate(entry["route"]),
+            uri_template=entry["uri_template"],
+            name=entry["name"],
+            description=entry["description"],
+            parameters=entry["parameters"],
+            tags=set(entry["tags"]),
+            timeout=timeout,
+        )
+
+
+def save_registry_snapshot(
+    server: FastMCPOpenAPI, path: Union[str, Path], fingerprint: str
+) -> dict[str, int]:
+    """Write the registry of ``server`` to ``path``.
+
+    Returns:
+        The number of tools, resources and templates written.
+    """
+    registry = dump_registry(server)
+    snapshot = {"version": SNAPSHOT_FORMAT_VERSION, "fingerprint": fingerprint, **registry}
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return {kind: len(entries) for kind, entries in registry.items()}
+
+
+def load_registry_snapshot(
+    path: Union[str, Path], fingerprint: Optional[str] = None
+) -> Optional[dict[str, Any]]:
+    """Read a registry snapshot, or None if it is missing, outdated or stale.
+
+    Args:
+        path (str or Path): Location of the snapshot.
+        fingerprint (str, optional): Expected fingerprint of the registry inputs.
+    """
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if fingerprint is not None and snapshot.get("fingerprint") != fingerprint:
+        return None
+    return snapshot
@@ -0,0 +1,15 @@
+from .batching import MSearchBatcher
+from .cache import SearchCache
+from .fusion import MultiQuerySearch, reciprocal_rank_fusion
+from .rerank import Reranker, SearchReranker
+from .singleflight import SingleFlight
+
+__all__ = [
+    "MSearchBatcher",
+    "MultiQuerySearch",
+    "Reranker",
+    "SearchCache",
+    "SearchReranker",
+    "SingleFlight",
+    "reciprocal_rank_fusion",
+]
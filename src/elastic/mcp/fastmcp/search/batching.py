@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+
+from elastic.mcp.fastmcp.search.keys import index_pattern, matches, strip_hop_headers
+from elastic.mcp.fastmcp.transport import TRUTHY, TransportLayer
+
+# URL parameters of `_search` that `_msearch` accepts in the header of each search
+HEADER_PARAMS = (
+    "routing",
+    "preference",
+    "search_type",
+    "request_cache",
+    "allow_no_indices",
+    "expand_wildcards",
+    "ignore_unavailable",
+)
+
+# URL parameters of `_search` that have an equivalent in the search body
+BODY_PARAMS = ("size", "from")
+
+
+def to_msearch_item(request: httpx.Request) -> Optional[tuple[dict, dict]]:
+    """Translate a ``_search`` request into an ``_msearch`` header and body.
+
+    The ``q`` parameter becomes a ``query_string`` query, as the URL search does, and
+    ``size``/``from`` move to the body. Returns None when the request uses parameters
+    that cannot be expressed in ``_msearch``.
+    """
+    try:
+        body = json.loads(request.content) if request.content else {}
+    except ValueError:
+        return None
+    if not isinstance(body, dict):
+        return None
+    header: dict[str, Any] = {"index": index_pattern(request.url.path)}
+    for name, value in request.url.params.multi_items():
+        if name in HEADER_PARAMS and name not in header:
+            header[name] = value
+        elif name in BODY_PARAMS and name not in body and value.isdigit():
+            body[name] = int(value)
+        elif name == "q" and "query" not in body:
+            body["query"] = {"query_string": {"query": value}}
+        else:
+            return None
+    return header, body
+
+
+@dataclass
+class PendingSearch:
+    """A search waiting in a batch for its response."""
+
+    request: httpx.Request
+    header: dict
+    body: dict
+    future: asyncio.Future = field(repr=False)
+
+
+class MSearchBatcher(TransportLayer):
+    """Merge searches arriving within a short window into a single ``_msearch``.
+
+    The first search of a batch opens a window of ``max_wait`` seconds; searches
+    arriving in the meantime join it, and the batch is sent as soon as the window
+    closes or ``max_batch_size`` searches are waiting. Every caller then receives its
+    own item of the ``_msearch`` response, with its own status. A batch of one search
+    is sent as is, and searches that ``_msearch`` cannot express are never delayed.
+
+    Args:
+        max_batch_size (int): Maximum number of searches per ``_msearch``.
+        max_wait (float): Seconds the first search of a batch waits for others.
+        paths (sequence of str): Globs of the endpoints that are batched.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 16,
+        max_wait: float = 0.005,
+        paths: Sequence[str] = ("*/_search",),
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(inner)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.paths = tuple(paths)
+        # Pending batches by target, searches with different credentials never mix
+        self._batches: dict[tuple, list[PendingSearch]] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._sending: set[asyncio.Task] = set()
+        self.searches = 0
+        self.unbatchable = 0
+        self.batches = 0
+        self.msearches = 0
+        self.batch_sizes: Counter[int] = Counter()
+
+    @classmethod
+    def from_env(cls) -> Optional["MSearchBatcher"]:
+        """Build a batcher from ``ELK_MCP_SEARCH_BATCH*`` environment variables.
+
+        Returns None unless ``ELK_MCP_SEARCH_BATCH`` enables batching.
+        """
+        if os.getenv("ELK_MCP_SEARCH_BATCH", "false").lower() not in TRUTHY:
+            return None
+        kwargs: dict[str, Any] = {}
+        if os.getenv("ELK_MCP_SEARCH_BATCH_MAX_SIZE"):
+            kwargs["max_batch_size"] = int(os.environ["ELK_MCP_SEARCH_BATCH_MAX_SIZE"])
+        if os.getenv("ELK_MCP_SEARCH_BATCH_MAX_WAIT_MS"):
+            kwargs["max_wait"] = float(os.environ["ELK_MCP_SEARCH_BATCH_MAX_WAIT_MS"]) / 1000
+        return cls(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Queue a search in the current batch, or forward any other request."""
+        if not matches(request, self.paths):
+            return await self.inner.handle_async_request(request)
+        await request.aread()
+        item = to_msearch_item(request)
+        if item is None:
+            self.unbatchable += 1
+            return await self.inner.handle_async_request(request)
+
+        self.searches += 1
+        loop = asyncio.get_running_loop()
+        key = (request.url.scheme, request.url.netloc, request.headers.get("Authorization"))
+        pending = PendingSearch(request, *item, future=loop.create_future())
+        batch = self._batches.setdefault(key, [])
+        batch.append(pending)
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await pending.future
+
+    def _flush(self, key: tuple) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(key, [])
+        # Callers cancelled while waiting need no response
+        batch = [pending for pending in batch if not pending.future.done()]
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[PendingSearch]) -> None:
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+        try:
+            if len(batch) == 1:
+                response = await self.inner.handle_async_request(batch[0].request)
+                await response.aread()
+                _resolve(batch[0].future, response)
+                return
+            responses = await self._msearch(batch)
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending, response in zip(batch, responses, strict=True):
+            _resolve(pending.future, response)
+
+    async def _msearch(self, batch: list[PendingSearch]) -> list[httpx.Response]:
+        self.msearches += 1
+        first = batch[0].request
+        lines = []
+        for pending in batch:
+            lines.append(json.dumps(pending.header))
+            lines.append(json.dumps(pending.body))
+        headers = {k: v for k, v in first.headers.items() if k.lower() == "authorization"}
+        headers["Content-Type"] = "application/x-ndjson"
+        request = httpx.Request(
+            "POST",
+            first.url.copy_with(path="/_msearch", query=None),
+            headers=headers,
+            content=("\n".join(lines) + "\n").encode("utf-8"),
+            extensions={"timeout": first.extensions.get("timeout", {})},
+        )
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        if response.status_code != httpx.codes.OK:
+            # The whole batch failed, every caller gets the same error
+            return [_copy(response, pending.request) for pending in batch]
+        try:
+            items = response.json()["responses"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise httpx.DecodingError(f"Malformed _msearch response: {e}", request=request) from e
+        if not isinstance(items, list) or len(items) != len(batch):
+            # Callers left without a response would wait forever
+            count = len(items) if isinstance(items, list) else "no list of"
+            raise httpx.DecodingError(
+                f"_msearch returned {count} responses for {len(batch)} searches", request=request
+            )
+        responses = []
+        for pending, item in zip(batch, items, strict=True):
+            status = item.pop("status", httpx.codes.OK)
+            responses.append(httpx.Response(status, json=item, request=pending.request))
+        return responses
+
+    def stats(self) -> dict[str, Any]:
+        """Search, batch and ``_msearch`` counters and the distribution of batch sizes."""
+        return {
+            "searches": self.searches,
+            "unbatchable": self.unbatchable,
+            "batches": self.batches,
+            "msearches": self.msearches,
+            "mean_batch_size": self.searches / self.batches if self.batches else 0.0,
+            "max_batch_size": max(self.batch_sizes, default=0),
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+def _copy(response: httpx.Response, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        response.status_code,
+        headers=strip_hop_headers(response.headers),
+        content=response.content,
+        request=request,
+    )
+
+
+def _resolve(future: asyncio.Future, response: httpx.Response) -> None:
+    if not future.done():
+        future.set_result(response)
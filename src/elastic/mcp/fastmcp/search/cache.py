@@ -0,0 +1,229 @@
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+from elastic.mcp.fastmcp.search.keys import (
+    canonical_body,
+    index_pattern,
+    matches,
+    request_key,
+    strip_hop_headers,
+)
+from elastic.mcp.fastmcp.transport import TRUTHY, TransportLayer
+
+
+@dataclass
+class CachedResponse:
+    """A successful search response kept in the cache."""
+
+    status_code: int
+    headers: list[tuple[str, str]]
+    content: bytes
+    expires_at: float
+    generation: Optional[str] = None
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        """Rebuild an ``httpx.Response`` for ``request``."""
+        return httpx.Response(
+            self.status_code, headers=self.headers, content=self.content, request=request
+        )
+
+
+class SearchCache(TransportLayer):
+    """LRU and TTL cache of search responses, shared by all the sessions of a server.
+
+    Responses are keyed on the credentials, method, path (hence index pattern), query
+    string and canonicalized body, so equal queries written differently share an entry. Memory is
+    bounded both in entries and in bytes, least recently used entries going first.
+
+    With ``invalidate_on_change``, every entry also records a generation of its index
+    pattern made of the document counts and refresh totals from ``_stats``; an entry
+    is dropped as soon as a refresh or a document change moves the generation. Index
+    stats are fetched at most once per ``check_interval`` per index pattern.
+
+    Args:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of the cached response bodies.
+        ttl (float): Seconds a response is served from the cache.
+        paths (sequence of str): Globs of the cacheable endpoints.
+        invalidate_on_change (bool): Drop entries when their indices change.
+        check_interval (float): Seconds between two generation checks of an index pattern.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 60.0,
+        paths: Sequence[str] = ("*/_search", "*/_count"),
+        invalidate_on_change: bool = False,
+        check_interval: float = 1.0,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(inner)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.paths = tuple(paths)
+        self.invalidate_on_change = invalidate_on_change
+        self.check_interval = check_interval
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._generations: dict[str, tuple[float, Optional[str]]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchCache"]:
+        """Build a cache from ``ELK_MCP_SEARCH_CACHE*`` environment variables.
+
+        Returns None unless ``ELK_MCP_SEARCH_CACHE`` enables the cache.
+        """
+        if os.getenv("ELK_MCP_SEARCH_CACHE", "false").lower() not in TRUTHY:
+            return None
+        kwargs: dict[str, Any] = {}
+        if os.getenv("ELK_MCP_SEARCH_CACHE_MAX_ENTRIES"):
+            kwargs["max_entries"] = int(os.environ["ELK_MCP_SEARCH_CACHE_MAX_ENTRIES"])
+        if os.getenv("ELK_MCP_SEARCH_CACHE_MAX_BYTES"):
+            kwargs["max_bytes"] = int(os.environ["ELK_MCP_SEARCH_CACHE_MAX_BYTES"])
+        if os.getenv("ELK_MCP_SEARCH_CACHE_TTL"):
+            kwargs["ttl"] = float(os.environ["ELK_MCP_SEARCH_CACHE_TTL"])
+        if os.getenv("ELK_MCP_SEARCH_CACHE_PATHS"):
+            raw = os.environ["ELK_MCP_SEARCH_CACHE_PATHS"]
+            kwargs["paths"] = tuple(p.strip() for p in raw.split(",") if p.strip())
+        if os.getenv("ELK_MCP_SEARCH_CACHE_CHECK_INTERVAL"):
+            kwargs["check_interval"] = float(os.environ["ELK_MCP_SEARCH_CACHE_CHECK_INTERVAL"])
+        invalidate = os.getenv("ELK_MCP_SEARCH_CACHE_INVALIDATE", "false").lower()
+        return cls(invalidate_on_change=invalidate in TRUTHY, **kwargs)
+
+    def is_cacheable(self, request: httpx.Request) -> bool:
+        """Whether the response to ``request`` can be cached."""
+        if "no-cache" in request.headers.get("Cache-Control", ""):
+            return False
+        return matches(request, self.paths)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Serve ``request`` from the cache, or forward it and cache a successful response."""
+        if not self.is_cacheable(request):
+            return await self.inner.handle_async_request(request)
+
+        await request.aread()
+        key = request_key(request)
+        generation = None
+        if self.invalidate_on_change:
+            generation = await self.generation(request)
+
+        entry = self._lookup(key, generation)
+        if entry is not None:
+            self.hits += 1
+            return entry.to_response(request)
+        self.misses += 1
+
+        response = await self.inner.handle_async_request(request)
+        if response.status_code != httpx.codes.OK:
+            return response
+        await response.aread()
+        entry = CachedResponse(
+            status_code=response.status_code,
+            headers=strip_hop_headers(response.headers),
+            content=response.content,
+            expires_at=time.monotonic() + self.ttl,
+            generation=generation,
+        )
+        # Without a known generation the entry could never be validated
+        if not self.invalidate_on_change or generation is not None:
+            self._store(key, entry)
+        return entry.to_response(request)
+
+    def _lookup(self, key: tuple, generation: Optional[str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self.expirations += 1
+            self._remove(key)
+            return None
+        if self.invalidate_on_change and entry.generation != generation:
+            self.invalidations += 1
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: tuple, entry: CachedResponse) -> None:
+        size = len(entry.content)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= len(entry.content)
+
+    async def generation(self, request: httpx.Request) -> Optional[str]:
+        """Current generation of the indices searched by ``request``.
+
+        Returns None if their stats cannot be read.
+        """
+        index = index_pattern(request.url.path)
+        now = time.monotonic()
+        checked = self._generations.get(index)
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        path = "/_stats/docs,refresh" if index == "_all" else f"/{index}/_stats/docs,refresh"
+        stats_request = httpx.Request(
+            "GET",
+            request.url.copy_with(
+                path=path, query=b"filter_path=_all.primaries.docs,_all.primaries.refresh"
+            ),
+            headers={k: v for k, v in request.headers.items() if k.lower() == "authorization"},
+            extensions={"timeout": request.extensions.get("timeout", {})},
+        )
+        try:
+            response = await self.inner.handle_async_request(stats_request)
+            await response.aread()
+            if response.status_code != httpx.codes.OK:
+                generation = None
+            else:
+                generation = canonical_body(response.content)
+        except httpx.TransportError:
+            generation = None
+        self._generations[index] = (now, generation)
+        return generation
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self._entries.clear()
+        self._generations.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Size and hit, miss, eviction and invalidation counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
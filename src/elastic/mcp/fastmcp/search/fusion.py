@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+import httpx
+
+from elastic.mcp.fastmcp.search.rerank import Reranker
+from elastic.mcp.fastmcp.transport import TRUTHY
+
+# Rank constant of reciprocal rank fusion, damping the weight of the top ranks
+RANK_CONSTANT = 60
+
+VARIANTS = ("lexical", "phrase", "boosted")
+
+# Fields weighted up by the field-boosted variant, every other field still matches
+BOOSTED_FIELDS = ("title^3", "name^3", "summary^2", "key^2", "*")
+
+
+def query_variants(
+    query: str,
+    variants: Sequence[str] = VARIANTS,
+    boosted_fields: Sequence[str] = BOOSTED_FIELDS,
+    alternatives: Sequence[str] = (),
+) -> dict[str, dict]:
+    """Queries of the variants of ``query``, by variant name.
+
+    ``lexical`` matches any of the terms, ``phrase`` the terms close together in order and
+    ``boosted`` the terms with ``boosted_fields`` weighted up. Each of ``alternatives``,
+    rewrites of the question, adds a lexical variant of its own. Every query is lenient,
+    so that text never fails on numeric or date fields.
+    """
+    terms = " ".join(query.replace('"', " ").split())
+    builders = {
+        "lexical": lambda: {
+            "simple_query_string": {"query": terms, "default_operator": "or", "lenient": True}
+        },
+        "phrase": lambda: {"simple_query_string": {"query": f'"{terms}"~3', "lenient": True}},
+        "boosted": lambda: {
+            "multi_match": {
+                "query": terms,
+                "fields": list(boosted_fields),
+                "type": "best_fields",
+                "lenient": True,
+            }
+        },
+    }
+    _check_variants(variants)
+    queries = {name: builders[name]() for name in variants}
+    for i, alternative in enumerate(alternatives, 1):
+        queries[f"alternative_{i}"] = {
+            "simple_query_string": {
+                "query": " ".join(alternative.replace('"', " ").split()),
+                "default_operator": "or",
+                "lenient": True,
+            }
+        }
+    return queries
+
+
+def reciprocal_rank_fusion(
+    rankings: Mapping[str, Sequence[dict]], size: int = 10, rank_constant: int = RANK_CONSTANT
+) -> list[dict]:
+    """Fuse ranked hit lists into one deduplicated top ``size``.
+
+    A hit scores ``1 / (rank_constant + rank)`` in each ranking it appears in, ranks
+    starting at 1, so hits found by several variants rise above hits ranked high by a
+    single one. Hits are identified by index and id; the first copy seen is kept, with
+    the fused score as ``_score`` and its rank per variant under ``_ranks``. Ties keep
+    the order in which hits were first seen.
+    """
+    fused: dict[tuple, dict] = {}
+    for name, hits in rankings.items():
+        for rank, hit in enumerate(hits, 1):
+            key = (hit.get("_index"), hit.get("_id"))
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**hit, "_score": 0.0, "_ranks": {}}
+            entry["_score"] += 1.0 / (rank_constant + rank)
+            entry["_ranks"][name] = rank
+    ranked = sorted(fused.values(), key=lambda hit: hit["_score"], reverse=True)
+    return ranked[:size]
+
+
+class MultiQuerySearch:
+    """Search several variants of a query in one round-trip and fuse their rankings.
+
+    The variants are sent as one ``_msearch``, or as concurrent ``_search`` requests so
+    that the cache, batching and single-flight layers of the client see each of them.
+    Their rankings are fused with reciprocal rank fusion into a single response shaped
+    like a ``_search`` response, with the outcome of each variant under ``fusion``.
+
+    Args:
+        client (httpx.AsyncClient): Client of the Elasticsearch server.
+        variants (sequence of str): Variants searched, among ``lexical``, ``phrase`` and
+            ``boosted``.
+        boosted_fields (sequence of str): Fields and boosts of the ``boosted`` variant.
+        rank_constant (int): Rank constant of the fusion.
+        window (int): Hits fetched per variant, beyond the hits returned.
+        use_msearch (bool): Send all variants in one ``_msearch``.
+        reranker (Reranker, optional): Reranking of the fused ``window`` before the best
+            hits are returned, the fused order counting as the search rank.
+
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        variants: Sequence[str] = VARIANTS,
+        boosted_fields: Sequence[str] = BOOSTED_FIELDS,
+        rank_constant: int = RANK_CONSTANT,
+        window: int = 50,
+        use_msearch: bool = True,
+        reranker: Optional[Reranker] = None,
+    ):
+        _check_variants(variants)
+        self.client = client
+        self.variants = tuple(variants)
+        self.boosted_fields = tuple(boosted_fields)
+        self.rank_constant = rank_constant
+        self.window = window
+        self.use_msearch = use_msearch
+        self.reranker = reranker
+        self.searches = 0
+        self.variant_errors = 0
+
+    @classmethod
+    def from_env(
+        cls, client: httpx.AsyncClient, reranker: Optional[Reranker] = None
+    ) -> "MultiQuerySearch":
+        """Build a multi-query search from ``ELK_MCP_FUSION_*`` environment variables."""
+        kwargs: dict[str, Any] = {"reranker": reranker}
+        if os.getenv("ELK_MCP_FUSION_VARIANTS"):
+            kwargs["variants"] = _split(os.environ["ELK_MCP_FUSION_VARIANTS"])
+        if os.getenv("ELK_MCP_FUSION_BOOSTED_FIELDS"):
+            kwargs["boosted_fields"] = _split(os.environ["ELK_MCP_FUSION_BOOSTED_FIELDS"])
+        if os.getenv("ELK_MCP_FUSION_RANK_CONSTANT"):
+            kwargs["rank_constant"] = int(os.environ["ELK_MCP_FUSION_RANK_CONSTANT"])
+        if os.getenv("ELK_MCP_FUSION_WINDOW"):
+            kwargs["window"] = int(os.environ["ELK_MCP_FUSION_WINDOW"])
+        kwargs["use_msearch"] = os.getenv("ELK_MCP_FUSION_MSEARCH", "true").lower() in TRUTHY
+        return cls(client, **kwargs)
+
+    async def search(
+        self,
+        query: str,
+        index: str = "content-*",
+        size: int = 10,
+        alternatives: Sequence[str] = (),
+        filters: Optional[list[dict]] = None,
+    ) -> dict[str, Any]:
+        """Search the variants of ``query`` in ``index`` and return the fused top ``size``.
+
+        Args:
+            query: Text of the question or of its rewrite.
+            index: Index pattern searched.
+            size: Number of fused hits returned.
+            alternatives: Other rewrites of the question, each searched as a variant.
+            filters: Filter clauses applied to every variant.
+
+        Raises:
+            httpx.HTTPStatusError: When the ``_msearch`` or every variant fails.
+            httpx.HTTPError: When the request of every variant fails, without ``_msearch``.
+
+        """
+        self.searches += 1
+        queries = query_variants(query, self.variants, self.boosted_fields, alternatives)
+        bodies = {
+            name: {
+                "query": {"bool": {"must": [clause], "filter": filters}} if filters else clause,
+                "size": max(size, self.window),
+            }
+            for name, clause in queries.items()
+        }
+        if self.use_msearch:
+            responses = await self._msearch(index, bodies)
+        else:
+            responses = await self._search_concurrently(index, bodies)
+
+        rankings, report = {}, {}
+        took, shards, total = 0, 0, 0
+        for name, (status, body) in responses.items():
+            if status != httpx.codes.OK:
+                self.variant_errors += 1
+                report[name] = {"status": status, "error": body.get("error")}
+                continue
+            hits = body.get("hits", {})
+            rankings[name] = hits.get("hits", [])
+            took = max(took, body.get("took", 0))
+            shards += body.get("_shards", {}).get("total", 0)
+            total = max(total, (hits.get("total") or {}).get("value", 0))
+            report[name] = {"status": status, "hits": len(rankings[name]), "took": body.get("took")}
+        if not rankings:
+            status, body = next((s, b) for s, b in responses.values() if s is not None)
+            raise httpx.HTTPStatusError(
+                f"Every query variant failed: {json.dumps(report)}",
+                request=httpx.Request("POST", f"/{index}/_msearch"),
+                response=httpx.Response(status, json=body),
+            )
+
+        if self.reranker is None:
+            hits = reciprocal_rank_fusion(rankings, size, self.rank_constant)
+        else:
+            fused = reciprocal_rank_fusion(rankings, max(size, self.window), self.rank_constant)
+            hits = self.reranker.rerank(" ".join([query, *alternatives]), fused, size)
+        return {
+            "took": took,
+            "timed_out": False,
+            "_shards": {"total": shards},
+            "hits": {
+                "total": {"value": total, "relation": "gte"},
+                "max_score": hits[0]["_score"] if hits else None,
+                "hits": hits,
+            },
+            "fusion": {
+                "method": "rrf" if self.reranker is None else "rrf+rerank",
+                "rank_constant": self.rank_constant,
+                "variants": report,
+            },
+        }
+
+    async def _msearch(self, index: str, bodies: dict[str, dict]) -> dict[str, tuple]:
+        lines = []
+        for body in bodies.values():
+            lines.append(json.dumps({"index": index}))
+            lines.append(json.dumps(body))
+        response = await self.client.post(
+            "/_msearch",
+            content=("\n".join(lines) + "\n").encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        items = response.json()["responses"]
+        return {
+            name: (item.pop("status", httpx.codes.OK), item)
+            for name, item in zip(bodies, items, strict=False)
+        }
+
+    async def _search_concurrently(self, index: str, bodies: dict[str, dict]) -> dict[str, tuple]:
+        responses = await asyncio.gather(
+            *(self.client.post(f"/{index}/_search", json=body) for body in bodies.values()),
+            return_exceptions=True,
+        )
+        for response in responses:
+            if isinstance(response, BaseException) and not isinstance(response, Exception):
+                raise response
+        if all(isinstance(response, Exception) for response in responses):
+            raise responses[0]
+        # A variant whose request failed is reported like one Elasticsearch rejected
+        return {
+            name: (
+                (None, {"error": f"{type(response).__name__}: {response}"})
+                if isinstance(response, Exception)
+                else (response.status_code, _json(response))
+            )
+            for name, response in zip(bodies, responses, strict=True)
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Fused searches and failed variants."""
+        return {"searches": self.searches, "variant_errors": self.variant_errors}
+
+
+def _check_variants(variants: Sequence[str]) -> None:
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Unknown query variants {sorted(unknown)}, expected {list(VARIANTS)}")
+
+
+def _json(response: httpx.Response) -> dict:
+    try:
+        body = response.json()
+    except ValueError:
+        return {"error": response.text}
+    return body if isinstance(body, dict) else {"error": body}
+
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(part.strip() for part in value.split(",") if part.strip())
@@ -0,0 +1,55 @@
+import json
+from collections.abc import Sequence
+from fnmatch import fnmatchcase
+
+import httpx
+
+# Headers describing the wire encoding, which no longer applies to the decoded body
+HOP_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+
+def canonical_body(content: bytes) -> str:
+    """Canonical form of a request body, insensitive to key order and whitespace.
+
+    Bodies that are not JSON, such as ``_msearch`` NDJSON, are kept verbatim.
+    """
+    if not content:
+        return ""
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+def index_pattern(path: str) -> str:
+    """Index pattern targeted by a request path, ``_all`` for cluster-wide endpoints."""
+    target = path.lstrip("/").split("/", 1)[0]
+    return "_all" if not target or target.startswith("_") else target
+
+
+def request_key(request: httpx.Request) -> tuple:
+    """Key identifying equivalent read requests.
+
+    Made of the credentials, method, path (hence index pattern), sorted query string and
+    canonical body of ``request``, whose content must have been read.
+    """
+    query = tuple(sorted(request.url.params.multi_items()))
+    return (
+        request.headers.get("Authorization"),
+        request.method,
+        request.url.path,
+        query,
+        canonical_body(request.content),
+    )
+
+
+def matches(request: httpx.Request, paths: Sequence[str]) -> bool:
+    """Whether ``request`` is a ``GET`` or ``POST`` on one of the ``paths`` globs."""
+    if request.method not in ("GET", "POST"):
+        return False
+    return any(fnmatchcase(request.url.path, pattern) for pattern in paths)
+
+
+def strip_hop_headers(headers: httpx.Headers) -> list[tuple[str, str]]:
+    """Headers of a response whose body was decoded and is replayed as is."""
+    return [(k, v) for k, v in headers.items() if k.lower() not in HOP_HEADERS]
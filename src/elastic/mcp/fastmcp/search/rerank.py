@@ -0,0 +1,459 @@
+import json
+import math
+import os
+import re
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import astuple, dataclass, fields
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import httpx
+import numpy as np
+
+from elastic.mcp.fastmcp.search.keys import matches, strip_hop_headers
+from elastic.mcp.fastmcp.transport import TRUTHY, TransportLayer
+
+# Words are runs of ASCII letters and digits and of non-ASCII characters, in text and bytes
+TOKEN = re.compile(r"[a-z0-9\x80-\U0010ffff]+")
+WORD_BYTES = np.zeros(256, dtype=bool)
+WORD_BYTES[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz0123456789", dtype=np.uint8)] = True
+WORD_BYTES[0x80:] = True
+
+# Query words too common to tell documents apart
+STOPWORDS = frozenset(
+    [
+        *("a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for"),
+        *("from", "how", "i", "in", "is", "it", "me", "of", "on", "or", "show", "the"),
+        *("to", "was", "what", "when", "where", "which", "who", "why", "with"),
+    ]
+)
+
+# Fields naming a document, matched again by the title feature
+TITLE_FIELDS = ("title", "name", "summary", "key", "subject")
+
+# Fields dating a document, the first one present is used
+DATE_FIELDS = (
+    "updated",
+    "updated_at",
+    "last_modified",
+    "modified",
+    "created",
+    "created_at",
+    "date",
+    "@timestamp",
+)
+
+# Full-text query clauses whose text is matched against the hits
+FULL_TEXT_QUERIES = (
+    "match",
+    "match_phrase",
+    "match_bool_prefix",
+    "multi_match",
+    "combined_fields",
+    "query_string",
+    "simple_query_string",
+)
+
+
+@dataclass
+class RerankWeights:
+    """Weights of the features combined into the rerank score, each feature in [0, 1].
+
+    Attributes:
+        bm25: Length-normalized term frequency of the query terms, weighted by their
+            rarity among the candidates, which evens out long pages and short tickets.
+        coverage: Share of the query terms found in the hit, weighted by rarity.
+        title: Share of the query terms found in the title-like fields.
+        proximity: Share of the query term pairs found within a few words of each other.
+        recency: Exponential decay with the age of the hit.
+        prior: Bonus of the index of the hit, such as a documentation source.
+        es_rank: Position of the hit in the Elasticsearch ranking.
+
+    """
+
+    bm25: float = 1.0
+    coverage: float = 1.0
+    title: float = 0.8
+    proximity: float = 0.6
+    recency: float = 0.3
+    prior: float = 1.0
+    es_rank: float = 0.5
+
+    @classmethod
+    def parse(cls, value: str) -> "RerankWeights":
+        """Weights from comma-separated ``feature=weight`` pairs, defaults for the others."""
+        names = {f.name for f in fields(cls)}
+        weights = _pairs(value)
+        unknown = set(weights) - names
+        if unknown:
+            raise ValueError(f"Unknown rerank features {sorted(unknown)}, expected {sorted(names)}")
+        return cls(**weights)
+
+    def vector(self) -> np.ndarray:
+        """Weights in the order of the feature columns."""
+        return np.array(astuple(self), dtype=np.float64)
+
+
+FEATURES = tuple(f.name for f in fields(RerankWeights))
+
+
+class Reranker:
+    """Score search hits against a query with vectorized lexical features.
+
+    The text of all candidates is scanned as one NumPy array of bytes: occurrences of the
+    query terms are found by comparing shifted slices of the array with each term, and
+    word boundaries come from a mask of word bytes, so no word is handled one at a time
+    in Python. Term counts, coverage, title matches and term pairs within
+    ``proximity_window`` words are then computed from those occurrences for all
+    candidates at once. Nothing is downloaded and no model runs.
+
+    Args:
+        weights (RerankWeights, optional): Weights of the features.
+        priors (mapping of str to float, optional): Bonus of the hits whose index starts
+            with each key, the longest matching key winning.
+        half_life_days (float): Age at which the recency feature halves.
+        proximity_window (int): Maximum distance in words of a close term pair.
+        max_tokens (int): Words of each hit scored, from the start of its source text.
+        k1 (float): Term frequency saturation of the ``bm25`` feature.
+        b (float): Length normalization of the ``bm25`` feature.
+
+    """
+
+    def __init__(
+        self,
+        weights: Optional[RerankWeights] = None,
+        priors: Optional[Mapping[str, float]] = None,
+        half_life_days: float = 180.0,
+        proximity_window: int = 5,
+        max_tokens: int = 1024,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.weights = weights or RerankWeights()
+        self.priors = dict(priors or {})
+        self.half_life_days = half_life_days
+        self.proximity_window = proximity_window
+        self.max_tokens = max_tokens
+        self.k1 = k1
+        self.b = b
+
+    def rerank(self, query: str, hits: Sequence[dict], size: int) -> list[dict]:
+        """The best ``size`` of ``hits`` for ``query``, best first.
+
+        Each hit returned is a copy with the rerank score as ``_score`` and the score
+        given by Elasticsearch as ``_es_score``. Without any query term, the first
+        ``size`` hits are returned unchanged.
+        """
+        terms = query_terms(query)
+        if not terms or not hits:
+            return list(hits[:size])
+        scores = self.features(terms, hits) @ self.weights.vector()
+        order = np.argsort(-scores, kind="stable")[:size]
+        return [
+            {**hits[i], "_score": round(float(scores[i]), 6), "_es_score": hits[i].get("_score")}
+            for i in order
+        ]
+
+    def features(
+        self, terms: Sequence[str], hits: Sequence[dict], now: Optional[float] = None
+    ) -> np.ndarray:
+        """Feature matrix of ``hits``, one row per hit and one column per `FEATURES`."""
+        n, t = len(hits), len(terms)
+        encoded = [term.encode("utf-8") for term in terms]
+        sources = [hit.get("_source") or {} for hit in hits]
+        # Cap the text scanned at a generous 16 characters per word scored
+        bodies = [" ".join(_strings(source))[: self.max_tokens * 16] for source in sources]
+        doc, position, term, lengths = _occurrences(bodies, encoded, self.max_tokens)
+        titles = [" ".join(_title(source)) for source in sources]
+        title_doc, _, title_term, _ = _occurrences(titles, encoded, self.max_tokens)
+
+        counts = np.bincount(doc * t + term, minlength=n * t).reshape(n, t)
+        in_title = np.zeros((n, t), dtype=bool)
+        in_title[title_doc, title_term] = True
+        present = counts > 0
+
+        # Rarity of each term among the candidates
+        df = present.sum(axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        idf_total = idf.sum() or 1.0
+        norm = lengths / max(lengths.mean(), 1.0)
+        tf = counts * (self.k1 + 1) / (counts + self.k1 * (1 - self.b + self.b * norm[:, None]))
+        bm25 = (tf * idf).sum(axis=1) / ((self.k1 + 1) * idf_total)
+
+        columns = {
+            "bm25": bm25,
+            "coverage": (present * idf).sum(axis=1) / idf_total,
+            "title": (in_title * idf).sum(axis=1) / idf_total,
+            "proximity": self._proximity(doc, position, term, n, t),
+            "recency": self._recency(hits, time.time() if now is None else now),
+            "prior": np.array([self._prior(hit.get("_index") or "") for hit in hits]),
+            "es_rank": 1.0 - np.arange(n) / n,
+        }
+        return np.column_stack([columns[name] for name in FEATURES])
+
+    def _proximity(
+        self, doc: np.ndarray, position: np.ndarray, term: np.ndarray, n: int, t: int
+    ) -> np.ndarray:
+        if t < 2:  # noqa: PLR2004
+            return np.zeros(n)
+        # Occurrences are in text order and at distinct positions, so the occurrences
+        # within the window of one are at most `proximity_window` steps after it
+        pairs = np.zeros((n, t, t), dtype=bool)
+        window = self.proximity_window
+        for step in range(1, min(window, len(doc)) + 1):
+            close = (
+                (doc[step:] == doc[:-step])
+                & (position[step:] - position[:-step] <= window)
+                & (term[step:] != term[:-step])
+            )
+            pairs[doc[step:][close], term[:-step][close], term[step:][close]] = True
+        pairs |= pairs.transpose(0, 2, 1)
+        return pairs.sum(axis=(1, 2)) / (t * (t - 1))
+
+    def _recency(self, hits: Sequence[dict], now: float) -> np.ndarray:
+        stamps = np.array([_timestamp(hit.get("_source") or {}) for hit in hits])
+        age_days = np.clip((now - stamps) / 86400, 0, None)
+        return np.nan_to_num(0.5 ** (age_days / self.half_life_days), nan=0.0)
+
+    def _prior(self, index: str) -> float:
+        keys = [key for key in self.priors if index.startswith(key)]
+        return self.priors[max(keys, key=len)] if keys else 0.0
+
+
+class SearchReranker(TransportLayer):
+    """Rerank the hits of searches locally and return the best ones.
+
+    A search for ``size`` hits (10 by default) is sent for ``candidates`` hits instead,
+    which the `Reranker` scores against the text of its query; the response keeps the
+    best ``size``, everything else unchanged. Searches without query text, sorted,
+    paginated, scrolled or already asking for ``candidates`` hits are forwarded as is.
+
+    Args:
+        reranker (Reranker, optional): Scoring of the candidates.
+        candidates (int): Hits fetched and scored per search.
+        paths (sequence of str): Globs of the endpoints that are reranked.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+
+    """
+
+    def __init__(
+        self,
+        reranker: Optional[Reranker] = None,
+        candidates: int = 100,
+        paths: Sequence[str] = ("*/_search",),
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(inner)
+        self.reranker = reranker or Reranker()
+        self.candidates = candidates
+        self.paths = tuple(paths)
+        self.searches = 0
+        self.reranked = 0
+        self.scored = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchReranker"]:
+        """Build a reranker from ``ELK_MCP_RERANK*`` environment variables.
+
+        Returns None unless ``ELK_MCP_RERANK`` enables reranking.
+        """
+        if os.getenv("ELK_MCP_RERANK", "false").lower() not in TRUTHY:
+            return None
+        reranker = Reranker(
+            weights=RerankWeights.parse(os.getenv("ELK_MCP_RERANK_WEIGHTS", "")),
+            priors=_pairs(os.getenv("ELK_MCP_RERANK_PRIORS", "")),
+            half_life_days=float(os.getenv("ELK_MCP_RERANK_HALF_LIFE_DAYS", "180")),
+        )
+        return cls(reranker, candidates=int(os.getenv("ELK_MCP_RERANK_CANDIDATES", "100")))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Search the candidates of a search and keep the best hits."""
+        if not matches(request, self.paths):
+            return await self.inner.handle_async_request(request)
+        await request.aread()
+        self.searches += 1
+        plan = self._plan(request)
+        if plan is None:
+            return await self.inner.handle_async_request(request)
+
+        text, size, candidate_request = plan
+        response = await self.inner.handle_async_request(candidate_request)
+        if response.status_code != httpx.codes.OK:
+            return response
+        await response.aread()
+        body = json.loads(response.content)
+        hits = body.get("hits", {}).get("hits", [])
+
+        started = time.perf_counter()
+        best = self.reranker.rerank(text, hits, size)
+        elapsed = time.perf_counter() - started
+        self.reranked += 1
+        self.scored += len(hits)
+        self.seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+        body["hits"]["hits"] = best
+        body["hits"]["max_score"] = best[0]["_score"] if best else None
+        return httpx.Response(
+            response.status_code,
+            headers=strip_hop_headers(response.headers),
+            json=body,
+            request=request,
+        )
+
+    def _plan(self, request: httpx.Request) -> Optional[tuple[str, int, httpx.Request]]:
+        # Query text, hits asked for and candidate request of a rerankable search
+        params = request.url.params
+        try:
+            body = json.loads(request.content) if request.content else {}
+        except ValueError:
+            return None
+        if not isinstance(body, dict) or "scroll" in params or "sort" in params:
+            return None
+        if any(key in body for key in ("sort", "search_after", "pit", "collapse")):
+            return None
+        if int(body.get("from", params.get("from", 0)) or 0) > 0:
+            return None
+        size = int(body.get("size", params.get("size", 10)))
+        text = params.get("q") or query_text(body.get("query"))
+        if not text or size <= 0 or size >= self.candidates:
+            return None
+
+        url = request.url
+        content = request.content
+        if request.content:
+            body["size"] = self.candidates
+            content = json.dumps(body).encode("utf-8")
+            url = url.copy_remove_param("size")
+        else:
+            url = url.copy_set_param("size", self.candidates)
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() != "content-length"]
+        candidate_request = httpx.Request(
+            request.method, url, headers=headers, content=content, extensions=request.extensions
+        )
+        return text, size, candidate_request
+
+    def stats(self) -> dict[str, Any]:
+        """Searches reranked, candidates scored and the time spent scoring them."""
+        return {
+            "searches": self.searches,
+            "reranked": self.reranked,
+            "candidates": self.candidates,
+            "mean_candidates": self.scored / self.reranked if self.reranked else 0.0,
+            "mean_rerank_ms": self.seconds / self.reranked * 1000 if self.reranked else 0.0,
+            "max_rerank_ms": self.max_seconds * 1000,
+        }
+
+
+def query_terms(text: str) -> list[str]:
+    """Distinct words of ``text`` in order, without stopwords unless only stopwords."""
+    words = list(dict.fromkeys(TOKEN.findall(text.lower())))
+    return [w for w in words if w not in STOPWORDS] or words
+
+
+def query_text(query: Any) -> str:
+    """Text of the full-text clauses of a query DSL ``query``, joined by spaces."""
+    texts = []
+    if isinstance(query, list):
+        texts.extend(query_text(item) for item in query)
+    elif isinstance(query, dict):
+        for key, value in query.items():
+            if key not in FULL_TEXT_QUERIES or not isinstance(value, dict):
+                texts.append(query_text(value))
+            elif isinstance(value.get("query"), str):
+                # multi_match, query_string and the like
+                texts.append(value["query"])
+            else:
+                # match and the like, by field: {"title": "text"} or {"title": {"query": ...}}
+                for clause in value.values():
+                    text = clause.get("query") if isinstance(clause, dict) else clause
+                    if isinstance(text, str):
+                        texts.append(text)
+    return " ".join(text for text in texts if text)
+
+
+def _strings(value: Any) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for item in value.values() for s in _strings(item)]
+    if isinstance(value, list):
+        return [s for item in value for s in _strings(item)]
+    return []
+
+
+def _title(source: dict) -> list[str]:
+    return [source[name] for name in TITLE_FIELDS if isinstance(source.get(name), str)]
+
+
+def _occurrences(
+    texts: Sequence[str], terms: Sequence[bytes], max_words: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Text, word position and term of the whole-word occurrences of the UTF-8 `terms` in
+    # the first `max_words` words of each text, in text order, and the length of each
+    # text in words
+    encoded = [text.lower().encode("utf-8") for text in texts]
+    data = np.frombuffer(b"\n".join(encoded), dtype=np.uint8)
+    word = WORD_BYTES[data]
+    begins = word.copy()
+    begins[1:] &= ~word[:-1]
+    # Offsets of the first byte of each word, counting the words begun before any byte
+    word_starts = np.flatnonzero(begins)
+    starts = np.cumsum([0] + [len(text) + 1 for text in encoded])
+    bounds = np.searchsorted(word_starts, starts)
+    lengths = np.minimum(np.diff(bounds), max_words)
+
+    # Padded with a non-word byte on both sides to test the bytes around any match
+    padded = np.concatenate(([False], word, [False]))
+    offsets, term = [], []
+    for i, needle in enumerate(terms):
+        end = len(data) - len(needle) + 1
+        if end <= 0:
+            continue
+        found = data[:end] == needle[0]
+        for k in range(1, len(needle)):
+            found &= data[k : end + k] == needle[k]
+        at = np.flatnonzero(found)
+        at = at[~padded[at] & ~padded[at + len(needle) + 1]]
+        offsets.append(at)
+        term.append(np.full(len(at), i))
+    if not offsets:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, lengths
+    offsets, term = np.concatenate(offsets), np.concatenate(term)
+    order = np.argsort(offsets, kind="stable")
+    offsets, term = offsets[order], term[order]
+
+    doc = np.searchsorted(starts, offsets, side="right") - 1
+    position = np.searchsorted(word_starts, offsets) - bounds[doc]
+    kept = position < max_words
+    return doc[kept], position[kept], term[kept], lengths
+
+
+def _timestamp(source: dict) -> float:
+    for name in DATE_FIELDS:
+        value = source.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Epoch milliseconds, as Elasticsearch stores dates, or seconds
+            return value / 1000 if value > 1e11 else float(value)  # noqa: PLR2004
+        if isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+    return math.nan
+
+
+def _pairs(value: str) -> dict[str, float]:
+    pairs = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, number = item.partition("=")
+            pairs[name.strip()] = float(number)
+    return pairs
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+from elastic.mcp.fastmcp.search.keys import matches, request_key, strip_hop_headers
+from elastic.mcp.fastmcp.transport import TRUTHY, TransportLayer
+
+
+@dataclass
+class Flight:
+    """A pending request and the number of callers waiting for it."""
+
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight(TransportLayer):
+    """Share one request between concurrent identical searches.
+
+    A search identical to one already in flight (same credentials, method, path, query
+    string and canonical body) waits for that request instead of sending its own, and
+    every caller receives its own copy of the response, or the same exception.
+
+    The request runs in its own task, so cancelling one caller does not affect the
+    others; it is only cancelled when every caller waiting for it is gone, in which
+    case later identical searches start a new request.
+
+    Args:
+        paths (sequence of str): Globs of the endpoints that are deduplicated.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str] = ("*/_search", "*/_msearch", "*/_count"),
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        super().__init__(inner)
+        self.paths = tuple(paths)
+        self._flights: dict[tuple, Flight] = {}
+        self.requests = 0
+        self.flights = 0
+        self.deduplicated = 0
+        self.abandoned = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SingleFlight"]:
+        """Build a single-flight layer, or None unless ``ELK_MCP_SEARCH_SINGLE_FLIGHT`` is true."""
+        if os.getenv("ELK_MCP_SEARCH_SINGLE_FLIGHT", "false").lower() not in TRUTHY:
+            return None
+        return cls()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Join the identical request in flight, or send ``request`` and let others join it."""
+        if not matches(request, self.paths):
+            return await self.inner.handle_async_request(request)
+        await request.aread()
+        self.requests += 1
+        key = request_key(request)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.get_running_loop().create_task(self._fetch(request))
+            flight = self._flights[key] = Flight(task)
+            task.add_done_callback(lambda _: self._land(key, flight))
+            self.flights += 1
+        else:
+            self.deduplicated += 1
+
+        flight.waiters += 1
+        try:
+            status_code, headers, content = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody waits for the response anymore
+                self.abandoned += 1
+                flight.task.cancel()
+                self._land(key, flight)
+        return httpx.Response(status_code, headers=headers, content=content, request=request)
+
+    async def _fetch(self, request: httpx.Request) -> tuple[int, list, bytes]:
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        return response.status_code, strip_hop_headers(response.headers), response.content
+
+    def _land(self, key: tuple, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict[str, Any]:
+        """Request, flight, deduplication and abandon counters."""
+        return {
+            "requests": self.requests,
+            "in_flight": len(self._flights),
+            "flights": self.flights,
+            "deduplicated": self.deduplicated,
+            "abandoned": self.abandoned,
+        }
@@ -1,12 +1,40 @@
+import hashlib
 import json
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from pathlib import Path
+from typing import Any, Optional, Union
 
 import httpx
 import yaml
+from mcp.types import EmbeddedResource, ImageContent, TextContent
+from starlette.applications import Starlette
 
+from elastic.mcp.fastmcp.metrics import MetricsTransport, ServerMetrics, SSESessionMiddleware
+from elastic.mcp.fastmcp.nodes import NodePool
+from elastic.mcp.fastmcp.pruning import PruneReport, RouteAllowlist, prune_openapi_spec
+from elastic.mcp.fastmcp.registry import (
+    EMPTY_OPENAPI_SPEC,
+    load_registry_snapshot,
+    register_registry,
+    registry_fingerprint,
+    save_registry_snapshot,
+)
+from elastic.mcp.fastmcp.search import MSearchBatcher, SearchCache, SearchReranker, SingleFlight
+from elastic.mcp.fastmcp.spec_cache import OpenAPISpecCache
+from elastic.mcp.fastmcp.tracing import Tracer, TracingTransport
+from elastic.mcp.fastmcp.transport import (
+    TransportConfig,
+    TransportLayer,
+    build_transport,
+    iter_layers,
+    pool_stats,
+)
 from fastmcp.server.openapi import FastMCPOpenAPI
+from fastmcp.utilities.logging import get_logger
+
+logger = get_logger(__name__)
 
 
 class ELKFastMCPOpenAPI(FastMCPOpenAPI, ABC):
@@ -16,26 +44,150 @@ class ELKFastMCPOpenAPI(FastMCPOpenAPI, ABC):
         openapi_spec (str or dict, optional): OpenAPI specification URL or dictionary.
             If a string, it can be a URL or a path to a local file.
             If a dictionary, it should be the OpenAPI spec in JSON or YAML format.
+            Defaults to the ``ELK_MCP_OPENAPI_SPEC`` environment variable, then to
+            ``openapi_default_url``.
         client (httpx.AsyncClient, optional): HTTP client for making requests.
             If not provided, a default client will be created using environment variables.
+            The URL variable may list several comma-separated nodes to balance requests over.
+            The search layers only wrap the default client and are disabled with this one.
+        spec_cache (OpenAPISpecCache, optional): On-disk cache for OpenAPI specs given as URLs.
+            If not provided, one is configured from the ``ELK_MCP_SPEC_*`` environment variables.
+        registry_snapshot (str or Path, optional): Path of a registry snapshot. When it
+            matches the spec and route maps, tools and resources are loaded from it instead
+            of parsing the OpenAPI spec; otherwise it is (re)written after parsing.
+            Defaults to the ``ELK_MCP_REGISTRY_SNAPSHOT`` environment variable.
+        allowlist (RouteAllowlist, optional): Operations to keep. Other paths and the
+            components only they reference are pruned before tools are built.
+            Defaults to the ``ELK_MCP_ALLOWED_*`` environment variables.
+        transport_config (TransportConfig, optional): Pool, timeout and retry settings of
+            the default client. Defaults to the ``ELK_MCP_HTTP_*`` environment variables.
+        search_cache (SearchCache, optional): Cache of search responses shared by all
+            sessions, used by the default client. Defaults to the ``ELK_MCP_SEARCH_CACHE*``
+            environment variables, disabled unless ``ELK_MCP_SEARCH_CACHE`` is true.
+        search_batcher (MSearchBatcher, optional): Micro-batching of concurrent searches
+            into ``_msearch``, used by the default client. Defaults to the
+            ``ELK_MCP_SEARCH_BATCH*`` environment variables, disabled unless
+            ``ELK_MCP_SEARCH_BATCH`` is true.
+        single_flight (SingleFlight, optional): Sharing of one request between concurrent
+            identical searches, used by the default client. Defaults to the
+            ``ELK_MCP_SEARCH_SINGLE_FLIGHT`` environment variable, disabled unless true.
+        search_reranker (SearchReranker, optional): Local reranking of a larger candidate
+            set of each search, used by the default client. Defaults to the
+            ``ELK_MCP_RERANK*`` environment variables, disabled unless ``ELK_MCP_RERANK``
+            is true.
+        tracer (Tracer, optional): Tracer of tool calls and of the requests of the default
+            client. A tool call continues the trace of the ``traceparent`` found in the
+            ``_meta`` of the MCP request. Defaults to the ``TRACE_*`` environment variables,
+            recording nothing unless ``TRACE_EXPORTER`` is set.
+        metrics (ServerMetrics, optional): Prometheus metrics of tool calls, Elasticsearch
+            requests (duration against ``took``, response sizes), SSE sessions, connection
+            pool and transport layers, served as text on ``metrics.path`` by the SSE app.
+            Defaults to the ``ELK_MCP_METRICS*`` environment variables, enabled unless
+            ``ELK_MCP_METRICS`` is false.
         **kwargs: Additional keyword arguments for FastMCPOpenAPI.
 
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         openapi_spec: Optional[Union[str, dict]] = None,
         client: Optional[httpx.AsyncClient] = None,
+        spec_cache: Optional[OpenAPISpecCache] = None,
+        registry_snapshot: Optional[Union[str, Path]] = None,
+        allowlist: Optional[RouteAllowlist] = None,
+        transport_config: Optional[TransportConfig] = None,
+        search_cache: Optional[SearchCache] = None,
+        search_batcher: Optional[MSearchBatcher] = None,
+        single_flight: Optional[SingleFlight] = None,
+        search_reranker: Optional[SearchReranker] = None,
+        tracer: Optional[Tracer] = None,
+        metrics: Optional[ServerMetrics] = None,
         **kwargs,
     ):
-        openapi_spec = self._load_openapi_spec(openapi_spec)
-        client = client or self._get_default_client()
+        openapi_spec = openapi_spec or os.getenv("ELK_MCP_OPENAPI_SPEC") or None
+        spec_cache = spec_cache or OpenAPISpecCache.from_env()
+        allowlist = allowlist or RouteAllowlist.from_env()
+        self._registry_fingerprint = self._get_registry_fingerprint(
+            openapi_spec, spec_cache, allowlist=allowlist, **kwargs
+        )
+        registry_snapshot = registry_snapshot or os.getenv("ELK_MCP_REGISTRY_SNAPSHOT")
+        snapshot = None
+        if registry_snapshot and self._registry_fingerprint is not None:
+            snapshot = load_registry_snapshot(registry_snapshot, self._registry_fingerprint)
+
+        self.prune_report: Optional[PruneReport] = None
+        if snapshot is None:
+            source = openapi_spec
+            openapi_spec = self._load_openapi_spec(openapi_spec, spec_cache)
+            # A URL spec is only versioned once the spec cache has fetched it
+            self._registry_fingerprint = self._get_registry_fingerprint(
+                source, spec_cache, allowlist=allowlist, **kwargs
+            )
+            if allowlist is not None:
+                openapi_spec, self.prune_report = prune_openapi_spec(openapi_spec, allowlist)
+                logger.info(
+                    f"Pruned {self.prune_report.routes_removed} routes, "
+                    f"{self.prune_report.schemas_removed} schemas and "
+                    f"{self.prune_report.bytes_removed} bytes from the OpenAPI spec"
+                )
+        else:
+            self._revalidate_openapi_spec(openapi_spec, spec_cache)
+            openapi_spec = EMPTY_OPENAPI_SPEC
+        search_layers = (search_cache, search_batcher, single_flight, search_reranker)
+        if client is not None and any(layer is not None for layer in search_layers):
+            raise ValueError("Search layers wrap the default client and cannot be given a client")
+        self.search_cache: Optional[SearchCache] = None
+        self.search_batcher: Optional[MSearchBatcher] = None
+        self.single_flight: Optional[SingleFlight] = None
+        self.search_reranker: Optional[SearchReranker] = None
+        if client is None:
+            self.search_cache = search_cache or SearchCache.from_env()
+            self.search_batcher = search_batcher or MSearchBatcher.from_env()
+            self.single_flight = single_flight or SingleFlight.from_env()
+            self.search_reranker = search_reranker or SearchReranker.from_env()
+        self.tracer = tracer or Tracer.from_env(type(self).__name__)
+        self.metrics = metrics or ServerMetrics.from_env()
+        # Outermost first: every request is traced, searches are reranked from candidates
+        # that may come from the cache, cache hits are served at once, identical searches
+        # are merged before distinct ones are batched, and only the requests reaching
+        # Elasticsearch are measured
+        layers = [
+            layer
+            for layer in (
+                TracingTransport(self.tracer) if self.tracer.enabled else None,
+                self.search_reranker,
+                self.search_cache,
+                self.single_flight,
+                self.search_batcher,
+                MetricsTransport(self.metrics) if self.metrics is not None else None,
+            )
+            if layer is not None
+        ]
+        client = client or self._get_default_client(transport_config, *layers)
 
         super().__init__(
             openapi_spec=openapi_spec,
             client=client,
             **kwargs,
         )
+        if snapshot is not None:
+            register_registry(self, snapshot)
+        elif registry_snapshot and self._registry_fingerprint is None:
+            logger.warning(
+                f"Not writing the registry snapshot {registry_snapshot}: the version of the "
+                "OpenAPI spec is unknown without the spec cache, so it could never go stale"
+            )
+        elif registry_snapshot:
+            # Missing or stale snapshot: compile it so that the next start can skip parsing
+            self.save_registry_snapshot(registry_snapshot)
+        self.registry_source = "spec" if snapshot is None else "snapshot"
+        if self.metrics is not None:
+            self.metrics.registry.add_collector(
+                lambda: self.metrics.collect_transport(self.transport_stats())
+            )
+            self.custom_route(self.metrics.path, methods=["GET"], include_in_schema=False)(
+                self.metrics.endpoint
+            )
 
     @property
     @abstractmethod
@@ -52,7 +204,85 @@ class ELKFastMCPOpenAPI(FastMCPOpenAPI, ABC):
         """Environment variable name for the ELK API key."""
         return "ELASTIC_API_KEY"
 
-    def _load_openapi_spec(self, openapi_spec: Optional[Union[str, dict]]) -> dict:
+    @property
+    def sniff_path(self) -> Optional[str]:
+        """Endpoint listing the HTTP nodes of the cluster, None if discovery is unsupported."""
+        return None
+
+    @property
+    def health_check_path(self) -> str:
+        """Endpoint probed to check that a node is back."""
+        return "/"
+
+    def _get_registry_fingerprint(
+        self,
+        openapi_spec: Optional[Union[str, dict]],
+        spec_cache: Optional[OpenAPISpecCache] = None,
+        allowlist: Optional[RouteAllowlist] = None,
+        **kwargs,
+    ) -> Optional[str]:
+        """Fingerprint of the registry inputs, None if the spec version is unknown.
+
+        A URL spec is versioned by the hash recorded by the spec cache, so it has no
+        version before its first download or when the cache is disabled.
+        """
+        openapi_spec = openapi_spec or self.openapi_default_url
+        if isinstance(openapi_spec, dict):
+            content = json.dumps(openapi_spec, sort_keys=True, default=str)
+            version = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        elif str(openapi_spec).startswith("http"):
+            meta = spec_cache.read_meta(str(openapi_spec)) if spec_cache is not None else None
+            version = meta["sha256"] if meta else None
+        elif os.path.exists(openapi_spec):
+            stat = os.stat(openapi_spec)
+            version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            version = None
+        if version is None:
+            return None
+        return registry_fingerprint(
+            server=type(self).__name__,
+            source=openapi_spec if not isinstance(openapi_spec, dict) else None,
+            version=version,
+            allowlist=allowlist,
+            route_maps=kwargs.get("route_maps"),
+        )
+
+    def _revalidate_openapi_spec(
+        self,
+        openapi_spec: Optional[Union[str, dict]],
+        spec_cache: Optional[OpenAPISpecCache] = None,
+    ) -> None:
+        # A snapshot hit skips loading the spec, which is what revalidates a cached URL
+        # spec; a new version then changes the fingerprint and the next start rebuilds
+        url = openapi_spec or self.openapi_default_url
+        if not isinstance(url, str) or not url.startswith("http") or spec_cache is None:
+            return
+        if spec_cache.revalidate and not spec_cache.offline:
+            spec_cache.refresh_in_background(url)
+
+    def save_registry_snapshot(self, path: Union[str, Path]) -> dict[str, int]:
+        """Compile the OpenAPI tools, resources and templates of this server into ``path``.
+
+        Args:
+            path (str or Path): Where to write the snapshot.
+
+        Returns:
+            The number of tools, resources and templates written.
+
+        Raises:
+            ValueError: If the version of the OpenAPI spec is unknown, as for a URL spec
+                loaded without the spec cache.
+        """
+        if self._registry_fingerprint is None:
+            raise ValueError("The OpenAPI spec has no known version to fingerprint")
+        return save_registry_snapshot(self, path, self._registry_fingerprint)
+
+    def _load_openapi_spec(
+        self,
+        openapi_spec: Optional[Union[str, dict]],
+        spec_cache: Optional[OpenAPISpecCache] = None,
+    ) -> dict:
         openapi_spec = openapi_spec or self.openapi_default_url
         if not isinstance(openapi_spec, dict):
             openapi_spec = str(openapi_spec)
@@ -63,6 +293,8 @@ class ELKFastMCPOpenAPI(FastMCPOpenAPI, ABC):
 
         if isinstance(openapi_spec, str):
             if openapi_spec.startswith("http"):
+                if spec_cache is not None:
+                    return spec_cache.load(openapi_spec)
                 response = httpx.get(openapi_spec)
                 response.raise_for_status()
                 if is_yaml:
@@ -77,13 +309,79 @@ class ELKFastMCPOpenAPI(FastMCPOpenAPI, ABC):
                     return json.load(f)
         return openapi_spec
 
-    def _get_default_client(self) -> httpx.AsyncClient:
+    def _get_default_client(
+        self, transport_config: Optional[TransportConfig] = None, *layers: TransportLayer
+    ) -> httpx.AsyncClient:
         ELASTIC_URL = os.getenv(self.client_url_env)
         ELASTIC_API_KEY = os.getenv(self.client_api_key_env)
+        transport_config = transport_config or TransportConfig.from_env()
 
         headers = {"Authorization": f"ApiKey {ELASTIC_API_KEY}"}
+        # The URL variable may list several comma-separated nodes
+        urls = [url.strip() for url in (ELASTIC_URL or "").split(",") if url.strip()]
+        balancer = None
+        if len(urls) > 1 or transport_config.sniff:
+            balancer = NodePool(
+                urls,
+                transport_config,
+                sniff_path=self.sniff_path if transport_config.sniff else None,
+                health_check_path=self.health_check_path,
+                headers=headers,
+            )
+        transport, _ = build_transport(transport_config, *layers, balancer=balancer)
+
         return httpx.AsyncClient(
-            base_url=ELASTIC_URL,
+            base_url=urls[0] if urls else ELASTIC_URL,
             headers=headers,
             verify=True,
+            transport=transport,
+            timeout=transport_config.timeout,
         )
+
+    async def _mcp_call_tool(
+        self, key: str, arguments: dict[str, Any]
+    ) -> list[Union[TextContent, ImageContent, EmbeddedResource]]:
+        """Call a tool in a server span, continuing the trace of the MCP request, and time it."""
+        try:
+            meta = self._mcp_server.request_context.meta
+        except LookupError:
+            meta = None
+        traceparent = getattr(meta, "traceparent", None) if meta is not None else None
+        started = time.perf_counter()
+        failed = True
+        try:
+            with self.tracer.span(
+                f"tools/call {key}",
+                traceparent=traceparent,
+                kind="server",
+                attributes={"mcp.tool": key},
+            ):
+                result = await super()._mcp_call_tool(key, arguments)
+            failed = False
+            return result
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_tool(key, time.perf_counter() - started, failed)
+
+    def sse_app(self) -> Starlette:
+        """SSE app of the server, counting the open SSE sessions when metrics are enabled."""
+        app = super().sse_app()
+        if self.metrics is not None:
+            app.add_middleware(
+                SSESessionMiddleware, path=self.settings.sse_path, metrics=self.metrics
+            )
+        return app
+
+    def transport_stats(self) -> dict[str, dict]:
+        """Connection pool utilization and counters of each transport layer.
+
+        Returns an empty dict when the server was given a client with a custom transport.
+        """
+        layers = iter_layers(self._client._transport)
+        if not layers:
+            return {}
+        stats = {type(layer).__name__: layer.stats() for layer in layers}
+        bottom = layers[-1].inner
+        if isinstance(bottom, httpx.AsyncHTTPTransport):
+            stats["pool"] = pool_stats(bottom)
+        return stats
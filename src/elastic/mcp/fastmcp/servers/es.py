@@ -1,3 +1,5 @@
+from typing import Optional
+
 from typing_extensions import override
 
 from elastic.mcp.fastmcp.servers.elk import ELKFastMCPOpenAPI
@@ -17,3 +19,9 @@ class ESFastMCPOpenAPI(ELKFastMCPOpenAPI):
     def client_url_env(self) -> str:
         """Environment variable name for the ELK URL."""
         return "ELASTICSEARCH_URL"
+
+    @override
+    @property
+    def sniff_path(self) -> Optional[str]:
+        """Endpoint listing the HTTP nodes of the cluster."""
+        return "/_nodes/http"
@@ -0,0 +1,201 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import httpx
+import yaml
+
+CACHE_FORMAT_VERSION = 1
+
+TRUTHY = ("1", "true", "yes", "on")
+
+
+def parse_openapi_document(text: str, source: str) -> dict:
+    """Parse an OpenAPI document as YAML or JSON depending on its source name.
+
+    Args:
+        text (str): Raw content of the document.
+        source (str): URL or path the document was read from.
+    """
+    if source.endswith(".json"):
+        return json.loads(text)
+    # YAML is a superset of JSON, so it is the safe fallback
+    return yaml.safe_load(text)
+
+
+class OpenAPISpecCache:
+    """Versioned on-disk cache of parsed OpenAPI specifications.
+
+    Specs are stored as JSON keyed by the hash of their URL, next to a small metadata
+    file holding the ``ETag``/``Last-Modified`` validators. A cached spec is returned
+    immediately and revalidated with a conditional request in a background thread.
+
+    Args:
+        cache_dir (str or Path, optional): Directory holding the cached specs.
+            Defaults to ``~/.cache/elastic-mcp/openapi``.
+        offline (bool): Never touch the network; fail if the spec is not cached.
+        revalidate (bool): Revalidate cached specs in the background.
+        timeout (float): Timeout in seconds for spec downloads.
+
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        offline: bool = False,
+        revalidate: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.cache_dir = Path(cache_dir or Path.home() / ".cache" / "elastic-mcp" / "openapi")
+        self.offline = offline
+        self.revalidate = revalidate
+        self.timeout = timeout
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["OpenAPISpecCache"]:
+        """Build a cache from ``ELK_MCP_SPEC_*`` environment variables.
+
+        Returns None when ``ELK_MCP_SPEC_CACHE`` disables the cache.
+        """
+        if os.getenv("ELK_MCP_SPEC_CACHE", "true").lower() not in TRUTHY:
+            return None
+        return cls(
+            cache_dir=os.getenv("ELK_MCP_SPEC_CACHE_DIR") or None,
+            offline=os.getenv("ELK_MCP_SPEC_OFFLINE", "false").lower() in TRUTHY,
+            revalidate=os.getenv("ELK_MCP_SPEC_REVALIDATE", "true").lower() in TRUTHY,
+        )
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.meta.json"
+
+    def read_meta(self, url: str) -> Optional[dict[str, Any]]:
+        """Read the metadata of a cached spec, or None if it is missing or outdated."""
+        _, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("url") != url:
+            return None
+        return meta
+
+    def load(self, url: str) -> dict:
+        """Return the spec for ``url``, from disk when possible.
+
+        Raises:
+            FileNotFoundError: If offline and the spec has not been cached yet.
+        """
+        spec_path, _ = self._paths(url)
+        meta = self.read_meta(url)
+        if meta is not None:
+            try:
+                with open(spec_path) as f:
+                    spec = json.load(f)
+            except (OSError, ValueError):
+                spec = None
+            if spec is not None:
+                if self.revalidate and not self.offline:
+                    self.refresh_in_background(url)
+                return spec
+
+        if self.offline:
+            raise FileNotFoundError(f"OpenAPI spec for {url} is not cached in {self.cache_dir}")
+        return self.refresh(url, conditional=False)  # type: ignore[return-value]
+
+    def refresh(self, url: str, conditional: bool = True) -> Optional[dict]:
+        """Download ``url`` and update the cache.
+
+        Args:
+            url (str): URL of the OpenAPI specification.
+            conditional (bool): Send the cached ``ETag``/``Last-Modified`` validators.
+
+        Returns:
+            The new spec, or None if the server reported it as not modified.
+        """
+        meta = (self.read_meta(url) or {}) if conditional else {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = httpx.get(url, headers=headers, timeout=self.timeout, follow_redirects=True)
+        if response.status_code == httpx.codes.NOT_MODIFIED and meta:
+            self._write_meta(url, {**meta, "checked_at": time.time()})
+            return None
+        response.raise_for_status()
+
+        spec = parse_openapi_document(response.text, url)
+        self.store(
+            url,
+            spec,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return spec
+
+    def refresh_in_background(self, url: str) -> threading.Thread:
+        """Revalidate ``url`` in a daemon thread, ignoring network failures."""
+
+        def _refresh() -> None:
+            # Keep serving the cached spec until the next restart on failures
+            with contextlib.suppress(httpx.HTTPError, OSError, ValueError, yaml.YAMLError):
+                self.refresh(url)
+
+        thread = threading.Thread(target=_refresh, name="openapi-spec-refresh", daemon=True)
+        thread.start()
+        self._refresh_thread = thread
+        return thread
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for a pending background revalidation to finish."""
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+
+    def store(
+        self,
+        url: str,
+        spec: dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store a parsed spec for ``url``, e.g. to seed an offline deployment."""
+        spec_path, _ = self._paths(url)
+        content = json.dumps(spec, separators=(",", ":"), default=str)
+        self._atomic_write(spec_path, content)
+        now = time.time()
+        self._write_meta(
+            url,
+            {
+                "version": CACHE_FORMAT_VERSION,
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+                "fetched_at": now,
+                "checked_at": now,
+            },
+        )
+
+    def _write_meta(self, url: str, meta: dict[str, Any]) -> None:
+        _, meta_path = self._paths(url)
+        self._atomic_write(meta_path, json.dumps(meta))
+
+    def _atomic_write(self, path: Path, content: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
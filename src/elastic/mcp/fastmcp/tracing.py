@@ -0,0 +1,442 @@
+"""Spans of tool calls and Elasticsearch requests, continued across the chatbot and server.
+
+This is a deliberately small tracer rather than ``opentelemetry-sdk``: the chatbot and the
+MCP server only need W3C ``traceparent`` propagation, a context variable for the current
+span and OTLP/HTTP JSON export, which fit in one module using the ``httpx`` client both
+processes already ship. The SDK with its exporters would add half a dozen packages
+(``protobuf``, ``googleapis-common-protos``, the API, semantic conventions) to a server
+that is otherwise lean, for features (samplers, metrics, logs) that are not used here.
+Spans are exported in the OTLP format, so any OpenTelemetry collector can receive them.
+"""
+
+import atexit
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import httpx
+
+from elastic.mcp.fastmcp.transport import TransportLayer
+
+# OTLP span kinds
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+
+current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str]]:
+    """Trace and parent span ids of a W3C ``traceparent`` header, None if malformed."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:  # noqa: PLR2004
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16)
+        int(span_id, 16)
+    except ValueError:
+        return None
+    if not int(trace_id, 16) or not int(span_id, 16):
+        return None
+    return trace_id, span_id
+
+
+@dataclass
+class Span:
+    """A timed operation of a trace, exported once ended.
+
+    Args:
+        name (str): Operation name, e.g. ``POST /content-*/_search``.
+        trace_id (str): 32 hex digits shared by every span of the trace.
+        span_id (str): 16 hex digits identifying the span.
+        parent_id (str, optional): Id of the parent span, None for a root span.
+        kind (str): ``internal``, ``server`` or ``client``.
+        attributes (dict): Attributes describing the operation.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+    tracer: Optional["Tracer"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def traceparent(self) -> str:
+        """W3C ``traceparent`` header continuing the trace under this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @property
+    def duration_ms(self) -> float:
+        """Milliseconds from start to end, or to now while the span is open."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute, overwriting any previous value."""
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """End the span, marked as failed with ``error``, and export it. Ends only once."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.tracer is not None:
+            self.tracer.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable form of the span."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": self.tracer.service if self.tracer is not None else None,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class SpanExporter:
+    """Destination of ended spans."""
+
+    def export(self, span: Span) -> None:
+        """Send or buffer an ended span."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Flush the buffered spans and release resources."""
+
+
+class JSONLSpanExporter(SpanExporter):
+    """Append each span as one JSON line to a file, shared by every process tracing to it.
+
+    Args:
+        path (str): File the spans are appended to, created if missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def export(self, span: Span) -> None:
+        """Write the span, flushing right away so that the file can be tailed."""
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush()
+
+    def shutdown(self) -> None:
+        """Close the file."""
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def otlp_payload(spans: Sequence[Span], service: str) -> dict[str, Any]:
+    """OTLP/HTTP JSON request exporting ``spans`` of ``service``."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service})},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_id or "",
+                                "name": span.name,
+                                "kind": SPAN_KINDS.get(span.kind, 1),
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                                "attributes": _otlp_attributes(span.attributes),
+                                "status": (
+                                    {"code": 2, "message": span.error} if span.error else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPSpanExporter(SpanExporter):
+    """Post spans in batches to an OTLP/HTTP collector, as JSON, from a background thread.
+
+    Spans are dropped rather than slowing the traced code down when the collector is
+    unreachable or the buffer is full.
+
+    Args:
+        service (str): ``service.name`` of the exported spans.
+        endpoint (str): Traces endpoint of the collector.
+        headers (dict, optional): Extra request headers, e.g. credentials.
+        batch_size (int): Spans sent per request at most.
+        interval (float): Seconds between two flushes of a partial batch.
+        max_queue (int): Spans buffered at most.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        endpoint: str = DEFAULT_OTLP_ENDPOINT,
+        headers: Optional[dict[str, str]] = None,
+        batch_size: int = 256,
+        interval: float = 1.0,
+        max_queue: int = 4096,
+    ):
+        self.service = service
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self._client = httpx.Client(headers=headers, timeout=5.0)
+        self._queue: queue.Queue[Optional[Span]] = queue.Queue(maxsize=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        """Buffer the span for the next batch."""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: list[Span] = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._send(batch)
+
+    def _send(self, batch: list[Span]) -> None:
+        try:
+            response = self._client.post(self.endpoint, json=otlp_payload(batch, self.service))
+            response.raise_for_status()
+            self.exported += len(batch)
+        except httpx.HTTPError:
+            self.dropped += len(batch)
+
+    def shutdown(self) -> None:
+        """Send the buffered spans and stop the background thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._client.close()
+
+
+class Tracer:
+    """Create spans of one service and hand the ended ones to an exporter.
+
+    The span of the running operation is kept in a context variable, so spans started in
+    the same task or thread nest under it, and its ``traceparent`` carries the trace over
+    to other processes.
+
+    Args:
+        service (str): Name of the traced service.
+        exporter (SpanExporter, optional): Destination of ended spans; without one, spans
+            are still created and propagated but not recorded.
+    """
+
+    def __init__(self, service: str, exporter: Optional[SpanExporter] = None):
+        self.service = service
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls, service: str) -> "Tracer":
+        """Build a tracer from the ``TRACE_*`` environment variables.
+
+        ``TRACE_EXPORTER`` is ``none`` (default), ``jsonl`` to append spans to
+        ``TRACE_FILE`` or ``otlp`` to post them to ``TRACE_OTLP_ENDPOINT``.
+        """
+        kind = os.getenv("TRACE_EXPORTER", "none").lower()
+        exporter: Optional[SpanExporter] = None
+        if kind == "jsonl":
+            exporter = JSONLSpanExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+        elif kind == "otlp":
+            exporter = OTLPSpanExporter(
+                service, os.getenv("TRACE_OTLP_ENDPOINT", DEFAULT_OTLP_ENDPOINT)
+            )
+        elif kind not in ("", "none"):
+            raise ValueError(f"Unknown TRACE_EXPORTER {kind!r}, expected none, jsonl or otlp")
+        if exporter is not None:
+            atexit.register(exporter.shutdown)
+        return cls(service, exporter)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded."""
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        traceparent: Optional[str] = None,
+        kind: str = "internal",
+        attributes: Optional[dict[str, Any]] = None,
+    ) -> Span:
+        """Start a span, to be ended with `Span.end`, without making it current.
+
+        Args:
+            name (str): Operation name.
+            parent (Span, optional): Parent span, defaults to the current span.
+            traceparent (str, optional): ``traceparent`` of a remote parent, used when
+                there is no local one.
+            kind (str): ``internal``, ``server`` or ``client``.
+            attributes (dict, optional): Initial attributes.
+
+        Returns:
+            The started span.
+        """
+        parent = parent or current_span.get()
+        remote = parse_traceparent(traceparent) if parent is None else None
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        elif remote is not None:
+            trace_id, parent_id = remote
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(
+            name,
+            trace_id,
+            secrets.token_hex(8),
+            parent_id=parent_id,
+            kind=kind,
+            attributes=dict(attributes or {}),
+            tracer=self,
+        )
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        traceparent: Optional[str] = None,
+        kind: str = "internal",
+        attributes: Optional[dict[str, Any]] = None,
+    ) -> Iterator[Span]:
+        """Run the body in a new current span, ended when the body exits.
+
+        Takes the arguments of `start_span`. An exception escaping the body marks the span
+        as failed and is re-raised.
+        """
+        span = self.start_span(name, parent, traceparent, kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def inject(self, span: Optional[Span] = None) -> dict[str, str]:
+        """``traceparent`` entry continuing the trace under ``span`` or the current span."""
+        span = span or current_span.get()
+        return {"traceparent": span.traceparent} if span is not None else {}
+
+    def export(self, span: Span) -> None:
+        """Hand an ended span to the exporter."""
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def shutdown(self) -> None:
+        """Flush and close the exporter."""
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+class TracingTransport(TransportLayer):
+    """Record a client span per HTTP request and pass the trace on as ``traceparent``.
+
+    Placed outermost, the span covers cache lookups, batching, retries and failover.
+
+    Args:
+        tracer (Tracer): Tracer recording the spans.
+        inner (httpx.AsyncBaseTransport, optional): Transport sending the requests.
+    """
+
+    def __init__(self, tracer: Tracer, inner: Optional[httpx.AsyncBaseTransport] = None):
+        super().__init__(inner)
+        self.tracer = tracer
+        self.requests = 0
+        self.errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request inside a span, tagged with its method, path and status."""
+        self.requests += 1
+        attributes = {
+            "http.request.method": request.method,
+            "url.path": request.url.path,
+            "server.address": request.url.host,
+        }
+        with self.tracer.span(
+            f"{request.method} {request.url.path}", kind="client", attributes=attributes
+        ) as span:
+            request.headers["traceparent"] = span.traceparent
+            try:
+                response = await self.inner.handle_async_request(request)
+            except Exception:
+                self.errors += 1
+                raise
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:  # noqa: PLR2004
+                self.errors += 1
+                span.error = f"HTTP {response.status_code}"
+            return response
+
+    def stats(self) -> dict[str, Any]:
+        """Traced request and error counters."""
+        return {"requests": self.requests, "errors": self.errors}
@@ -0,0 +1,274 @@
+import os
+from dataclasses import dataclass, fields
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+TRUTHY = ("1", "true", "yes", "on")
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool, timeout and retry settings for the ELK HTTP client.
+
+    Every field can be set from an ``ELK_MCP_HTTP_<FIELD>`` environment variable,
+    e.g. ``ELK_MCP_HTTP_MAX_CONNECTIONS=200``; tuples are comma-separated.
+
+    Args:
+        max_connections (int): Maximum number of open connections.
+        max_keepalive_connections (int): Maximum number of idle connections kept alive.
+        keepalive_expiry (float): Seconds before an idle connection is closed.
+        http2 (bool): Negotiate HTTP/2, requires the ``h2`` package (``httpx[http2]``).
+        connect_timeout (float): Seconds to establish a connection.
+        read_timeout (float): Seconds to wait for a chunk of the response.
+        write_timeout (float): Seconds to send a chunk of the request.
+        pool_timeout (float): Seconds to wait for a free connection from the pool.
+        retries (int): Retries of idempotent requests after a failure, 0 disables them.
+        retry_backoff (float): Multiplier of the jittered exponential backoff in seconds.
+        retry_max_backoff (float): Maximum backoff between two attempts in seconds.
+        retry_statuses (tuple of int): Response statuses that are retried.
+        idempotent_methods (tuple of str): Methods that are always safe to retry.
+        idempotent_paths (tuple of str): Globs of read-only ``POST`` endpoints, e.g. searches.
+        node_selector (str): How requests are spread over several nodes, ``round_robin`` or
+            ``least_loaded`` (fewest requests in flight).
+        sniff (bool): Discover the cluster nodes, for servers that support it.
+        sniff_interval (float): Seconds between two node discoveries.
+        health_check_interval (float): Seconds between two probes of the dead nodes.
+        dead_backoff (float): Seconds a failing node stays out of rotation, doubled on
+            every consecutive failure.
+        max_dead_backoff (float): Maximum time a failing node stays out of rotation.
+
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_max_backoff: float = 2.0
+    retry_statuses: tuple[int, ...] = (429, 502, 503, 504)
+    idempotent_methods: tuple[str, ...] = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+    idempotent_paths: tuple[str, ...] = (
+        "*/_search",
+        "*/_msearch",
+        "*/_count",
+        "*/_mget",
+        "*/_field_caps",
+    )
+    node_selector: str = "round_robin"
+    sniff: bool = False
+    sniff_interval: float = 60.0
+    health_check_interval: float = 5.0
+    dead_backoff: float = 1.0
+    max_dead_backoff: float = 30.0
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "TransportConfig":
+        """Build a config from ``ELK_MCP_HTTP_*`` variables, then apply ``overrides``."""
+        values: dict[str, Any] = {}
+        for field in fields(cls):
+            raw = os.getenv(f"ELK_MCP_HTTP_{field.name.upper()}")
+            if raw is None:
+                continue
+            default = field.default
+            if isinstance(default, bool):
+                values[field.name] = raw.lower() in TRUTHY
+            elif isinstance(default, tuple):
+                cast = type(default[0]) if default else str
+                values[field.name] = tuple(cast(v.strip()) for v in raw.split(",") if v.strip())
+            else:
+                values[field.name] = type(default)(raw)
+        values.update(overrides)
+        return cls(**values)
+
+    @property
+    def limits(self) -> httpx.Limits:
+        """Connection pool limits."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        """Per-phase request timeouts."""
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def is_idempotent(self, request: httpx.Request) -> bool:
+        """Whether ``request`` can be sent again without side effects."""
+        if request.method in self.idempotent_methods:
+            return True
+        return any(fnmatchcase(request.url.path, pattern) for pattern in self.idempotent_paths)
+
+
+class TransportLayer(httpx.AsyncBaseTransport):
+    """Base class for transports that wrap another transport.
+
+    Layers are stacked around the connection pool by `build_transport`, the outermost
+    layer being the first to see a request.
+    """
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Forward the request to the wrapped transport."""
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the wrapped transport."""
+        if self.inner is not None:
+            await self.inner.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        """Counters exposed by this layer."""
+        return {}
+
+
+class RetryTransport(TransportLayer):
+    """Retry idempotent requests on transport errors and retryable statuses.
+
+    Attempts are spaced by a randomly jittered exponential backoff so that concurrent
+    sessions do not retry in lockstep against a struggling node.
+    """
+
+    def __init__(self, config: TransportConfig, inner: Optional[httpx.AsyncBaseTransport] = None):
+        super().__init__(inner)
+        self.config = config
+        self.requests = 0
+        self.in_flight = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request, retrying it when allowed."""
+        self.requests += 1
+        self.in_flight += 1
+        # Requests sent with `timeout=None` would otherwise wait forever on a hung node
+        timeouts = request.extensions.get("timeout", {})
+        defaults = self.config.timeout.as_dict()
+        request.extensions["timeout"] = {
+            phase: timeouts.get(phase) if timeouts.get(phase) is not None else default
+            for phase, default in defaults.items()
+        }
+        try:
+            if self.config.retries <= 0 or not self.config.is_idempotent(request):
+                return await self.inner.handle_async_request(request)
+            return await self._send_with_retries(request)
+        except httpx.TransportError:
+            self.failures += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def _send_with_retries(self, request: httpx.Request) -> httpx.Response:
+        statuses = self.config.retry_statuses
+
+        async def _before_sleep(state: RetryCallState) -> None:
+            self.retries += 1
+            if state.outcome is not None and not state.outcome.failed:
+                # Release the connection of the response that is thrown away
+                await state.outcome.result().aclose()
+
+        def _last_response(state: RetryCallState) -> httpx.Response:
+            return state.outcome.result()
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.config.retries + 1),
+            wait=wait_random_exponential(
+                multiplier=self.config.retry_backoff, max=self.config.retry_max_backoff
+            ),
+            retry=(
+                retry_if_exception_type(httpx.TransportError)
+                | retry_if_result(lambda response: response.status_code in statuses)
+            ),
+            before_sleep=_before_sleep,
+            retry_error_callback=_last_response,
+            reraise=True,
+        )
+        return await retrying(self.inner.handle_async_request, request)
+
+    def stats(self) -> dict[str, Any]:
+        """Request, retry and failure counters."""
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+def build_transport(
+    config: TransportConfig,
+    *layers: TransportLayer,
+    balancer: Optional[TransportLayer] = None,
+) -> tuple[httpx.AsyncBaseTransport, httpx.AsyncHTTPTransport]:
+    """Stack ``layers``, retries and an optional balancer around a pooled HTTP transport.
+
+    The balancer sits below the retries so that a retried request can go to another node.
+
+    Args:
+        config (TransportConfig): Pool, timeout and retry settings.
+        *layers (TransportLayer): Extra layers, outermost first.
+        balancer (TransportLayer, optional): Layer routing requests to several nodes.
+
+    Returns:
+        The outermost transport and the pooled transport at the bottom of the stack.
+    """
+    pool = httpx.AsyncHTTPTransport(limits=config.limits, http2=config.http2)
+    transport: httpx.AsyncBaseTransport = pool
+    if balancer is not None:
+        balancer.inner = transport
+        transport = balancer
+    transport = RetryTransport(config, transport)
+    for layer in reversed(layers):
+        layer.inner = transport
+        transport = layer
+    return transport, pool
+
+
+def iter_layers(transport: Optional[httpx.AsyncBaseTransport]) -> list[TransportLayer]:
+    """List the layers of a transport stack, outermost first."""
+    layers = []
+    while isinstance(transport, TransportLayer):
+        layers.append(transport)
+        transport = transport.inner
+    return layers
+
+
+def pool_stats(transport: httpx.AsyncHTTPTransport) -> dict[str, int]:
+    """Snapshot of the connections and queued requests of a pooled transport."""
+    pool = transport._pool
+    connections = pool.connections
+    requests = list(getattr(pool, "_requests", []))
+    queued = sum(1 for request in requests if request.is_queued())
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "requests": len(requests) - queued,
+        "queued": queued,
+        "max_connections": pool._max_connections,
+        "max_keepalive_connections": pool._max_keepalive_connections,
+    }
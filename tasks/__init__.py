@@ -7,6 +7,7 @@
 from invoke.collection import Collection
 
 from . import (
+    benchmarks,
     checks,
     cleans,
     commits,
@@ -26,6 +27,7 @@ ns = Collection()
 
 # %% COLLECTIONS
 
+ns.add_collection(Collection.from_module(benchmarks))
 ns.add_collection(Collection.from_module(checks))
 ns.add_collection(Collection.from_module(cleans))
 ns.add_collection(Collection.from_module(commits))
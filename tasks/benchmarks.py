@@ -0,0 +1,41 @@
+"""Benchmark tasks for pyinvoke."""
+
+# %% IMPORTS
+
+from invoke.context import Context
+from invoke.tasks import task
+
+# %% TASKS
+
+
+@task
+def startup(ctx: Context, synthetic: int = 0) -> None:
+    """Compare server startup from the OpenAPI spec and from a registry snapshot."""
+    options = f"--synthetic={synthetic}" if synthetic else ""
+    ctx.run(f"PYTHONPATH=src poetry run python benchmarks/startup.py {options}")
+
+
+@task
+def mcp_client(ctx: Context, concurrency: int = 8) -> None:
+    """Compare the per-search overhead of a new MCP connection and of the pooled client."""
+    ctx.run(f"poetry run python benchmarks/mcp_client.py --concurrency={concurrency}")
+
+
+@task
+def load_test(ctx: Context, sessions: int = 50, questions: int = 5) -> None:
+    """Drive concurrent chat sessions through the agent, MCP server and a stub Elasticsearch."""
+    ctx.run(
+        "poetry run python benchmarks/load_test.py "
+        f"--sessions={sessions} --questions={questions}"
+    )
+
+
+@task
+def rerank(ctx: Context, candidates: str = "25,50,100,200") -> None:
+    """Measure the time spent reranking search candidates locally, per search."""
+    ctx.run(f"PYTHONPATH=src poetry run python benchmarks/rerank.py --candidates={candidates}")
+
+
+@task(pre=[startup, mcp_client, load_test, rerank], default=True)
+def all(_: Context) -> None:
+    """Run all benchmark tasks."""
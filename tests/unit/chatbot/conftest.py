@@ -0,0 +1,42 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+# The chatbot modules import each other by module name, as when run from `chatbot/`
+sys.path.insert(0, str(Path(__file__).parents[3] / "chatbot"))
+
+from fast_path import FastPathClassifier, PathRecorder
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from session_store import Session, SessionStore
+
+
+class FakeAgent:
+    """Agent answering every question with one answer."""
+
+    def __init__(self):
+        self.questions = []
+
+    def run(self, query: str, callbacks=None) -> str:
+        """Record the question."""
+        self.questions.append(query)
+        return "Agent answer"
+
+
+@pytest.fixture()
+def agent_module(monkeypatch: pytest.MonkeyPatch):
+    """The `langchain_agent` module with a fake LLM, fast path on and `FakeAgent` sessions."""
+    for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_DEPLOYMENT", "OPENAI_API_VERSION"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1")
+    monkeypatch.setenv("CONTEXT_PACKING", "false")
+    module = importlib.import_module("langchain_agent")
+    agent = FakeAgent()
+    monkeypatch.setattr(module, "fast_path", FastPathClassifier())
+    monkeypatch.setattr(module, "path_recorder", PathRecorder())
+    monkeypatch.setattr(module, "llm", FakeListChatModel(responses=["Direct answer"]))
+    monkeypatch.setattr(
+        module, "sessions", SessionStore(lambda: Session(module.build_memory(), agent))
+    )
+    return module, agent
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from context_packer import ContextPacker, excerpt, flatten
+
+# An unknown encoding fails fast into the four-characters-per-token estimate
+ENCODING = "offline"
+
+
+def _response(*hits: dict, total: int = None) -> str:
+    total = len(hits) if total is None else total
+    return json.dumps({"hits": {"total": {"value": total}, "hits": list(hits)}})
+
+
+def _hit(doc_id: str, score: float, **source) -> dict:
+    return {"_index": "content-jira", "_id": doc_id, "_score": score, "_source": source}
+
+
+@pytest.fixture()
+def packer():
+    return ContextPacker(token_budget=200, field_tokens=40, encoding=ENCODING)
+
+
+def test_flatten_drops_vectors_and_empty_values():
+    source = {
+        "title": "VPN  setup",
+        "embedding": [0.1] * 16,
+        "owner": {"name": "Ops", "email": ""},
+        "labels": ["vpn", None, "network"],
+        "comments": [{"body": "first"}, {"body": "second"}],
+    }
+
+    assert list(flatten(source)) == [
+        ("title", "VPN setup"),
+        ("owner.name", "Ops"),
+        ("labels", "vpn, network"),
+        ("comments.body", "first"),
+        ("comments.body", "second"),
+    ]
+
+
+def test_excerpt_is_centered_on_the_first_term():
+    text = "filler " * 50 + "the vpn gateway " + "filler " * 50
+
+    cut = excerpt(text, ["vpn"], 60)
+
+    assert cut.startswith("… ")
+    assert cut.endswith(" …")
+    assert "vpn gateway" in cut
+    assert excerpt("short", ["vpn"], 60) == "short"
+
+
+def test_pack_ranks_hits_and_keeps_the_total(packer: ContextPacker):
+    text = _response(
+        _hit("low", 1.0, title="Old notes"),
+        _hit("high", 5.0, title="VPN setup", embedding=[0.0] * 32),
+        total=42,
+    )
+
+    packed = packer.pack(text, "vpn setup")
+
+    assert packed.splitlines()[0] == "Showing 2 of 42 hits."
+    assert packed.index("content-jira/high") < packed.index("content-jira/low")
+    assert "embedding" not in packed
+
+
+def test_pack_truncates_fields_and_stops_at_the_budget(packer: ContextPacker):
+    hits = [_hit(f"doc-{i}", 10.0 - i, title=f"Doc {i}", body="word " * 200) for i in range(10)]
+
+    packed = packer.pack(_response(*hits), "word")
+
+    assert packer.counter.count(packed) <= packer.token_budget + 20
+    body = next(line for line in packed.splitlines() if line.startswith("body: "))
+    assert len(body) <= len("body: ") + packer.field_tokens * 4
+    assert packed.splitlines()[0] == f"Showing {packed.count('[')} of 10 hits."
+    assert "doc-9" not in packed
+
+
+def test_pack_cuts_the_first_hit_rather_than_dropping_everything():
+    packer = ContextPacker(token_budget=20, field_tokens=400, encoding=ENCODING)
+
+    packed = packer.pack(_response(_hit("big", 1.0, body="word " * 400)), "word")
+
+    assert packed.startswith("Showing 1 of 1 hits.")
+    assert packed.endswith(" …")
+
+
+def test_pack_truncates_text_that_is_not_a_search_response(packer: ContextPacker):
+    packed = packer.pack("error " * 1000, "vpn")
+
+    assert packer.counter.count(packed) <= packer.token_budget
+    assert packer.stats()["hits_in"] == 0
+
+
+def test_stats(packer: ContextPacker):
+    text = _response(*(_hit(f"doc-{i}", 1.0, body="word " * 200) for i in range(10)))
+    packer.pack(text, "word")
+
+    stats = packer.stats()
+
+    assert (stats["calls"], stats["hits_in"]) == (1, 10)
+    assert stats["tokens_saved"] == stats["tokens_in"] - stats["tokens_out"] > 0
+    assert 0 < stats["saved_ratio"] < 1
@@ -0,0 +1,107 @@
+import pytest
+from fast_path import FastPathClassifier, PathRecorder, search_terms
+from index_router import WILDCARD, Route
+
+
+@pytest.fixture()
+def classifier():
+    return FastPathClassifier()
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["what is the travel expense policy", "who owns the search service"],
+)
+def test_classify_lookups(classifier: FastPathClassifier, query: str):
+    decision = classifier.classify(query)
+
+    assert decision.path == "fast"
+    assert decision.confidence >= classifier.threshold
+
+
+@pytest.mark.parametrize(
+    ("query", "has_history", "reason"),
+    [
+        ("", False, "empty"),
+        ("what is " + "very " * 20 + "long", False, "long"),
+        ("what is alpha? and beta?", False, "several questions"),
+        ("who owns the search service and what is its status", False, "several questions"),
+        ("what changed in OPS-1 and OPS-2", False, "several tickets"),
+        ("compare project alpha and project beta", False, "multi-hop"),
+        ("who owns it", True, "follow-up"),
+        ("how many tickets did each team close per sprint", False, "multi-hop"),
+    ],
+)
+def test_classify_sends_the_rest_to_the_agent(
+    classifier: FastPathClassifier, query: str, has_history: bool, reason: str
+):
+    decision = classifier.classify(query, has_history)
+
+    assert (decision.path, decision.reason) == ("agent", reason)
+
+
+def test_follow_up_words_without_history_are_lookups(classifier: FastPathClassifier):
+    assert classifier.classify("what is the status of the database migration").fast
+
+
+def test_search_terms_drop_stopwords_and_query_syntax():
+    assert search_terms("What is project alpha?") == "project alpha"
+    assert search_terms('Who is assigned to "OPS-1234"?') == "assigned OPS-1234"
+    assert search_terms("status of the *login* bug") == "status login bug"
+    assert search_terms("what is it?") == "it"
+
+
+def test_path_recorder_stats():
+    recorder = PathRecorder()
+    recorder.record("fast", 0.2, 1)
+    recorder.record("fast", 0.4, 1)
+    recorder.record("fallback", 1.0, 3)
+
+    stats = recorder.stats()
+
+    assert list(stats) == ["fallback", "fast"]
+    assert stats["fast"]["questions"] == 2  # noqa: PLR2004
+    assert stats["fast"]["mean_llm_calls"] == 1.0
+    assert stats["fast"]["mean_ms"] == pytest.approx(300)
+    assert stats["fast"]["p95_ms"] == pytest.approx(200)
+    assert stats["fallback"]["llm_calls"] == 3  # noqa: PLR2004
+
+
+class FakeSearch:
+    """Search tool answering every query with one output."""
+
+    def __init__(self, output: str):
+        self.output = output
+        self.queries = []
+
+    def invoke(self, query: str, config=None) -> str:
+        """Record the query searched."""
+        self.queries.append(query)
+        return self.output
+
+
+def test_lookup_is_answered_from_one_search(agent_module, monkeypatch: pytest.MonkeyPatch):
+    module, agent = agent_module
+    search = FakeSearch("Showing 1 of 1 hits.\n\n[1] content-sharepoint/1\ntitle: Travel")
+    monkeypatch.setattr(module, "tools", [search])
+
+    answer = module.run_question("What is the travel expense policy?")
+
+    assert answer == "Direct answer"
+    assert search.queries == ["travel expense policy"]
+    assert agent.questions == []
+    assert module.get_path_stats()["fast"]["llm_calls"] == 1
+
+
+def test_lookup_without_hits_falls_back_to_the_agent(agent_module, monkeypatch: pytest.MonkeyPatch):
+    module, agent = agent_module
+    route = Route((WILDCARD,), "disabled")
+    empty = module.search_output(route, '{"hits": {"total": 0, "hits": []}}', "policy", 0.0)
+    monkeypatch.setattr(module, "tools", [FakeSearch(empty)])
+
+    answer = module.run_question("What is the travel expense policy?")
+
+    assert empty == module.NO_RESULTS
+    assert answer == "Agent answer"
+    assert agent.questions == ["What is the travel expense policy?"]
+    assert list(module.get_path_stats()) == ["fallback"]
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+import pytest
+from history_store import HistoryStore
+
+
+@pytest.fixture()
+def store(tmp_path: Path):
+    store = HistoryStore(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+@pytest.fixture()
+def history_json(tmp_path: Path) -> Path:
+    path = tmp_path / "chat_history.json"
+    conversations = {
+        "a": {
+            "id": "a",
+            "title": "VPN",
+            "created_at": "2024-01-01T10:00:00",
+            "last_updated": "2024-01-01T10:05:00",
+            "messages": [
+                {
+                    "timestamp": "2024-01-01T10:00:00",
+                    "user_message": "q1",
+                    "assistant_response": "r1",
+                },
+                {
+                    "timestamp": "2024-01-01T10:05:00",
+                    "user_message": "q2",
+                    "assistant_response": "r2",
+                },
+            ],
+        },
+        "b": {"title": "Travel", "created_at": "2024-01-02T09:00:00", "messages": []},
+    }
+    path.write_text(json.dumps(conversations))
+    return path
+
+
+def test_migrate_json_imports_once_and_keeps_the_file(store: HistoryStore, history_json: Path):
+    assert store.migrate_json(history_json) == 2  # noqa: PLR2004
+
+    assert history_json.exists()
+    assert [m["user_message"] for m in store.load_messages("a")] == ["q1", "q2"]
+    assert store.get_conversation("b")["last_updated"] == "2024-01-02T09:00:00"
+    assert store.migrate_json(history_json) == 0
+
+    conversations = json.loads(history_json.read_text())
+    conversations["c"] = {"title": "New", "created_at": "2024-01-03T09:00:00"}
+    history_json.write_text(json.dumps(conversations))
+    assert store.migrate_json(history_json) == 1
+    assert store.get_conversation("a")["message_count"] == 2  # noqa: PLR2004
+
+
+def test_from_env_imports_the_json_history(
+    tmp_path: Path, history_json: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("CHAT_HISTORY_DB", str(tmp_path / "env.db"))
+    monkeypatch.setenv("CHAT_HISTORY_JSON", str(history_json))
+    store = HistoryStore.from_env()
+    store.close()
+
+    store = HistoryStore.from_env()
+
+    assert len(store.list_conversations()) == 2  # noqa: PLR2004
+    assert store.get_conversation("a")["message_count"] == 2  # noqa: PLR2004
+    store.close()
+
+
+def test_load_messages_pages_back_from_the_latest(store: HistoryStore):
+    for i in range(5):
+        store.append("a", f"q{i}", f"r{i}")
+
+    page = store.load_messages("a", limit=2)
+    assert [m["user_message"] for m in page] == ["q3", "q4"]
+    page = store.load_messages("a", limit=2, before=page[0]["id"])
+    assert [m["user_message"] for m in page] == ["q1", "q2"]
+    page = store.load_messages("a", limit=2, before=page[0]["id"])
+    assert [m["user_message"] for m in page] == ["q0"]
+
+
+def test_list_conversations_pages_by_last_update(store: HistoryStore, history_json: Path):
+    store.migrate_json(history_json)
+    store.append("c", "a long first question " * 10, "answer")
+
+    page = store.list_conversations(limit=2)
+    assert [c["id"] for c in page] == ["c", "b"]
+    assert page[0]["title"] == ("a long first question " * 10)[:60]
+    page = store.list_conversations(limit=2, before=page[-1]["last_updated"])
+    assert [c["id"] for c in page] == ["a"]
+
+
+def test_delete_conversation_deletes_its_messages(store: HistoryStore):
+    store.append("a", "q", "r")
+
+    store.delete_conversation("a")
+
+    assert store.get_conversation("a") is None
+    assert store.load_messages("a") == []
@@ -0,0 +1,62 @@
+import pytest
+from index_router import WILDCARD, IndexRouter, Route, shard_fan_out
+
+
+@pytest.fixture()
+def router():
+    return IndexRouter()
+
+
+@pytest.mark.parametrize(
+    ("query", "indices"),
+    [
+        ("list the open bugs in the current sprint", ("content-jira",)),
+        ("explain the deployment runbook", ("content-confluence",)),
+        ("what is the travel expense policy", ("content-sharepoint",)),
+    ],
+)
+def test_route_confident_questions(router: IndexRouter, query: str, indices: tuple):
+    route = router.route(query)
+
+    assert route.indices == indices
+    assert route.confidence >= router.threshold
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "what is ISO-27001",
+        "what can GPT-4 do",
+        "Q3-2024 revenue",
+        "COVID-19 guidance",
+        "who owns the billing service",
+        "what is project alpha",
+    ],
+)
+def test_route_falls_back_to_wildcard_without_evidence(router: IndexRouter, query: str):
+    assert router.route(query).indices == (WILDCARD,)
+
+
+def test_ticket_key_adds_jira_without_deciding_alone(router: IndexRouter):
+    route = router.route("ISO-27001 travel expense policy")
+
+    assert route.indices == ("content-jira", "content-sharepoint")
+    assert route.reason == "classifier + ticket key"
+    assert router.route("status of OPS-1234").indices == ("content-jira",)
+
+
+def test_route_without_keyword_requirement():
+    router = IndexRouter(min_keywords=0, threshold=0.5)
+
+    assert router.route("how many holidays do employees get").indices == ("content-sharepoint",)
+
+
+def test_stats_and_shard_fan_out(router: IndexRouter):
+    route = Route(("content-jira",), "classifier")
+    router.record(route, shard_fan_out('{"_shards": {"total": 3}}'), 0.02)
+    router.record(route, shard_fan_out("not json"), 0.04)
+
+    stats = router.stats()["content-jira"]
+    assert stats["searches"] == 2  # noqa: PLR2004
+    assert stats["mean_shards"] == 1.5  # noqa: PLR2004
+    assert stats["mean_ms"] == pytest.approx(30)
@@ -0,0 +1,139 @@
+from pathlib import Path
+
+import llm_cache
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+from llm_cache import SQLiteLLMCache
+
+LLM = "azure-gpt-4o, temperature=0"
+
+
+class Clock:
+    """Replacement of the `time` module, moved by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        """Current fake time."""
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+def _generations(text: str) -> list:
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def _entry_size(tmp_path: Path) -> int:
+    cache = SQLiteLLMCache(tmp_path / "size.db")
+    cache.update("prompt", LLM, _generations("x" * 100))
+    return cache.stats()["bytes"]
+
+
+def test_lookup_returns_cached_generations_and_counts_hits(tmp_path: Path, clock: Clock):
+    cache = SQLiteLLMCache(tmp_path / "cache.db")
+
+    assert cache.lookup("prompt", LLM) is None
+    cache.update("prompt", LLM, _generations("answer"))
+
+    assert cache.lookup("prompt", LLM) == _generations("answer")
+    assert cache.lookup("prompt", "other model") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_ratio"] == pytest.approx(1 / 3)
+
+
+def test_entries_expire_after_the_ttl(tmp_path: Path, clock: Clock):
+    cache = SQLiteLLMCache(tmp_path / "cache.db", ttl=60)
+    cache.update("old", LLM, _generations("old answer"))
+    cache.update("recent", LLM, _generations("recent answer"))
+
+    clock.now += 61
+    assert cache.lookup("old", LLM) is None
+    cache.update("new", LLM, [Generation(text="new answer")])
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["expirations"]) == (1, 2)
+    assert stats["bytes"] == SQLiteLLMCache(tmp_path / "cache.db").stats()["bytes"]
+    assert cache.lookup("new", LLM) == [Generation(text="new answer")]
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(tmp_path: Path, clock: Clock):
+    size = _entry_size(tmp_path)
+    cache = SQLiteLLMCache(tmp_path / "cache.db", max_bytes=2 * size)
+    cache.update("a", LLM, _generations("a" * 100))
+    clock.now += 1
+    cache.update("b", LLM, _generations("b" * 100))
+    clock.now += 1
+    assert cache.lookup("a", LLM) is not None
+
+    clock.now += 1
+    cache.update("c", LLM, _generations("c" * 100))
+
+    assert cache.lookup("b", LLM) is None
+    assert cache.lookup("a", LLM) is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * size, 1)
+
+
+def test_replacing_an_entry_counts_its_new_size_only(tmp_path: Path, clock: Clock):
+    cache = SQLiteLLMCache(tmp_path / "cache.db")
+    cache.update("prompt", LLM, _generations("short"))
+    cache.update("prompt", LLM, _generations("a much longer answer"))
+
+    reopened = SQLiteLLMCache(tmp_path / "cache.db")
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == reopened.stats()["bytes"]
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_generations_larger_than_max_bytes_are_not_cached(tmp_path: Path):
+    cache = SQLiteLLMCache(tmp_path / "cache.db", max_bytes=10)
+
+    cache.update("prompt", LLM, _generations("answer"))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_hits_do_not_use_the_beta_load_api(tmp_path: Path, recwarn: pytest.WarningsRecorder):
+    cache = SQLiteLLMCache(tmp_path / "cache.db")
+    chunk = ChatGenerationChunk(message=AIMessageChunk(content="streamed"))
+    cache.update("prompt", LLM, [chunk, Generation(text="plain", generation_info={"n": 1})])
+
+    hit = cache.lookup("prompt", LLM)
+
+    assert [g.text for g in hit] == ["streamed", "plain"]
+    assert isinstance(hit[0].message, AIMessageChunk)
+    assert hit[1].generation_info == {"n": 1}
+    assert not [w for w in recwarn if "beta" in str(w.message)]
+
+
+def test_entries_of_an_older_format_are_misses(tmp_path: Path):
+    cache = SQLiteLLMCache(tmp_path / "cache.db")
+    cache.update("prompt", LLM, _generations("answer"))
+    cache._db.execute("UPDATE llm_cache SET value = '[\"{}\"]'")
+
+    assert cache.lookup("prompt", LLM) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    assert SQLiteLLMCache.from_env() is None
+    monkeypatch.setenv("LLM_CACHE", "true")
+    monkeypatch.setenv("LLM_CACHE_DB", str(tmp_path / "env.db"))
+    monkeypatch.setenv("LLM_CACHE_TTL", "0")
+
+    cache = SQLiteLLMCache.from_env()
+
+    assert cache.ttl is None
+    assert cache.path == str(tmp_path / "env.db")
@@ -0,0 +1,94 @@
+import asyncio
+from typing import ClassVar
+
+import httpx
+import mcp_client
+import pytest
+from mcp_client import MCPClientPool, MCPConnection
+
+
+class HangingClient:
+    """MCP client whose session never finishes initializing."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.exited = False
+
+    async def __aenter__(self):
+        await asyncio.Event().wait()
+
+    async def __aexit__(self, *exc_info):
+        self.exited = True
+
+
+def test_open_timeout_cancels_the_holder_task(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(mcp_client, "Client", HangingClient)
+    connection = MCPConnection("http://localhost:8000/sse")
+
+    async def _open():
+        with pytest.raises(asyncio.TimeoutError):
+            await connection.open(timeout=0.01)
+        # Cancelled before returning, not left for the loop to clean up
+        assert connection._task.cancelled()
+
+    asyncio.run(_open())
+
+    assert not connection.connected
+
+
+class FakeClient:
+    """MCP client whose session opens at once, numbered in opening order."""
+
+    opened: ClassVar[list] = []
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def __aenter__(self):
+        FakeClient.opened.append(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture()
+def pool(monkeypatch: pytest.MonkeyPatch):
+    FakeClient.opened = []
+    monkeypatch.setattr(mcp_client, "Client", FakeClient)
+    pool = MCPClientPool(size=1, call_timeout=0.05)
+    yield pool
+    pool.close()
+
+
+def test_broken_session_is_replaced_and_the_call_retried(pool, monkeypatch: pytest.MonkeyPatch):
+    async def call_tool(client, name, arguments, meta=None):
+        if client is FakeClient.opened[0]:
+            raise httpx.RemoteProtocolError("Server disconnected")
+        return f"{name} on session {FakeClient.opened.index(client)}"
+
+    monkeypatch.setattr(mcp_client, "call_tool_with_meta", call_tool)
+
+    assert pool.call_tool("search", {}) == "search on session 1"
+    assert pool.stats() == {
+        "sessions": 1,
+        "in_flight": 0,
+        "calls": 1,
+        "connects": 2,
+        "reconnects": 1,
+    }
+
+
+def test_slow_call_times_out_without_closing_its_session(pool, monkeypatch: pytest.MonkeyPatch):
+    async def call_tool(client, name, arguments, meta=None):
+        if name == "slow":
+            await asyncio.sleep(1)
+        return name
+
+    monkeypatch.setattr(mcp_client, "call_tool_with_meta", call_tool)
+
+    with pytest.raises(asyncio.TimeoutError):
+        pool.call_tool("slow", {})
+    assert pool.call_tool("fast", {}) == "fast"
+    stats = pool.stats()
+    assert (stats["sessions"], stats["connects"], stats["reconnects"]) == (1, 1, 0)
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from scheduler import AgentScheduler, Overloaded
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_free_slots_start_questions_at_once():
+    async def _test():
+        scheduler = AgentScheduler(max_concurrent=2)
+        first, second = scheduler.submit("alice"), scheduler.submit("bob")
+
+        assert first.future.done()
+        assert second.future.done()
+        assert (scheduler.running, scheduler.waiting) == (2, 0)
+
+    _run(_test())
+
+
+def test_waiting_questions_are_dispatched_round_robin_across_users():
+    async def _test():
+        scheduler = AgentScheduler(max_concurrent=1, max_queued_per_user=3)
+        running = scheduler.submit("alice")
+        burst = [scheduler.submit("alice") for _ in range(3)]
+        bob = scheduler.submit("bob")
+
+        assert [scheduler.position(t) for t in [*burst, bob]] == [1, 3, 4, 2]
+        order = []
+        ticket = running
+        for _ in range(4):
+            scheduler.release(ticket)
+            ticket = next(t for t in [*burst, bob] if t.future.done() and t not in order)
+            order.append(ticket)
+
+        assert order == [burst[0], bob, burst[1], burst[2]]
+        assert scheduler.position(bob) == 0
+
+    _run(_test())
+
+
+def test_full_queues_reject_with_overloaded():
+    async def _test():
+        scheduler = AgentScheduler(max_concurrent=1, max_queue=3, max_queued_per_user=2)
+        scheduler.submit("alice")
+        scheduler.submit("alice")
+        scheduler.submit("alice")
+        with pytest.raises(Overloaded):
+            scheduler.submit("alice")
+        scheduler.submit("bob")
+        with pytest.raises(Overloaded):
+            scheduler.submit("carol")
+
+        assert (scheduler.waiting, scheduler.rejected) == (3, 2)
+
+    _run(_test())
+
+
+def test_cancelled_waiter_is_withdrawn_from_the_queue():
+    async def _test():
+        scheduler = AgentScheduler(max_concurrent=1, update_interval=0.01)
+        running = scheduler.submit("alice")
+
+        async def _wait():
+            async with scheduler.slot("bob"):
+                pytest.fail("the cancelled question must not run")
+
+        waiter = asyncio.create_task(_wait())
+        await asyncio.sleep(0.02)
+        assert scheduler.waiting == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert scheduler.waiting == 0
+        scheduler.release(running)
+        assert scheduler.running == 0
+
+    _run(_test())
+
+
+def test_wait_is_counted_apart_from_run_time():
+    async def _test():
+        scheduler = AgentScheduler(max_concurrent=1, update_interval=0.01)
+        positions = []
+
+        async def _on_queued(position):
+            positions.append(position)
+
+        async def _question(seconds):
+            async with scheduler.slot("alice", _on_queued) as ticket:
+                await asyncio.sleep(seconds)
+            return ticket
+
+        first, second = await asyncio.gather(_question(0.1), _question(0.01))
+
+        assert first.wait_seconds < 0.05  # noqa: PLR2004
+        assert second.wait_seconds >= 0.09  # noqa: PLR2004
+        assert second.run_seconds < 0.09  # noqa: PLR2004
+        assert positions == [1]
+        stats = scheduler.stats()
+        assert (stats["admitted"], stats["queued"], stats["running"]) == (2, 1, 0)
+        assert stats["mean_wait_seconds"] == pytest.approx(
+            (first.wait_seconds + second.wait_seconds) / 2
+        )
+
+    _run(_test())
@@ -0,0 +1,51 @@
+from session_store import Session, SessionStore
+
+
+class FakeMemory:
+    """Window memory holding its messages in a list."""
+
+    k = 1
+
+    def __init__(self):
+        self.chat_memory = self
+        self.messages = []
+
+
+def _store(**kwargs) -> SessionStore:
+    return SessionStore(lambda: Session(FakeMemory(), agent=None), **kwargs)
+
+
+def test_get_creates_sessions_and_evicts_the_least_recently_used():
+    store = _store(max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    assert store.get("a") is first
+
+    store.get("c")
+
+    assert (store.peek("a"), store.peek("b")) == (first, None)
+    assert (store.created, store.evicted_lru) == (3, 1)
+
+
+def test_peek_neither_creates_nor_touches_sessions():
+    store = _store(max_sessions=2)
+    store.get("a")
+    store.get("b")
+
+    assert store.peek("unknown") is None
+    store.peek("a")
+    store.get("c")
+
+    assert store.peek("a") is None
+    assert store.stats()["sessions"] == 2  # noqa: PLR2004
+
+
+def test_memory_stats_and_clear_do_not_create_sessions(agent_module):
+    module, _ = agent_module
+
+    stats = module.get_memory_stats("unknown")
+    module.clear_memory("unknown")
+
+    assert stats["chat_memory_length"] == 0
+    assert stats["sessions"]["sessions"] == 0
+    assert module.sessions.peek("unknown") is None
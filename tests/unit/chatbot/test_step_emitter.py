@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from step_emitter import REASONING_FALLBACK, ReasoningExtractor, StepEmitter, TokenBuffer, UIStats
+
+
+class Sink:
+    """Send callback recording every update."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, text: str):
+        """Record one update."""
+        self.sent.append(text)
+
+
+def test_token_buffer_coalesces_writes_within_the_interval():
+    sink = Sink()
+
+    async def _run():
+        buffer = TokenBuffer(sink, flush_interval=0.05)
+        for token in ("Hel", "lo", ", ", "world"):
+            await buffer.write(token)
+        assert sink.sent == []
+        await asyncio.sleep(0.1)
+        await buffer.write("!")
+        await buffer.close()
+
+    asyncio.run(_run())
+
+    assert sink.sent == ["Hello, world", "!"]
+
+
+def test_token_buffer_without_interval_sends_every_write():
+    sink = Sink()
+
+    async def _run():
+        buffer = TokenBuffer(sink, flush_interval=0)
+        await buffer.write("a")
+        await buffer.write("")
+        await buffer.write("b")
+
+    asyncio.run(_run())
+
+    assert sink.sent == ["a", "b"]
+
+
+def test_token_buffer_discard_drops_the_queued_text():
+    sink = Sink()
+
+    async def _run():
+        buffer = TokenBuffer(sink, flush_interval=0.05)
+        await buffer.write("draft")
+        await buffer.discard()
+        await asyncio.sleep(0.1)
+        await buffer.write("final")
+        await buffer.close()
+        await buffer.close()
+
+    asyncio.run(_run())
+
+    assert sink.sent == ["final"]
+
+
+def test_token_buffer_close_cancels_the_timer():
+    sink = Sink()
+
+    async def _run():
+        buffer = TokenBuffer(sink, flush_interval=10)
+        await buffer.write("a")
+        await buffer.write("b")
+        await buffer.close()
+        assert buffer._timer is None
+
+    asyncio.run(_run())
+
+    assert sink.sent == ["ab"]
+
+
+class FakeStep:
+    """Chainlit step recording how it is opened, streamed and closed."""
+
+    def __init__(self):
+        self.output = ""
+        self.events = []
+
+    async def __aenter__(self):
+        self.events.append(("open", self.output))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.events.append(("close", self.output))
+
+    async def stream_token(self, token: str):
+        """Record a streamed token."""
+        self.output += token
+        self.events.append(("token", token))
+
+
+def test_step_emitter_opens_the_step_with_its_first_text():
+    step, stats = FakeStep(), UIStats()
+
+    async def _run():
+        emitter = StepEmitter(step, stats, flush_interval=10)
+        await emitter.write("Searching ")
+        await emitter.write("content-*")
+        await emitter.close()
+        await emitter.write("ignored")
+
+    asyncio.run(_run())
+
+    assert step.events == [("open", "Searching content-*"), ("close", "Searching content-*")]
+    assert stats.messages == 2  # noqa: PLR2004
+
+
+def _extract(tokens: list[str]) -> tuple[str, ReasoningExtractor]:
+    extractor = ReasoningExtractor()
+    text = "".join(extractor.feed(token) for token in tokens)
+    return text + extractor.finish(), extractor
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        ["Thought: I should search the wiki.\nAction: search"],
+        ["Th", "ought", ": I should sear", "ch the wiki.\nAc", "tion: search"],
+        ["T", "h", "o", "u", "g", "h", "t", ":", " I should search the wiki.", "\n", "A", "ction:"],
+        ["THOUGHT: I should search the wiki.\nACTION: search"],
+    ],
+)
+def test_reasoning_extractor_handles_markers_split_across_tokens(tokens: list[str]):
+    text, extractor = _extract(tokens)
+
+    assert text == "• I should search the wiki. \n"
+    assert extractor.found
+
+
+def test_reasoning_extractor_shows_every_thought_but_not_short_ones():
+    text, _ = _extract(
+        [
+            "Thought: ok\nAction: search\nObservation: 3 hits\n",
+            "Thought: The policy allows economy flights.\nFinal ",
+            "Answer: Economy only.",
+        ]
+    )
+
+    assert text == "• The policy allows economy flights. \n"
+
+
+def test_reasoning_extractor_falls_back_to_the_first_sentence():
+    text, extractor = _extract(["Action: search. ", "The wiki", " covers VPN setup. More."])
+
+    assert not extractor.found
+    assert text == "The wiki covers VPN setup\n"
+    assert _extract(["Short."])[0] == f"{REASONING_FALLBACK}\n"
@@ -2,6 +2,7 @@ import pytest
 from typing_extensions import override
 
 from elastic.mcp.fastmcp.servers import ELKFastMCPOpenAPI
+from elastic.mcp.fastmcp.tracing import SpanExporter
 
 
 class DummyFastMCPOpenAPIServer(ELKFastMCPOpenAPI):
@@ -20,6 +21,17 @@ class DummyFastMCPOpenAPIServer(ELKFastMCPOpenAPI):
         return "TEST_ELK_URL"
 
 
+class MemoryExporter(SpanExporter):
+    """Exporter keeping the ended spans in a list."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        """Keep the span."""
+        self.spans.append(span)
+
+
 @pytest.fixture()
 def dummy_openapi_spec():
     return {
@@ -61,7 +73,14 @@ def dummy_openapi_spec():
 
 
 @pytest.fixture()
-def dummy_mcp(dummy_openapi_spec):
+def elk_env(monkeypatch):
+    """Fixture setting the environment variables of the dummy server."""
+    monkeypatch.setenv("TEST_ELK_URL", "http://localhost:9200")
+    monkeypatch.setenv("ELASTIC_API_KEY", "test_api_key")
+
+
+@pytest.fixture()
+def dummy_mcp(elk_env, dummy_openapi_spec):
     """Fixture for a dummy FastMCP OpenAPI server."""
     server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec)
     return server
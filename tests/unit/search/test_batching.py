@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+from elastic.mcp.fastmcp.search import MSearchBatcher, SearchCache
+from elastic.mcp.fastmcp.search.batching import to_msearch_item
+
+
+class MSearchElasticsearch(httpx.AsyncBaseTransport):
+    """Transport answering ``_msearch`` and ``_search`` with the query of each search."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.requests = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Echo the index and query of every search."""
+        self.requests.append(request)
+        if self.status != httpx.codes.OK:
+            return httpx.Response(self.status, json={"error": "unavailable"})
+        if request.url.path == "/_msearch":
+            lines = [json.loads(line) for line in request.content.decode().splitlines()]
+            responses = []
+            for header, body in zip(lines[::2], lines[1::2], strict=False):
+                if header["index"] == "missing":
+                    responses.append({"error": {"type": "index_not_found"}, "status": 404})
+                else:
+                    responses.append({"index": header["index"], "body": body, "status": 200})
+            return httpx.Response(200, json={"responses": responses})
+        body = json.loads(request.content) if request.content else {}
+        return httpx.Response(200, json={"index": request.url.path.split("/")[1], "body": body})
+
+
+async def _search_concurrently(batcher: MSearchBatcher, *searches: tuple) -> list[httpx.Response]:
+    async with httpx.AsyncClient(transport=batcher, base_url="http://es") as client:
+        return await asyncio.gather(
+            *(client.post(path, json=body, params=params) for path, body, params in searches)
+        )
+
+
+@pytest.fixture
+def es():
+    return MSearchElasticsearch()
+
+
+def test_concurrent_searches_share_an_msearch(es: MSearchElasticsearch):
+    batcher = MSearchBatcher(max_wait=0.05, inner=es)
+    searches = [
+        ("/content-jira/_search", {"query": {"match_all": {}}}, {}),
+        ("/content-*/_search", {}, {"q": "vpn", "size": "3"}),
+        ("/missing/_search", {}, {}),
+    ]
+
+    responses = asyncio.run(_search_concurrently(batcher, *searches))
+
+    assert [r.status_code for r in responses] == [200, 200, 404]
+    assert responses[0].json() == {"index": "content-jira", "body": {"query": {"match_all": {}}}}
+    assert responses[1].json()["body"] == {"query": {"query_string": {"query": "vpn"}}, "size": 3}
+    assert [r.url.path for r in es.requests] == ["/_msearch"]
+    assert batcher.stats()["batch_sizes"] == {len(searches): 1}
+
+
+def test_max_batch_size_splits_batches(es: MSearchElasticsearch):
+    batcher = MSearchBatcher(max_batch_size=2, max_wait=0.05, inner=es)
+    searches = [("/content-*/_search", {"from": i}, {}) for i in range(5)]
+
+    responses = asyncio.run(_search_concurrently(batcher, *searches))
+
+    assert [r.json()["body"]["from"] for r in responses] == list(range(5))
+    assert batcher.stats()["batch_sizes"] == {1: 1, 2: 2}
+    assert batcher.stats()["msearches"] == len([[0, 1], [2, 3]])
+
+
+def test_single_search_is_sent_as_is(es: MSearchElasticsearch):
+    batcher = MSearchBatcher(max_wait=0, inner=es)
+
+    (response,) = asyncio.run(_search_concurrently(batcher, ("/content-*/_search", {}, {})))
+
+    assert response.json() == {"index": "content-*", "body": {}}
+    assert [r.url.path for r in es.requests] == ["/content-*/_search"]
+
+
+def test_failed_msearch_reaches_every_caller():
+    batcher = MSearchBatcher(max_wait=0.05, inner=MSearchElasticsearch(status=503))
+    searches = [("/content-*/_search", {"from": i}, {}) for i in range(2)]
+
+    responses = asyncio.run(_search_concurrently(batcher, *searches))
+
+    assert [r.status_code for r in responses] == [503, 503]
+
+
+def test_transport_error_reaches_every_caller(es: MSearchElasticsearch):
+    class Down(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            """Fail every request."""
+            raise httpx.ConnectError("down", request=request)
+
+    batcher = MSearchBatcher(max_wait=0.05, inner=Down())
+
+    async def _run():
+        async with httpx.AsyncClient(transport=batcher, base_url="http://es") as client:
+            searches = [client.post("/content-*/_search", json={"from": i}) for i in range(2)]
+            return await asyncio.gather(*searches, return_exceptions=True)
+
+    assert all(isinstance(r, httpx.ConnectError) for r in asyncio.run(_run()))
+
+
+@pytest.mark.parametrize(
+    "content", [b'{"responses": [{"status": 200}]}', b'{"error": "oops"}', b"not json"]
+)
+def test_malformed_msearch_fails_every_caller(content: bytes):
+    class Malformed(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            """Answer with ``content``."""
+            return httpx.Response(200, content=content)
+
+    batcher = MSearchBatcher(max_wait=0.05, inner=Malformed())
+
+    async def _run():
+        async with httpx.AsyncClient(transport=batcher, base_url="http://es") as client:
+            searches = [client.post("/content-*/_search", json={"from": i}) for i in range(3)]
+            return await asyncio.wait_for(asyncio.gather(*searches, return_exceptions=True), 1)
+
+    assert all(isinstance(r, httpx.DecodingError) for r in asyncio.run(_run()))
+
+
+def test_unbatchable_searches_are_forwarded(es: MSearchElasticsearch):
+    batcher = MSearchBatcher(max_wait=0.05, inner=es)
+
+    asyncio.run(_search_concurrently(batcher, ("/content-*/_search", {}, {"scroll": "1m"})))
+
+    assert batcher.stats()["unbatchable"] == 1
+    assert es.requests[0].url.params["scroll"] == "1m"
+
+
+def test_to_msearch_item():
+    request = httpx.Request(
+        "POST",
+        "http://es/content-*/_search",
+        params={"routing": "a", "from": "5"},
+        json={"query": {"match_all": {}}},
+    )
+    assert to_msearch_item(request) == (
+        {"index": "content-*", "routing": "a"},
+        {"query": {"match_all": {}}, "from": 5},
+    )
+    both = httpx.Request("POST", "http://es/_search", params={"q": "x"}, json={"query": {}})
+    assert to_msearch_item(both) is None
+
+
+def test_server_stacks_cache_above_batcher(elk_env, dummy_openapi_spec: dict):
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec,
+        search_cache=SearchCache(),
+        search_batcher=MSearchBatcher(),
+    )
+
+    assert list(server.transport_stats())[:4] == [
+        "SearchCache",
+        "MSearchBatcher",
+        "MetricsTransport",
+        "RetryTransport",
+    ]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+from elastic.mcp.fastmcp.search import SearchCache
+from elastic.mcp.fastmcp.search.keys import canonical_body, index_pattern
+
+
+class CountingElasticsearch(httpx.AsyncBaseTransport):
+    """Transport answering searches with a counter and stats with a settable doc count."""
+
+    def __init__(self):
+        self.searches = 0
+        self.docs = 10
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer ``_stats`` with the doc count and searches with the search number."""
+        if "/_stats/" in request.url.path:
+            payload = {"_all": {"primaries": {"docs": {"count": self.docs}}}}
+        else:
+            self.searches += 1
+            payload = {"search": self.searches}
+        return httpx.Response(200, json=payload)
+
+
+def _search(cache: SearchCache, *bodies: dict, path: str = "/content-*/_search") -> list[dict]:
+    async def _run():
+        async with httpx.AsyncClient(transport=cache, base_url="http://es") as client:
+            responses = [await client.post(path, json=body) for body in bodies]
+        return [response.json() for response in responses]
+
+    return asyncio.run(_run())
+
+
+@pytest.fixture
+def es():
+    return CountingElasticsearch()
+
+
+def test_equal_queries_share_an_entry(es: CountingElasticsearch):
+    cache = SearchCache(inner=es)
+    query = {"query": {"match": {"title": "vpn"}}, "size": 5}
+    reordered = {"size": 5, "query": {"match": {"title": "vpn"}}}
+
+    results = _search(cache, query, reordered, {"query": {"match_all": {}}})
+
+    assert results == [{"search": 1}, {"search": 1}, {"search": 2}]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_index_pattern_is_part_of_the_key(es: CountingElasticsearch):
+    cache = SearchCache(inner=es)
+    _search(cache, {}, path="/content-jira/_search")
+    _search(cache, {}, path="/content-*/_search")
+
+    assert es.searches == len(["content-jira", "content-*"])
+
+
+def test_lru_eviction(es: CountingElasticsearch):
+    cache = SearchCache(max_entries=2, inner=es)
+    first, second, third = {"from": 0}, {"from": 10}, {"from": 20}
+
+    _search(cache, first, second, first, third, first)
+
+    assert es.searches == len([first, second, third])  # `second` was evicted, not `first`
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget(es: CountingElasticsearch):
+    size = len(json.dumps({"search": 1}, separators=(",", ":")))
+    cache = SearchCache(max_bytes=size * 2, inner=es)
+
+    _search(cache, {"from": 0}, {"from": 10}, {"from": 20})
+
+    assert cache.stats()["entries"] == len([{"from": 10}, {"from": 20}])
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_ttl_expiry(es: CountingElasticsearch):
+    cache = SearchCache(ttl=0, inner=es)
+
+    assert _search(cache, {}, {}) == [{"search": 1}, {"search": 2}]
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidates_when_doc_count_changes(es: CountingElasticsearch):
+    cache = SearchCache(invalidate_on_change=True, check_interval=0, inner=es)
+
+    assert _search(cache, {}, {}) == [{"search": 1}, {"search": 1}]
+    es.docs += 1
+    assert _search(cache, {}) == [{"search": 2}]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_skips_writes_and_no_cache_requests(es: CountingElasticsearch):
+    cache = SearchCache(inner=es)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=cache, base_url="http://es") as client:
+            await client.post("/content-jira/_doc", json={})
+            await client.post("/content-jira/_doc", json={})
+            headers = {"Cache-Control": "no-cache"}
+            await client.post("/content-*/_search", json={}, headers=headers)
+
+    asyncio.run(_run())
+    assert cache.stats()["entries"] == 0
+
+
+def test_helpers():
+    assert canonical_body(b'{"b": 1, "a": [1, 2]}') == '{"a":[1,2],"b":1}'
+    assert canonical_body(b'{"index": "x"}\n{}\n') == '{"index": "x"}\n{}\n'
+    assert index_pattern("/content-*/_search") == "content-*"
+    assert index_pattern("/_search") == "_all"
+
+
+def test_server_uses_cache(elk_env, dummy_openapi_spec: dict):
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec, search_cache=SearchCache(ttl=5)
+    )
+
+    assert list(server.transport_stats()) == [
+        "SearchCache",
+        "MetricsTransport",
+        "RetryTransport",
+        "pool",
+    ]
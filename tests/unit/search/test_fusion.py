@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from elastic.mcp.fastmcp.search import MultiQuerySearch, reciprocal_rank_fusion
+from elastic.mcp.fastmcp.search.fusion import query_variants
+
+
+def _hit(doc_id: str, index: str = "content-jira") -> dict:
+    return {"_index": index, "_id": doc_id, "_score": 1.0, "_source": {"title": doc_id}}
+
+
+# Ids ranked by each variant, recognized by the shape of its query
+RANKINGS = {
+    "simple_query_string": ["a", "b", "c"],
+    "multi_match": ["b", "d"],
+}
+
+
+def _ranking(body: dict) -> list[dict]:
+    clause = body["query"]
+    if "simple_query_string" in clause and clause["simple_query_string"]["query"].startswith('"'):
+        return [_hit("c"), _hit("b")]
+    return [_hit(doc_id) for doc_id in RANKINGS[next(iter(clause))]]
+
+
+class RankingElasticsearch(httpx.AsyncBaseTransport):
+    """Transport answering every variant with a fixed ranking."""
+
+    def __init__(self, failing: tuple[str, ...] = (), unreachable: tuple[str, ...] = ()):
+        self.failing = failing
+        self.unreachable = unreachable
+        self.requests = []
+
+    def _item(self, body: dict) -> dict:
+        if next(iter(body["query"])) in self.failing:
+            return {"error": {"type": "search_phase_execution_exception"}, "status": 400}
+        hits = _ranking(body)
+        return {"took": 3, "_shards": {"total": 2}, "hits": {"total": {"value": 7}, "hits": hits}}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer ``_msearch`` with one item per search, ``_search`` with one response."""
+        self.requests.append(request)
+        if request.url.path == "/_msearch":
+            lines = [json.loads(line) for line in request.content.decode().splitlines()]
+            return httpx.Response(200, json={"responses": [self._item(b) for b in lines[1::2]]})
+        body = json.loads(request.content)
+        if next(iter(body["query"])) in self.unreachable:
+            raise httpx.ConnectError("Connection refused", request=request)
+        item = self._item(body)
+        return httpx.Response(item.pop("status", 200), json=item)
+
+
+def _search(es: RankingElasticsearch, **kwargs) -> dict:
+    async def _run():
+        async with httpx.AsyncClient(transport=es, base_url="http://es") as client:
+            return await MultiQuerySearch(client, **kwargs).search("vpn setup", size=3)
+
+    return asyncio.run(_run())
+
+
+def test_query_variants():
+    queries = query_variants('vpn "setup"', alternatives=["remote access"])
+
+    assert list(queries) == ["lexical", "phrase", "boosted", "alternative_1"]
+    assert queries["phrase"]["simple_query_string"]["query"] == '"vpn setup"~3'
+    assert queries["boosted"]["multi_match"]["fields"][0] == "title^3"
+    assert queries["alternative_1"]["simple_query_string"]["query"] == "remote access"
+    with pytest.raises(ValueError, match="semantic"):
+        query_variants("vpn", variants=["semantic"])
+
+
+def test_reciprocal_rank_fusion_deduplicates_and_rewards_agreement():
+    fused = reciprocal_rank_fusion(
+        {"lexical": [_hit("a"), _hit("b")], "boosted": [_hit("b"), _hit("c")]},
+        size=2,
+        rank_constant=1,
+    )
+
+    assert [hit["_id"] for hit in fused] == ["b", "a"]
+    assert fused[0]["_score"] == pytest.approx(1 / 3 + 1 / 2)
+    assert fused[0]["_ranks"] == {"lexical": 2, "boosted": 1}
+
+
+def test_variants_are_sent_as_one_msearch():
+    es = RankingElasticsearch()
+
+    result = _search(es)
+
+    assert [r.url.path for r in es.requests] == ["/_msearch"]
+    header = json.loads(es.requests[0].content.decode().splitlines()[0])
+    assert header == {"index": "content-*"}
+    assert [hit["_id"] for hit in result["hits"]["hits"]] == ["b", "c", "a"]
+    assert result["_shards"]["total"] == 6  # noqa: PLR2004
+    assert result["fusion"]["variants"]["phrase"] == {"status": 200, "hits": 2, "took": 3}
+
+
+def test_failed_variants_are_reported():
+    es = RankingElasticsearch(failing=("multi_match",))
+
+    result = _search(es, use_msearch=False)
+
+    assert len(es.requests) == len(query_variants("vpn"))
+    assert result["fusion"]["variants"]["boosted"]["status"] == httpx.codes.BAD_REQUEST
+    assert "d" not in [hit["_id"] for hit in result["hits"]["hits"]]
+
+
+def test_every_variant_failing_raises():
+    es = RankingElasticsearch(failing=("simple_query_string", "multi_match"))
+
+    with pytest.raises(httpx.HTTPStatusError, match="Every query variant failed"):
+        _search(es)
+
+
+def test_failed_variant_requests_are_reported():
+    es = RankingElasticsearch(unreachable=("multi_match",))
+
+    result = _search(es, use_msearch=False)
+
+    report = result["fusion"]["variants"]["boosted"]
+    assert report == {"status": None, "error": "ConnectError: Connection refused"}
+    assert [hit["_id"] for hit in result["hits"]["hits"]] == ["c", "b", "a"]
+
+
+def test_every_variant_request_failing_raises():
+    es = RankingElasticsearch(unreachable=("simple_query_string", "multi_match"))
+
+    with pytest.raises(httpx.ConnectError):
+        _search(es, use_msearch=False)
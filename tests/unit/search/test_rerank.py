@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+from elastic.mcp.fastmcp.search import Reranker, SearchCache, SearchReranker
+from elastic.mcp.fastmcp.search.rerank import FEATURES, RerankWeights, query_terms, query_text
+
+DAY = 86400
+
+
+def _hit(doc_id: str, index: str = "content-jira", **source) -> dict:
+    return {"_index": index, "_id": doc_id, "_score": 1.0, "_source": source}
+
+
+def _features(hits: list[dict], query: str = "vpn setup guide", **kwargs) -> dict:
+    matrix = Reranker(**kwargs).features(query_terms(query), hits, now=1000 * DAY)
+    return {name: matrix[:, i].tolist() for i, name in enumerate(FEATURES)}
+
+
+def test_query_terms_and_text():
+    assert query_terms("How is the VPN set up, the VPN?") == ["vpn", "set", "up"]
+    assert query_terms("what is it") == ["what", "is", "it"]
+    query = {
+        "bool": {
+            "must": [{"match": {"title": "vpn"}}, {"match": {"body": {"query": "setup"}}}],
+            "should": [{"multi_match": {"query": "guide", "fields": ["*"]}}],
+            "filter": [{"term": {"status": "open"}}],
+        }
+    }
+    assert query_text(query) == "vpn setup guide"
+
+
+def test_features():
+    hits = [
+        _hit("scattered", body="vpn " + "filler " * 20 + "setup " + "filler " * 20 + "guide"),
+        _hit("close", index="content-confluence", title="VPN guide", body="the vpn setup guide"),
+        _hit("dated", body="nothing relevant", updated="1970-09-28T00:00:00Z"),
+    ]
+
+    features = _features(hits, priors={"content-": 0.1, "content-confluence": 0.5})
+
+    assert features["proximity"] == pytest.approx([0.0, 1.0, 0.0])
+    assert features["coverage"][:2] == pytest.approx([1.0, 1.0])
+    assert features["title"] == pytest.approx([0.0, 2 / 3, 0.0], rel=0.01)
+    assert features["recency"] == pytest.approx([0.0, 0.0, 0.5 ** (730 / 180)])
+    assert features["prior"] == [0.1, 0.5, 0.1]
+    assert features["es_rank"] == pytest.approx([1.0, 2 / 3, 1 / 3])
+    # The short hit matching every term outscores the long one
+    assert features["bm25"][1] > features["bm25"][0] > features["bm25"][2] == 0.0
+
+
+def test_rerank_returns_best_hits():
+    hits = [_hit(f"filler-{i}", body="unrelated text") for i in range(20)]
+    hits.append(_hit("answer", title="VPN setup guide", body="how to set up the vpn"))
+
+    best = Reranker().rerank("vpn setup guide", hits, size=3)
+
+    assert len(best) == 3  # noqa: PLR2004
+    assert best[0]["_id"] == "answer"
+    assert best[0]["_es_score"] == 1.0
+    assert best[0]["_score"] > best[1]["_score"]
+    assert Reranker().rerank("?", hits, size=2) == hits[:2]
+
+
+def test_weights():
+    weights = RerankWeights.parse("recency=0, proximity=1.5")
+
+    assert (weights.recency, weights.proximity, weights.bm25) == (0.0, 1.5, 1.0)
+    with pytest.raises(ValueError, match="semantic"):
+        RerankWeights.parse("semantic=1")
+
+
+class CandidateElasticsearch(httpx.AsyncBaseTransport):
+    """Transport answering searches with as many hits as asked, the answer last."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer with ``size`` hits."""
+        self.requests.append(request)
+        body = json.loads(request.content) if request.content else {}
+        size = int(body.get("size", request.url.params.get("size", 10)))
+        hits = [_hit(f"filler-{i}", body="unrelated text") for i in range(size - 1)]
+        hits.append(_hit("answer", title="VPN setup guide", updated=time.time()))
+        return httpx.Response(200, json={"took": 2, "hits": {"max_score": 1.0, "hits": hits}})
+
+
+def _send(reranker: SearchReranker, path: str, **kwargs) -> dict:
+    async def _run():
+        async with httpx.AsyncClient(transport=reranker, base_url="http://es") as client:
+            return (await client.post(path, **kwargs)).json()
+
+    return asyncio.run(_run())
+
+
+def test_search_reranker_fetches_candidates_and_keeps_size():
+    es = CandidateElasticsearch()
+    reranker = SearchReranker(candidates=50, inner=es)
+
+    body = {"query": {"match": {"title": "vpn setup"}}, "size": 5}
+    result = _send(reranker, "/content-*/_search", json=body)
+
+    assert json.loads(es.requests[0].content)["size"] == 50  # noqa: PLR2004
+    assert len(result["hits"]["hits"]) == 5  # noqa: PLR2004
+    assert result["hits"]["hits"][0]["_id"] == "answer"
+    assert result["hits"]["max_score"] == result["hits"]["hits"][0]["_score"]
+    result = _send(reranker, "/content-*/_search", params={"q": "vpn"})
+    assert es.requests[1].url.params["size"] == "50"
+    assert len(result["hits"]["hits"]) == 10  # noqa: PLR2004
+    stats = reranker.stats()
+    assert (stats["searches"], stats["reranked"], stats["mean_candidates"]) == (2, 2, 50)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"query": {"match": {"title": "vpn"}}, "sort": [{"updated": "desc"}]},
+        {"query": {"match": {"title": "vpn"}}, "from": 10},
+        {"query": {"term": {"status": "open"}}},
+        {"query": {"match": {"title": "vpn"}}, "size": 0, "aggs": {}},
+    ],
+)
+def test_search_reranker_forwards_other_searches(body: dict):
+    es = CandidateElasticsearch()
+    reranker = SearchReranker(inner=es)
+
+    _send(reranker, "/content-*/_search", json=body)
+
+    assert json.loads(es.requests[0].content) == body
+    assert reranker.stats()["reranked"] == 0
+
+
+def test_from_env(monkeypatch: pytest.MonkeyPatch):
+    assert SearchReranker.from_env() is None
+    monkeypatch.setenv("ELK_MCP_RERANK", "true")
+    monkeypatch.setenv("ELK_MCP_RERANK_CANDIDATES", "200")
+    monkeypatch.setenv("ELK_MCP_RERANK_PRIORS", "content-confluence=0.2")
+
+    reranker = SearchReranker.from_env()
+
+    assert reranker.candidates == 200  # noqa: PLR2004
+    assert reranker.reranker.priors == {"content-confluence": 0.2}
+
+
+def test_server_reranks_cached_candidates(elk_env, dummy_openapi_spec: dict):
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec,
+        search_cache=SearchCache(),
+        search_reranker=SearchReranker(),
+    )
+
+    assert list(server.transport_stats())[:2] == ["SearchReranker", "SearchCache"]
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+from elastic.mcp.fastmcp.search import MSearchBatcher, SearchCache, SingleFlight
+
+
+class SlowElasticsearch(httpx.AsyncBaseTransport):
+    """Transport answering after a delay, or failing, and counting the requests."""
+
+    def __init__(self, delay: float = 0.05, error: bool = False):
+        self.delay = delay
+        self.error = error
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Answer with the request number after the delay."""
+        self.requests += 1
+        number = self.requests
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise httpx.ReadTimeout("slow node", request=request)
+        return httpx.Response(200, json={"request": number})
+
+
+def _search(client: httpx.AsyncClient, body: dict):
+    return client.post("/content-*/_search", json=body)
+
+
+def test_identical_searches_share_a_request():
+    es = SlowElasticsearch()
+    single_flight = SingleFlight(inner=es)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=single_flight, base_url="http://es") as client:
+            return await asyncio.gather(
+                _search(client, {"query": {"match": {"title": "vpn"}}, "size": 3}),
+                _search(client, {"size": 3, "query": {"match": {"title": "vpn"}}}),
+                _search(client, {"query": {"match_all": {}}}),
+            )
+
+    responses = asyncio.run(_run())
+
+    assert [r.json()["request"] for r in responses] == [1, 1, 2]
+    assert single_flight.stats() == {
+        "requests": 3,
+        "in_flight": 0,
+        "flights": 2,
+        "deduplicated": 1,
+        "abandoned": 0,
+    }
+
+
+def test_errors_reach_every_caller():
+    single_flight = SingleFlight(inner=SlowElasticsearch(error=True))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=single_flight, base_url="http://es") as client:
+            searches = [_search(client, {}) for _ in range(3)]
+            return await asyncio.gather(*searches, return_exceptions=True)
+
+    results = asyncio.run(_run())
+
+    assert all(isinstance(result, httpx.ReadTimeout) for result in results)
+    assert single_flight.stats()["flights"] == 1
+
+
+def test_cancelling_one_caller_keeps_the_others():
+    es = SlowElasticsearch(delay=0.1)
+    single_flight = SingleFlight(inner=es)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=single_flight, base_url="http://es") as client:
+            first = asyncio.ensure_future(_search(client, {}))
+            second = asyncio.ensure_future(_search(client, {}))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+    assert asyncio.run(_run()).json() == {"request": 1}
+    assert single_flight.stats()["abandoned"] == 0
+
+
+def test_request_is_cancelled_when_every_caller_is_gone():
+    es = SlowElasticsearch(delay=0.1)
+    single_flight = SingleFlight(inner=es)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=single_flight, base_url="http://es") as client:
+            search = asyncio.ensure_future(_search(client, {}))
+            await asyncio.sleep(0.02)
+            search.cancel()
+            await asyncio.sleep(0)
+            # A later identical search does not join the abandoned request
+            return await _search(client, {})
+
+    assert asyncio.run(_run()).json() == {"request": 2}
+    assert single_flight.stats()["abandoned"] == 1
+
+
+def test_server_layer_order(elk_env, dummy_openapi_spec: dict):
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec,
+        search_cache=SearchCache(),
+        single_flight=SingleFlight(),
+        search_batcher=MSearchBatcher(),
+    )
+
+    assert list(server.transport_stats())[:3] == ["SearchCache", "SingleFlight", "MSearchBatcher"]
@@ -1,11 +1,17 @@
+import asyncio
 import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import httpx
 import pytest
+from fastmcp.client import Client
+from mcp import types
+from tests.unit.conftest import DummyFastMCPOpenAPIServer, MemoryExporter
 
+from elastic.mcp.fastmcp.search import SearchCache
 from elastic.mcp.fastmcp.servers import ELKFastMCPOpenAPI
+from elastic.mcp.fastmcp.tracing import Tracer, TracingTransport
 
 
 @pytest.fixture
@@ -74,3 +80,69 @@ def test_get_default_client(elk_mcp: ELKFastMCPOpenAPI):
         client = ELKFastMCPOpenAPI._get_default_client(elk_mcp)
         assert client.base_url == "http://localhost:9200"
         assert client.headers["Authorization"] == f"ApiKey {api_key}"
+
+
+def test_openapi_spec_from_env(
+    monkeypatch: pytest.MonkeyPatch, elk_env: None, dummy_openapi_spec: dict, tmp_path: Path
+):
+    """The spec location falls back to ELK_MCP_OPENAPI_SPEC before the default URL."""
+    spec_path = tmp_path / "openapi.json"
+    spec_path.write_text(json.dumps(dummy_openapi_spec))
+    monkeypatch.setenv("ELK_MCP_OPENAPI_SPEC", str(spec_path))
+    server = DummyFastMCPOpenAPIServer()
+    assert server.registry_source == "spec"
+    assert len(server._tool_manager._tools) == 1
+
+
+def test_custom_client_builds_no_search_layers(
+    monkeypatch: pytest.MonkeyPatch, elk_env: None, dummy_openapi_spec: dict
+):
+    """Search layers only wrap the default client, so none is built for a given one."""
+    monkeypatch.setenv("ELK_MCP_SEARCH_CACHE", "true")
+    monkeypatch.setenv("ELK_MCP_RERANK", "true")
+    client = httpx.AsyncClient(base_url="http://es")
+    server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec, client=client)
+
+    assert (server.search_cache, server.search_reranker) == (None, None)
+    assert (server.search_batcher, server.single_flight) == (None, None)
+    with pytest.raises(ValueError, match="default client"):
+        DummyFastMCPOpenAPIServer(
+            openapi_spec=dummy_openapi_spec, client=client, search_cache=SearchCache()
+        )
+
+
+def test_tool_call_continues_the_trace_of_the_request(elk_env: None, dummy_openapi_spec: dict):
+    """The traceparent in the _meta of tools/call parents the server and HTTP spans."""
+    exporter = MemoryExporter()
+    tracer = Tracer("server", exporter)
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("traceparent"))
+        return httpx.Response(200, json={"message": "printed"})
+
+    http_client = httpx.AsyncClient(
+        base_url="http://es", transport=TracingTransport(tracer, httpx.MockTransport(handler))
+    )
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec, client=http_client, tracer=tracer
+    )
+    caller = Tracer("chatbot").start_span("search-3")
+    tool = next(iter(server._tool_manager._tools))
+
+    async def _call() -> types.CallToolResult:
+        async with Client(server) as client:
+            params = types.CallToolRequestParams(
+                name=tool, arguments={"arg": "x"}, _meta={"traceparent": caller.traceparent}
+            )
+            request = types.ClientRequest(types.CallToolRequest(method="tools/call", params=params))
+            return await client.session.send_request(request, types.CallToolResult)
+
+    result = asyncio.run(_call())
+
+    assert not result.isError
+    http_span, server_span = exporter.spans
+    assert server_span.name == f"tools/call {tool}"
+    assert (server_span.trace_id, server_span.parent_id) == (caller.trace_id, caller.span_id)
+    assert http_span.parent_id == server_span.span_id
+    assert seen == [http_span.traceparent]
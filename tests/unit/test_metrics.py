@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+from fastmcp.client import Client
+from starlette.testclient import TestClient
+
+from elastic.mcp.fastmcp.metrics import (
+    Counter,
+    Histogram,
+    MetricsTransport,
+    ServerMetrics,
+    SSESessionMiddleware,
+    endpoint_label,
+)
+
+
+def test_counter_renders_escaped_labels():
+    counter = Counter("calls_total", "Calls.", ("tool",))
+    counter.inc(tool='say "hi"')
+    counter.inc(2, tool='say "hi"')
+
+    assert counter.render() == [
+        "# HELP calls_total Calls.",
+        "# TYPE calls_total counter",
+        'calls_total{tool="say \\"hi\\""} 3',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("tool",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, tool="search")
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{tool="search",le="0.1"} 1',
+        'latency_seconds_bucket{tool="search",le="1"} 3',
+        'latency_seconds_bucket{tool="search",le="+Inf"} 4',
+        'latency_seconds_sum{tool="search"} 4.25',
+        'latency_seconds_count{tool="search"} 4',
+    ]
+
+
+def test_endpoint_label():
+    assert endpoint_label("/content-*/_search") == "_search"
+    assert endpoint_label("/_msearch") == "_msearch"
+    assert endpoint_label("/content-jira/_doc/1") == "_doc"
+    assert endpoint_label("/") == "/"
+    assert endpoint_label("/content-jira") == "other"
+
+
+def test_metrics_transport_records_took_and_size():
+    metrics = ServerMetrics()
+    body = b'{"took":42,"timed_out":false,"hits":{"hits":[]}}'
+
+    def handler(request):
+        return httpx.Response(200, content=body)
+
+    transport = MetricsTransport(metrics, httpx.MockTransport(handler))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=transport, base_url="http://es") as client:
+            return await client.post("/content-*/_search", json={})
+
+    response = asyncio.run(_run())
+
+    assert response.content == body
+    assert metrics.es_took.count(endpoint="_search") == 1
+    assert metrics.es_response_bytes.count(endpoint="_search") == 1
+    assert metrics.es_duration.count(method="POST", endpoint="_search", status="200") == 1
+    rendered = metrics.render()
+    assert 'elk_mcp_es_took_seconds_sum{endpoint="_search"} 0.042' in rendered
+    assert f'elk_mcp_es_response_bytes_sum{{endpoint="_search"}} {len(body)}' in rendered
+    assert transport.stats() == {"requests": 1, "errors": 0}
+
+
+def test_sse_middleware_counts_open_sessions():
+    metrics = ServerMetrics()
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(metrics.sse_sessions.value())
+
+    middleware = SSESessionMiddleware(app, "/sse", metrics)
+    asyncio.run(middleware({"type": "http", "path": "/sse"}, None, None))
+    asyncio.run(middleware({"type": "http", "path": "/messages/"}, None, None))
+
+    assert seen == [1, 0]
+    assert metrics.sse_sessions.value() == 0
+    assert metrics.sse_connections.value() == 1
+
+
+def test_collect_transport_sets_gauges():
+    metrics = ServerMetrics()
+    metrics.collect_transport(
+        {
+            "NodePool": {
+                "selector": "round_robin",
+                "alive": 2,
+                "nodes": {"http://es1": {"alive": True}},
+            },
+            "pool": {"connections": 3, "queued": 1},
+        }
+    )
+
+    assert metrics.pool.value(state="queued") == 1
+    assert metrics.transport.value(layer="NodePool", stat="alive") == 2  # noqa: PLR2004
+    assert metrics.nodes.value(node="http://es1", stat="alive") == 1
+    assert 'layer="NodePool",stat="selector"' not in metrics.render()
+
+
+def test_server_serves_metrics(dummy_mcp):
+    def handler(request):
+        return httpx.Response(200, json={"message": "printed"})
+
+    dummy_mcp._client._transport.inner.inner = httpx.MockTransport(handler)
+    tool = next(iter(dummy_mcp._tool_manager._tools))
+
+    async def _call():
+        async with Client(dummy_mcp) as client:
+            return await client.call_tool_mcp(tool, {"arg": "x"})
+
+    assert not asyncio.run(_call()).isError
+
+    response = TestClient(dummy_mcp.sse_app()).get("/metrics")
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'elk_mcp_tool_calls_total{{tool="{tool}",status="ok"}} 1' in response.text
+    assert 'elk_mcp_es_request_duration_seconds_count{method="POST",endpoint="other"' in (
+        response.text
+    )
+    assert 'elk_mcp_transport_stat{layer="RetryTransport",stat="requests"} 1' in response.text
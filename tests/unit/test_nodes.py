@@ -0,0 +1,156 @@
+import asyncio
+import json
+import socket
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from elastic.mcp.fastmcp.nodes import NodePool, parse_publish_address
+from elastic.mcp.fastmcp.transport import TransportConfig, build_transport
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+
+class StubNodeHandler(BaseHTTPRequestHandler):
+    """Answer like a minimal Elasticsearch node named after its server."""
+
+    def do_GET(self):
+        """Serve the root, the node list and searches."""
+        if self.path == "/_nodes/http":
+            nodes = {address: {"http": {"publish_address": address}} for address in self.server.peers}
+            self._reply({"nodes": nodes})
+        else:
+            self._reply({"name": self.server.name})
+
+    do_POST = do_GET
+
+    def _reply(self, payload: dict) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def stub_nodes():
+    servers = []
+    for i in range(3):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubNodeHandler)
+        server.name = f"node-{i}"
+        server.peers = []
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address
+    return f"http://{host}:{port}"
+
+
+def _closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def _search_names(pool: NodePool, config: TransportConfig, requests: int) -> Counter:
+    async def _run():
+        transport, _ = build_transport(config, balancer=pool)
+        async with httpx.AsyncClient(transport=transport, base_url="http://seed") as client:
+            responses = [await client.post("/content-*/_search", json={}) for _ in range(requests)]
+        return Counter(response.json()["name"] for response in responses)
+
+    return asyncio.run(_run())
+
+
+@pytest.fixture
+def config():
+    return TransportConfig(retries=2, retry_backoff=0, retry_max_backoff=0, health_check_interval=60)
+
+
+def test_round_robin(stub_nodes, config: TransportConfig):
+    pool = NodePool([_url(server) for server in stub_nodes], config)
+
+    assert _search_names(pool, config, 6) == {"node-0": 2, "node-1": 2, "node-2": 2}
+    assert [node["requests"] for node in pool.stats()["nodes"].values()] == [2, 2, 2]
+
+
+def test_unreachable_node_is_ejected(stub_nodes, config: TransportConfig):
+    dead = _closed_port_url()
+    pool = NodePool([_url(stub_nodes[0]), dead, _url(stub_nodes[1])], config)
+
+    names = _search_names(pool, config, 6)
+
+    assert set(names) == {"node-0", "node-1"}
+    assert sum(names.values()) == len(names) * 3
+    stats = pool.stats()
+    assert stats["alive"] == len(stub_nodes) - 1
+    assert stats["nodes"][dead]["failures"] == 1
+
+
+def test_dead_node_is_probed_back(stub_nodes, config: TransportConfig):
+    pool = NodePool([_url(server) for server in stub_nodes], config)
+    build_transport(config, balancer=pool)
+    node = pool.nodes[1]
+    pool.mark_dead(node)
+    node.dead_until = 0.0  # backoff expired
+
+    asyncio.run(pool.probe_dead_nodes())
+
+    assert node.alive
+    assert node.failures == 0
+
+
+def test_sniffing_discovers_nodes(stub_nodes, config: TransportConfig):
+    seed = stub_nodes[0]
+    seed.peers = [f"es-{i}/{_url(s).removeprefix('http://')}" for i, s in enumerate(stub_nodes[1:])]
+    pool = NodePool([_url(seed)], config, sniff_path="/_nodes/http")
+    build_transport(config, balancer=pool)
+
+    urls = asyncio.run(pool.sniff())
+
+    ports = [server.server_address[1] for server in stub_nodes[1:]]
+    assert urls == [f"http://es-{i}:{port}" for i, port in enumerate(ports)]
+    assert [str(node.url) for node in pool.nodes] == urls
+
+
+def test_least_loaded_selector():
+    pool = NodePool(
+        ["http://a:9200", "http://b:9200", "http://c:9200"],
+        TransportConfig(node_selector="least_loaded"),
+    )
+    pool.nodes[0].in_flight = 3
+    pool.nodes[2].in_flight = 1
+
+    assert pool.select() is pool.nodes[1]
+    pool.nodes[1].in_flight = 5
+    assert pool.select() is pool.nodes[2]
+
+
+def test_parse_publish_address():
+    assert parse_publish_address("10.0.0.1:9200", "https") == "https://10.0.0.1:9200"
+    assert parse_publish_address("es-1/10.0.0.1:9200", "http") == "http://es-1:9200"
+    assert parse_publish_address("[::1]:9200", "http") == "http://[::1]:9200"
+
+
+def test_server_balances_comma_separated_urls(monkeypatch, dummy_openapi_spec: dict):
+    monkeypatch.setenv("TEST_ELK_URL", "http://a:9200, http://b:9200")
+    server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec)
+
+    stats = server.transport_stats()
+    assert list(stats["NodePool"]["nodes"]) == ["http://a:9200", "http://b:9200"]
+    assert server._client.base_url == "http://a:9200"
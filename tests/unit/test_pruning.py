@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+
+from elastic.mcp.fastmcp.pruning import RouteAllowlist, prune_openapi_spec
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+
+@pytest.fixture
+def es_like_spec():
+    def ref(name: str) -> dict:
+        return {"$ref": f"#/components/schemas/{name}"}
+
+    def response(name: str) -> dict:
+        return {"200": {"description": "OK", "content": {"application/json": {"schema": ref(name)}}}}
+
+    index = {"in": "path", "name": "index", "required": True, "schema": {"type": "string"}}
+    hits = {"type": "object", "properties": {"hits": {"type": "array", "items": ref("Hit")}}}
+    api_key = {"type": "apiKey", "in": "header", "name": "Authorization"}
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "ES", "version": "1.0.0"},
+        "paths": {
+            "/{index}/_search": {
+                "parameters": [{"$ref": "#/components/parameters/index"}],
+                "post": {"operationId": "search-3", "responses": response("Hits")},
+                "get": {"operationId": "search-2", "responses": response("Hits")},
+            },
+            "/{index}/_mapping": {
+                "get": {"operationId": "indices-get-mapping-1", "responses": response("Mapping")},
+            },
+            "/_cluster/health": {
+                "get": {
+                    "operationId": "cluster-health",
+                    "tags": ["cluster"],
+                    "responses": response("Health"),
+                },
+            },
+        },
+        "components": {
+            "parameters": {"index": index},
+            "schemas": {
+                "Hits": hits,
+                "Hit": {"type": "object"},
+                "Mapping": {"type": "object"},
+                "Health": {"type": "object"},
+            },
+            "securitySchemes": {"apiKey": api_key},
+        },
+    }
+
+
+def test_prune_by_operation_id(es_like_spec: dict):
+    pruned, report = prune_openapi_spec(es_like_spec, RouteAllowlist(operation_ids=("search-3",)))
+
+    assert list(pruned["paths"]) == ["/{index}/_search"]
+    assert list(pruned["paths"]["/{index}/_search"]) == ["parameters", "post"]
+    assert set(pruned["components"]["schemas"]) == {"Hits", "Hit"}
+    assert "index" in pruned["components"]["parameters"]
+    assert "securitySchemes" in pruned["components"]
+    assert (report.routes_kept, report.routes_removed, report.schemas_removed) == (1, 3, 2)
+    assert report.bytes_removed > 0
+    assert "/_cluster/health" in es_like_spec["paths"]  # input is left untouched
+
+
+def test_prune_by_path_glob_and_tag(es_like_spec: dict):
+    allowlist = RouteAllowlist(paths=("*/_mapping",), tags=("cluster",))
+    pruned, report = prune_openapi_spec(es_like_spec, allowlist)
+
+    assert set(pruned["paths"]) == {"/{index}/_mapping", "/_cluster/health"}
+    assert set(pruned["components"]["schemas"]) == {"Mapping", "Health"}
+    assert "parameters" not in pruned["components"]
+    assert (report.routes_removed, report.components_removed) == (2, 3)
+
+
+def test_server_prunes_spec(elk_env, es_like_spec: dict):
+    allowlist = RouteAllowlist(operation_ids=("search-3", "indices-get-mapping-1"))
+    server = DummyFastMCPOpenAPIServer(openapi_spec=es_like_spec, allowlist=allowlist)
+
+    assert set(server._tool_manager._tools) == {"search-3"}
+    resources = {
+        **server._resource_manager._resources,
+        **server._resource_manager._templates,
+    }
+    assert [r.name for r in resources.values()] == ["indices-get-mapping-1"]
+    assert (server.prune_report.routes_kept, server.prune_report.routes_removed) == (2, 2)
+
+
+def test_allowlist_from_env():
+    env = {"ELK_MCP_ALLOWED_OPERATIONS": "search-3, cat-indices", "ELK_MCP_ALLOWED_TAGS": "cat"}
+    with patch.dict("os.environ", env):
+        assert RouteAllowlist.from_env() == RouteAllowlist(
+            operation_ids=("search-3", "cat-indices"), tags=("cat",)
+        )
+    with patch.dict("os.environ", {}, clear=True):
+        assert RouteAllowlist.from_env() is None
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastmcp.server.openapi import RouteMap, RouteType
+
+from elastic.mcp.fastmcp.registry import dump_registry, load_registry_snapshot
+from elastic.mcp.fastmcp.spec_cache import OpenAPISpecCache
+from tests.unit.conftest import DummyFastMCPOpenAPIServer
+
+
+def test_snapshot_roundtrip(tmp_path: Path, dummy_mcp, dummy_openapi_spec: dict):
+    path = tmp_path / "registry.json"
+    counts = dummy_mcp.save_registry_snapshot(path)
+    assert counts == {"tools": 1, "resources": 0, "templates": 0}
+
+    server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec, registry_snapshot=path)
+    assert server.registry_source == "snapshot"
+    assert dump_registry(server) == dump_registry(dummy_mcp)
+
+
+def test_snapshot_tools_are_callable(tmp_path: Path, dummy_mcp, dummy_openapi_spec: dict):
+    path = tmp_path / "registry.json"
+    dummy_mcp.save_registry_snapshot(path)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"message": json.loads(request.content)["arg"]})
+
+    client = httpx.AsyncClient(base_url="http://localhost", transport=httpx.MockTransport(handler))
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec, client=client, registry_snapshot=path
+    )
+    result = asyncio.run(server._tool_manager.call_tool("post_print", {"arg": "hello"}))
+    assert json.loads(result[0].text) == {"message": "hello"}
+
+
+def test_stale_snapshot_falls_back_to_spec(tmp_path: Path, dummy_mcp, dummy_openapi_spec: dict):
+    path = tmp_path / "registry.json"
+    dummy_mcp.save_registry_snapshot(path)
+
+    route_maps = [RouteMap(methods=["POST"], pattern=r".*", route_type=RouteType.IGNORE)]
+    server = DummyFastMCPOpenAPIServer(
+        openapi_spec=dummy_openapi_spec, route_maps=route_maps, registry_snapshot=path
+    )
+    assert server.registry_source == "spec"
+    assert dump_registry(server)["tools"] == []
+    assert load_registry_snapshot(path)["tools"] == []
+
+
+def test_missing_snapshot_is_compiled(tmp_path: Path, elk_env, dummy_openapi_spec: dict):
+    path = tmp_path / "registry.json"
+    server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec, registry_snapshot=path)
+    assert server.registry_source == "spec"
+
+    server = DummyFastMCPOpenAPIServer(openapi_spec=dummy_openapi_spec, registry_snapshot=path)
+    assert server.registry_source == "snapshot"
+
+
+def test_load_registry_snapshot_rejects_other_versions(tmp_path: Path):
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps({"version": -1, "fingerprint": "x"}))
+    assert load_registry_snapshot(path) is None
+    assert load_registry_snapshot(tmp_path / "missing.json") is None
+
+
+def test_url_spec_snapshot_is_versioned_by_the_spec_cache(
+    tmp_path: Path, elk_env, dummy_openapi_spec: dict
+):
+    path = tmp_path / "registry.json"
+    cache = OpenAPISpecCache(cache_dir=tmp_path / "specs", revalidate=False)
+    response = httpx.Response(
+        200,
+        json=dummy_openapi_spec,
+        request=httpx.Request("GET", "http://localhost/openapi.json"),
+    )
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=response):
+        server = DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+    assert server.registry_source == "spec"
+    assert load_registry_snapshot(path)["fingerprint"] == server._registry_fingerprint
+
+    server = DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+    assert server.registry_source == "snapshot"
+
+    # A new version of the spec makes the snapshot stale
+    cache.store("http://localhost/openapi.json", {**dummy_openapi_spec, "paths": {}})
+    server = DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+    assert server.registry_source == "spec"
+    assert dump_registry(server)["tools"] == []
+
+
+def test_url_spec_snapshot_hit_revalidates_the_spec(
+    tmp_path: Path, elk_env, dummy_openapi_spec: dict
+):
+    path = tmp_path / "registry.json"
+    url = "http://localhost/openapi.json"
+    cache = OpenAPISpecCache(cache_dir=tmp_path / "specs")
+
+    def _response(spec: dict) -> httpx.Response:
+        return httpx.Response(200, json=spec, request=httpx.Request("GET", url))
+
+    with patch(
+        "elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=_response(dummy_openapi_spec)
+    ):
+        DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+        cache.wait()
+
+    # Upstream drops every operation; the snapshot is still served, then revalidated
+    updated = {**dummy_openapi_spec, "paths": {}}
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=_response(updated)):
+        server = DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+        cache.wait()
+    assert server.registry_source == "snapshot"
+    assert len(dump_registry(server)["tools"]) == 1
+
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=_response(updated)):
+        server = DummyFastMCPOpenAPIServer(spec_cache=cache, registry_snapshot=path)
+        cache.wait()
+    assert server.registry_source == "spec"
+    assert dump_registry(server)["tools"] == []
+
+
+def test_url_spec_without_cache_writes_no_snapshot(
+    tmp_path: Path, elk_env, dummy_openapi_spec: dict, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "registry.json"
+    monkeypatch.setenv("ELK_MCP_SPEC_CACHE", "false")
+    response = httpx.Response(
+        200,
+        json=dummy_openapi_spec,
+        request=httpx.Request("GET", "http://localhost/openapi.json"),
+    )
+    with patch("elastic.mcp.fastmcp.servers.elk.httpx.get", return_value=response):
+        server = DummyFastMCPOpenAPIServer(registry_snapshot=path)
+
+    assert server.registry_source == "spec"
+    assert not path.exists()
+    with pytest.raises(ValueError, match="version"):
+        server.save_registry_snapshot(path)
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from elastic.mcp.fastmcp.spec_cache import OpenAPISpecCache
+
+URL = "http://localhost/openapi.yaml"
+
+
+def _response(status_code: int, spec: dict = None, headers: dict = None) -> httpx.Response:
+    return httpx.Response(
+        status_code=status_code,
+        content=json.dumps(spec).encode("utf-8") if spec is not None else b"",
+        headers=headers or {},
+        request=httpx.Request("GET", URL),
+    )
+
+
+def test_load_downloads_then_reads_from_disk(tmp_path: Path, dummy_openapi_spec: dict):
+    cache = OpenAPISpecCache(cache_dir=tmp_path, revalidate=False)
+    response = _response(200, dummy_openapi_spec, {"ETag": '"v1"'})
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=response) as get:
+        assert cache.load(URL) == dummy_openapi_spec
+        assert cache.load(URL) == dummy_openapi_spec
+        assert get.call_count == 1
+    assert cache.read_meta(URL)["etag"] == '"v1"'
+
+
+def test_load_revalidates_in_background(tmp_path: Path, dummy_openapi_spec: dict):
+    cache = OpenAPISpecCache(cache_dir=tmp_path)
+    cache.store(URL, dummy_openapi_spec, etag='"v1"')
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=_response(304)) as get:
+        assert cache.load(URL) == dummy_openapi_spec
+        cache.wait()
+    assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_refresh_replaces_modified_spec(tmp_path: Path, dummy_openapi_spec: dict):
+    cache = OpenAPISpecCache(cache_dir=tmp_path)
+    cache.store(URL, {"openapi": "3.0.0", "paths": {}}, etag='"v1"')
+    response = _response(200, dummy_openapi_spec, {"ETag": '"v2"'})
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get", return_value=response):
+        assert cache.refresh(URL) == dummy_openapi_spec
+    cache.revalidate = False
+    assert cache.load(URL) == dummy_openapi_spec
+    assert cache.read_meta(URL)["etag"] == '"v2"'
+
+
+def test_offline_never_touches_network(tmp_path: Path, dummy_openapi_spec: dict):
+    cache = OpenAPISpecCache(cache_dir=tmp_path, offline=True)
+    with patch("elastic.mcp.fastmcp.spec_cache.httpx.get") as get:
+        with pytest.raises(FileNotFoundError):
+            cache.load(URL)
+        cache.store(URL, dummy_openapi_spec)
+        assert cache.load(URL) == dummy_openapi_spec
+        get.assert_not_called()
+
+
+def test_from_env(tmp_path: Path):
+    env = {"ELK_MCP_SPEC_CACHE_DIR": str(tmp_path), "ELK_MCP_SPEC_OFFLINE": "1"}
+    with patch.dict("os.environ", env):
+        cache = OpenAPISpecCache.from_env()
+        assert cache.cache_dir == tmp_path
+        assert cache.offline
+    with patch.dict("os.environ", {"ELK_MCP_SPEC_CACHE": "false"}):
+        assert OpenAPISpecCache.from_env() is None
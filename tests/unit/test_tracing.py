@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import httpx
+
+from elastic.mcp.fastmcp.tracing import (
+    SPAN_KINDS,
+    JSONLSpanExporter,
+    Tracer,
+    TracingTransport,
+    otlp_payload,
+    parse_traceparent,
+)
+from tests.unit.conftest import MemoryExporter
+
+
+def test_parse_traceparent():
+    header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+    assert parse_traceparent(header) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_spans_nest_under_the_current_span():
+    exporter = MemoryExporter()
+    tracer = Tracer("test", exporter)
+
+    with tracer.span("root") as root, tracer.span("child") as child:
+        assert tracer.inject() == {"traceparent": child.traceparent}
+
+    assert [span.name for span in exporter.spans] == ["child", "root"]
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert tracer.inject() == {}
+
+
+def test_span_continues_a_remote_trace():
+    tracer = Tracer("test", MemoryExporter())
+    remote = tracer.start_span("remote")
+
+    with tracer.span("server", traceparent=remote.traceparent, kind="server") as span:
+        pass
+
+    assert (span.trace_id, span.parent_id) == (remote.trace_id, remote.span_id)
+
+
+def test_span_records_errors():
+    exporter = MemoryExporter()
+    tracer = Tracer("test", exporter)
+
+    try:
+        with tracer.span("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    assert exporter.spans[0].error == "ValueError: boom"
+    assert exporter.spans[0].to_dict()["status"] == "error"
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer("chatbot", JSONLSpanExporter(str(path)))
+
+    with tracer.span("root", attributes={"session.id": "abc"}), tracer.span("child"):
+        pass
+    tracer.shutdown()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "root"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"]
+    assert lines[1]["service"] == "chatbot"
+    assert lines[1]["attributes"] == {"session.id": "abc"}
+
+
+def test_otlp_payload():
+    tracer = Tracer("chatbot")
+    span = tracer.start_span("GET /_search", kind="client", attributes={"status": 200})
+    span.end()
+
+    payload = otlp_payload([span], "chatbot")
+
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "chatbot"}
+    otlp_span = resource["scopeSpans"][0]["spans"][0]
+    assert otlp_span["traceId"] == span.trace_id
+    assert otlp_span["kind"] == SPAN_KINDS["client"]
+    assert otlp_span["attributes"] == [{"key": "status", "value": {"intValue": "200"}}]
+    assert otlp_span["status"] == {"code": 1}
+
+
+def test_tracing_transport_propagates_the_trace():
+    exporter = MemoryExporter()
+    tracer = Tracer("server", exporter)
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("traceparent"))
+        return httpx.Response(503 if request.url.path == "/down" else 200)
+
+    transport = TracingTransport(tracer, httpx.MockTransport(handler))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=transport, base_url="http://es") as client:
+            with tracer.span("tools/call search-3") as parent:
+                await client.get("/content-*/_search")
+                await client.get("/down")
+            return parent
+
+    parent = asyncio.run(_run())
+
+    search, down = exporter.spans[:2]
+    assert seen == [search.traceparent, down.traceparent]
+    assert search.parent_id == parent.span_id
+    assert search.name == "GET /content-*/_search"
+    assert search.attributes["http.response.status_code"] == httpx.codes.OK
+    assert down.error == "HTTP 503"
+    assert transport.stats() == {"requests": 2, "errors": 1}
@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from elastic.mcp.fastmcp.transport import (
+    RetryTransport,
+    TransportConfig,
+    build_transport,
+    iter_layers,
+    pool_stats,
+)
+
+
+class ScriptedTransport(httpx.AsyncBaseTransport):
+    """Transport replaying a list of responses or exceptions."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Record the request and replay the next outcome."""
+        self.requests.append(request)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, request=request)
+
+
+@pytest.fixture
+def config():
+    return TransportConfig(retries=2, retry_backoff=0, retry_max_backoff=0)
+
+
+def _send(transport: httpx.AsyncBaseTransport, method: str, url: str) -> httpx.Response:
+    async def _run():
+        async with httpx.AsyncClient(transport=transport, base_url="http://es") as client:
+            return await client.request(method, url, timeout=None)
+
+    return asyncio.run(_run())
+
+
+def test_retries_idempotent_requests(config: TransportConfig):
+    inner = ScriptedTransport(httpx.ConnectError("down"), 503, 200)
+    transport = RetryTransport(config, inner)
+
+    response = _send(transport, "POST", "/content-*/_search")
+
+    assert response.status_code == httpx.codes.OK
+    assert transport.stats() == {"requests": 1, "in_flight": 0, "retries": 2, "failures": 0}
+
+
+def test_does_not_retry_writes(config: TransportConfig):
+    inner = ScriptedTransport(httpx.ConnectError("down"), 200)
+    transport = RetryTransport(config, inner)
+
+    with pytest.raises(httpx.ConnectError):
+        _send(transport, "POST", "/content-jira/_doc")
+    assert transport.failures == 1
+    assert len(inner.requests) == 1
+
+
+def test_returns_last_response_when_retries_are_exhausted(config: TransportConfig):
+    inner = ScriptedTransport(503, 503, 503)
+    transport = RetryTransport(config, inner)
+
+    assert _send(transport, "GET", "/_cat/indices").status_code == httpx.codes.SERVICE_UNAVAILABLE
+    assert transport.retries == config.retries
+
+
+def test_applies_default_timeouts(config: TransportConfig):
+    inner = ScriptedTransport(200)
+    _send(RetryTransport(config, inner), "GET", "/")
+
+    assert inner.requests[0].extensions["timeout"] == config.timeout.as_dict()
+
+
+def test_config_from_env():
+    env = {
+        "ELK_MCP_HTTP_MAX_CONNECTIONS": "250",
+        "ELK_MCP_HTTP_HTTP2": "true",
+        "ELK_MCP_HTTP_READ_TIMEOUT": "12.5",
+        "ELK_MCP_HTTP_RETRY_STATUSES": "502, 503",
+    }
+    with patch.dict("os.environ", env):
+        config = TransportConfig.from_env(retries=0)
+    assert config.max_connections == 250  # noqa: PLR2004
+    assert config.http2
+    assert config.timeout.read == float(env["ELK_MCP_HTTP_READ_TIMEOUT"])
+    assert config.retry_statuses == (502, 503)
+    assert config.retries == 0
+
+
+def test_build_transport_exposes_pool_stats(config: TransportConfig):
+    transport, pool = build_transport(config)
+
+    assert [type(layer) for layer in iter_layers(transport)] == [RetryTransport]
+    stats = pool_stats(pool)
+    assert stats["connections"] == stats["queued"] == 0
+    assert stats["max_connections"] == config.max_connections
+
+
+def test_server_transport_stats(dummy_mcp):
+    stats = dummy_mcp.transport_stats()
+    assert set(stats) == {"MetricsTransport", "RetryTransport", "pool"}